@@ -8,8 +8,12 @@ MODIFIED: Refined placeholder check and fallback logic in update_enemy_animation
 MODIFIED: Improved robustness for missing 'idle' animation and other animations.
 MODIFIED: Ensure _last_facing_right_visual is initialized in EnemyBase, and checked here.
 MODIFIED: Changed local import of set_enemy_state to use enemy.set_state() method.
+MODIFIED: Left-facing frames come from the pre-mirrored sequences in main_game.assets
+          instead of a toImage/mirrored/fromImage round trip per animation update.
+MODIFIED: Error placeholders assign a new pixmap instead of filling the entity's current image in place,
+          which is usually a frame shared through the frame cache.
 """
-# version 2.0.5 (Use enemy.set_state() method)
+# version 2.0.7 (Placeholders never paint over shared frames)
 
 import time
 import sys
@@ -20,6 +24,7 @@ from PySide6.QtGui import QPixmap, QImage, QTransform, QColor, QFont # Added QFo
 from PySide6.QtCore import QPointF, QRectF, Qt, QSize
 
 import main_game.constants as C
+from main_game.assets import get_mirrored_frames
 
 # Logger
 try:
@@ -36,6 +41,18 @@ def get_current_ticks_monotonic() -> int:
     return int((time.monotonic() - _start_time_enemy_anim_monotonic) * 1000)
 
 
+def _set_placeholder_image(entity: Any, color: QColor):
+    """
+    Shows a solid-color placeholder the size of the current image. Assigns a new pixmap instead of
+    filling entity.image in place: that is usually a frame shared through the process-wide frame cache.
+    """
+    current_image = getattr(entity, 'image', None)
+    if not current_image or current_image.isNull(): return
+    placeholder_image = QPixmap(current_image.size())
+    placeholder_image.fill(color)
+    entity.image = placeholder_image
+
+
 def determine_enemy_animation_key(enemy: Any) -> str:
     enemy_id_log = getattr(enemy, 'enemy_id', 'Unknown')
     current_state = getattr(enemy, 'state', 'idle')
@@ -168,8 +185,7 @@ def advance_enemy_frame_and_handle_transitions(enemy: Any, current_animation_fra
 
 def update_enemy_animation(enemy: Any):
     if not getattr(enemy, '_valid_init', False) or not hasattr(enemy, 'animations') or not enemy.animations:
-        if hasattr(enemy, 'image') and enemy.image and not enemy.image.isNull():
-            enemy.image.fill(QColor(*getattr(C, 'MAGENTA', (255,0,255))))
+        _set_placeholder_image(enemy, QColor(*getattr(C, 'MAGENTA', (255,0,255))))
         return
 
     can_animate_now = (hasattr(enemy, 'alive') and enemy.alive()) or \
@@ -226,14 +242,12 @@ def update_enemy_animation(enemy: Any):
 
         if is_idle_still_invalid:
             critical(f"EnemyAnimHandler CRITICAL (ID: {getattr(enemy, 'enemy_id', 'N/A')}): Fallback 'idle' ALSO missing/invalid! Enemy visuals broken. Original key was '{original_determined_key_before_fallback}'.")
-            if hasattr(enemy, 'image') and enemy.image and not enemy.image.isNull():
-                enemy.image.fill(QColor(*getattr(C, 'MAGENTA', (255,0,255))))
+            _set_placeholder_image(enemy, QColor(*getattr(C, 'MAGENTA', (255,0,255))))
             return
 
     if not current_frames_list:
         critical(f"EnemyAnimHandler CRITICAL (ID: {getattr(enemy, 'enemy_id', 'N/A')}): current_frames_list is None even after fallbacks. Key: '{determined_key}'.")
-        if hasattr(enemy, 'image') and enemy.image and not enemy.image.isNull():
-            enemy.image.fill(QColor(*(getattr(C, 'BLUE', (0,0,255))))) # Corrected QColor init
+        _set_placeholder_image(enemy, QColor(*(getattr(C, 'BLUE', (0,0,255))))) # Corrected QColor init
         return
 
     if determined_key != 'stomp_death':
@@ -264,15 +278,13 @@ def update_enemy_animation(enemy: Any):
     if not current_frames_list or enemy.current_frame < 0 or enemy.current_frame >= len(current_frames_list):
         enemy.current_frame = 0
         if not current_frames_list:
-            if hasattr(enemy, 'image') and enemy.image and not enemy.image.isNull():
-                enemy.image.fill(QColor(*(getattr(C, 'YELLOW', (255,255,0)))))
+            _set_placeholder_image(enemy, QColor(*(getattr(C, 'YELLOW', (255,255,0)))))
             return
 
     image_this_frame = current_frames_list[enemy.current_frame]
     if image_this_frame.isNull():
         critical(f"EnemyAnimHandler (ID: {getattr(enemy, 'enemy_id', 'N/A')}): image_this_frame is NULL for key '{render_key_for_final_image}', frame {enemy.current_frame}.")
-        if hasattr(enemy, 'image') and enemy.image and not enemy.image.isNull():
-            enemy.image.fill(QColor(*getattr(C, 'MAGENTA', (255,0,255))))
+        _set_placeholder_image(enemy, QColor(*getattr(C, 'MAGENTA', (255,0,255))))
         return
 
     display_facing_right = getattr(enemy, 'facing_right', True)
@@ -282,9 +294,9 @@ def update_enemy_animation(enemy: Any):
     final_image_to_set = image_this_frame
     if not display_facing_right:
         if not (render_key_for_final_image in ['petrified', 'smashed']):
-            q_img = image_this_frame.toImage()
-            if not q_img.isNull():
-                final_image_to_set = QPixmap.fromImage(q_img.mirrored(True, False))
+            mirrored_frames_list = get_mirrored_frames(current_frames_list)
+            if enemy.current_frame < len(mirrored_frames_list) and not mirrored_frames_list[enemy.current_frame].isNull():
+                final_image_to_set = mirrored_frames_list[enemy.current_frame]
             
     image_content_has_changed = (not hasattr(enemy, 'image') or enemy.image is None) or \
                                 (hasattr(enemy.image, 'cacheKey') and hasattr(final_image_to_set, 'cacheKey') and \
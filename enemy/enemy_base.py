@@ -12,8 +12,10 @@ MODIFIED: Added overall_fire_effect_start_time for 5s fire cycle management.
 MODIFIED: Zapped GIF path correctly formed for generic soldier types.
 MODIFIED: Corrected logger fallback assignment.
 MODIFIED: More robust logger setup for import failures using correct relative path.
+MODIFIED: Animations and stone frames come from the shared frame cache (owner=self); stone frames are no longer deep-copied per instance.
+MODIFIED: get_render_sprite() lets GameSceneWidget draw an enemy as a plain world-space sprite when it has no health bar.
 """
-# version 2.0.12 (Logger import path fix, robust logger setup)
+# version 2.0.14 (get_render_sprite)
 
 import os
 import random
@@ -118,7 +120,7 @@ class EnemyBase:
         if self._valid_init and self.final_asset_color_name != "unknown" and self.final_asset_color_name in available_enemy_asset_folders:
             chosen_enemy_asset_folder = os.path.join(character_base_asset_folder, self.final_asset_color_name)
             debug(f"EnemyBase (ID: {self.enemy_id}): Loading generic ENEMY (soldier-type) animations from: '{chosen_enemy_asset_folder}'")
-            self.animations = load_enemy_animations(relative_asset_folder=chosen_enemy_asset_folder)
+            self.animations = load_enemy_animations(relative_asset_folder=chosen_enemy_asset_folder, owner=self)
         elif self._valid_init and self.final_asset_color_name == "knight_type_specific":
             debug(f"EnemyBase (ID: {self.enemy_id}): final_asset_color_name is '{self.final_asset_color_name}'. Knight subclass will handle specific animation loading.")
             self.animations = {}
@@ -233,18 +235,18 @@ class EnemyBase:
             common_stone_png_path = resource_path(os.path.join(stone_common_folder, '__Stone.png'))
             common_stone_smashed_gif_path = resource_path(os.path.join(stone_common_folder, '__StoneSmashed.gif'))
 
-            loaded_stone_frames = load_gif_frames(common_stone_png_path)
+            loaded_stone_frames = load_gif_frames(common_stone_png_path, owner=self)
             if loaded_stone_frames and not self._is_placeholder_qpixmap(loaded_stone_frames[0]):
                 self.stone_image_frame_original = loaded_stone_frames[0]
             else: warning(f"EnemyBase (ID: {self.enemy_id}): Failed to load common __Stone.png. Using placeholder.")
 
-            loaded_smashed_frames = load_gif_frames(common_stone_smashed_gif_path)
+            loaded_smashed_frames = load_gif_frames(common_stone_smashed_gif_path, owner=self)
             if loaded_smashed_frames and not self._is_placeholder_qpixmap(loaded_smashed_frames[0]):
                 self.stone_smashed_frames_original = loaded_smashed_frames
             else: warning(f"EnemyBase (ID: {self.enemy_id}): Failed to load common __StoneSmashed.gif. Using placeholder.")
 
-        self.stone_image_frame: QPixmap = self.stone_image_frame_original.copy()
-        self.stone_smashed_frames: List[QPixmap] = [f.copy() for f in self.stone_smashed_frames_original]
+        self.stone_image_frame: QPixmap = self.stone_image_frame_original # Shared from the frame cache, not deep-copied
+        self.stone_smashed_frames: List[QPixmap] = list(self.stone_smashed_frames_original)
 
         if not self._valid_init:
             warning(f"EnemyBase (ID: {self.enemy_id}): Initialization completed with _valid_init as False.")
@@ -312,7 +314,7 @@ class EnemyBase:
             soldier_base_folder_reset = os.path.join("assets", "enemy_characters", "soldier")
             chosen_enemy_asset_folder_on_reset = os.path.join(soldier_base_folder_reset, self.final_asset_color_name)
             
-            self.animations = load_enemy_animations(relative_asset_folder=chosen_enemy_asset_folder_on_reset)
+            self.animations = load_enemy_animations(relative_asset_folder=chosen_enemy_asset_folder_on_reset, owner=self)
             if self.animations is not None:
                 self._valid_init = True
                 idle_frames = self.animations.get('idle')
@@ -368,8 +370,8 @@ class EnemyBase:
         
         self.is_zapped = False; self.zapped_timer_start = 0; self.zapped_damage_last_tick = 0
 
-        self.stone_image_frame = self.stone_image_frame_original.copy()
-        self.stone_smashed_frames = [f.copy() for f in self.stone_smashed_frames_original]
+        self.stone_image_frame = self.stone_image_frame_original
+        self.stone_smashed_frames = list(self.stone_smashed_frames_original)
         
         self._alive = True
         self.state = 'idle'
@@ -377,6 +379,14 @@ class EnemyBase:
         self.last_anim_update = get_current_ticks_monotonic()
         debug(f"EnemyBase (ID: {self.enemy_id}): Core attributes reset.")
 
+    def get_render_sprite(self) -> Optional[Tuple[QPixmap, float]]:
+        """(pixmap, opacity) drawn at rect.topLeft() in world space; None falls back to draw_pyside (health bar)."""
+        if not self._valid_init or not self.image or self.image.isNull() or not self.rect.isValid(): return None
+        if getattr(C, "DRAW_ENEMY_ABOVE_HEALTH_BAR", False) and self.current_health < self.max_health and \
+           not self.is_dead and not self.is_petrified: return None
+        should_draw = self._alive or (self.is_dead and not self.death_animation_finished and not self.is_petrified) or self.is_petrified
+        return (self.image, 1.0) if should_draw else None
+
     def draw_pyside(self, painter: QPainter, camera: Any):
         if not self._valid_init or not self.image or self.image.isNull() or not self.rect.isValid():
             return
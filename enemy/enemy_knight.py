@@ -43,7 +43,7 @@ if _PROJECT_ROOT_GRANDPARENT_KNIGHT not in sys.path:
 
 # Game imports
 import main_game.constants as C
-from main_game.assets import load_gif_frames, resource_path # Corrected path for assets
+from main_game.assets import load_gif_frames, resource_path, prepare_mirrored_animations # Corrected path for assets
 
 # Base Enemy Class (relative import from within enemy package)
 try:
@@ -225,7 +225,7 @@ class EnemyKnight(Enemy):
         knight_animations: Dict[str, List[QPixmap]] = {}
         for anim_name_key, relative_anim_path_val in KNIGHT_ANIM_PATHS.items():
             full_path_to_gif = resource_path(relative_anim_path_val) # resource_path needs path relative to project root
-            frames = load_gif_frames(full_path_to_gif)
+            frames = load_gif_frames(full_path_to_gif, owner=self)
             
             if not frames or (frames and frames[0].isNull()) or \
                (len(frames) == 1 and self._is_placeholder_qpixmap(frames[0])):
@@ -240,6 +240,7 @@ class EnemyKnight(Enemy):
                 placeholder_color = QColor(200,0,0) if is_core_anim else QColor(200,100,0)
                 frames = [self._create_placeholder_qpixmap(placeholder_color, anim_name_key[:3].upper(), QSize(w,h))]
             knight_animations[anim_name_key] = frames
+        prepare_mirrored_animations(knight_animations) # Left-facing twins built once, shared by all knights
         return knight_animations
 
     def _knight_ai_update(self, players_list_for_ai: list, current_time_ms: int):
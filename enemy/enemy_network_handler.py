@@ -303,7 +303,7 @@ def set_enemy_network_data(enemy: Any, network_data: Dict[str, Any]):
         enemy.color_name = new_color_name_from_net
         new_asset_folder = os.path.join('characters', enemy.color_name)
         # Ensure load_enemy_animations exists and is imported correctly in assets.py
-        enemy.animations = load_enemy_animations(relative_asset_folder=new_asset_folder)
+        enemy.animations = load_enemy_animations(relative_asset_folder=new_asset_folder, owner=enemy)
         if enemy.animations is None:
             error(f"Client CRITICAL: Failed to reload animations for enemy {getattr(enemy, 'enemy_id', 'N/A')} with new color {enemy.color_name} from '{new_asset_folder}'")
             enemy._valid_init = False
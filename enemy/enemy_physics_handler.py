@@ -32,6 +32,7 @@ if _PROJECT_ROOT_GRANDPARENT_PHYSICS not in sys.path:
 import main_game.constants as C
 from main_game.tiles import Lava # Assuming tiles.py is in main_game
 from player.statue import Statue # Assuming statue.py is in player.statue
+from main_game.spatial_grid import query_platforms
 
 if TYPE_CHECKING:
     from enemy.enemy import Enemy as EnemyClass_TYPE # Use relative import if type hinting Enemy
@@ -91,7 +92,7 @@ def _check_enemy_platform_collisions(enemy: 'EnemyClass_TYPE', direction: str, p
         warning(f"Enemy {getattr(enemy, 'enemy_id', 'N/A')}: Missing essential attributes for platform collision. Skipping.")
         return
 
-    for platform_idx, platform_obj in enumerate(platforms_list):
+    for platform_idx, platform_obj in enumerate(query_platforms(platforms_list, enemy.rect)):
         if not hasattr(platform_obj, 'rect') or not isinstance(platform_obj.rect, QRectF) or not platform_obj.rect.isValid():
              warning(f"Enemy Collision: Platform object {platform_idx} missing valid rect. Skipping.")
              continue
@@ -82,7 +82,7 @@ class EnemySoldier(Enemy):
 
         soldier_asset_folder_relative_path = os.path.join("assets", "enemy_characters", "soldier", self.soldier_color)
         
-        self.animations = load_all_player_animations(relative_asset_folder=soldier_asset_folder_relative_path)
+        self.animations = load_all_player_animations(relative_asset_folder=soldier_asset_folder_relative_path, owner=self)
 
         if self.animations is None or not self.animations.get('idle') or \
            (self.animations.get('idle') and (not self.animations['idle'] or self.animations['idle'][0].isNull())):
@@ -17,8 +17,16 @@ MODIFIED: Corrected NameError for e_init in _refresh_appcore_joystick_list.
 MODIFIED: Corrected import paths for Player and Statue from within main_game.
 MODIFIED: `player.animations` is now checked to be a dictionary before using it in `update_game_loop`.
 MODIFIED: Fixed NameError for hazards_list_this_frame in host_waiting update.
+MODIFIED: update_game_loop uses a fixed-timestep accumulator (capped catch-up steps) driven by a
+          RENDER_FPS precise timer; per-step logic moved to _run_game_logic_step. GameSceneWidget
+          interpolates between the last two logic states.
+MODIFIED: PROFILER_OVERLAY_TOGGLE_KEY (F3) toggles the tick profiler overlay in the game scene;
+          the profiler's per-frame rows are dumped to CSV on close if the overlay was shown (or PROFILER_DUMP_CSV_ON_EXIT).
+MODIFIED: The game scene widget comes from game_ui.create_game_scene_widget (raster or OpenGL backend per RENDER_BACKEND).
+MODIFIED: The host_waiting simulation collides against the 'platforms_grid' spatial index and removes
+          smashed/killed statues from it.
 """
-# version 2.1.16 (Fixed NameError for hazards_list_this_frame)
+# version 2.2.4 (Profiler CSV only for profiled sessions)
 
 import sys
 import os
@@ -79,7 +87,9 @@ try:
         get_input_snapshot, update_qt_key_press, update_qt_key_release,
         clear_qt_key_events_this_frame
     )
-    from main_game.game_ui import GameSceneWidget, IPInputDialog
+    from main_game.game_ui import create_game_scene_widget, IPInputDialog
+    from main_game.tick_profiler import get_tick_profiler
+    from main_game.spatial_grid import query_platforms
 
     try:
         from network.server_logic import ServerState
@@ -314,7 +324,7 @@ class MainWindow(QMainWindow):
         self.stacked_widget = QStackedWidget(self)
         self.main_menu_widget = _create_main_menu_widget(self)
         self.map_select_widget = _create_map_select_widget(self)
-        self.game_scene_widget = GameSceneWidget(self.game_elements, self.fonts, self)
+        self.game_scene_widget = create_game_scene_widget(self.game_elements, self.fonts, self) # Backend from C.RENDER_BACKEND
 
         self.editor_content_container = QWidget(); self.editor_content_container.setLayout(QVBoxLayout())
         cast(QVBoxLayout, self.editor_content_container.layout()).setContentsMargins(0,0,0,0)
@@ -334,8 +344,13 @@ class MainWindow(QMainWindow):
 
         self.network_status_update.connect(self.on_network_status_update_slot)
         self.lan_server_search_status.connect(self.on_lan_server_search_status_update_slot)
-        self.game_update_timer = QTimer(self); self.game_update_timer.timeout.connect(self.update_game_loop)
-        fps_val = getattr(C, 'FPS', 60); self.game_update_timer.start(1000 // max(1, fps_val))
+        self._logic_time_accumulator_sec = 0.0
+        self._last_game_loop_time_sec = time.perf_counter()
+        self._profiler_toggle_key = getattr(Qt.Key, f"Key_{getattr(C, 'PROFILER_OVERLAY_TOGGLE_KEY', 'F3')}", Qt.Key.Key_F3)
+        self.game_update_timer = QTimer(self); self.game_update_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.game_update_timer.timeout.connect(self.update_game_loop)
+        # The timer drives rendering; logic runs at a fixed FPS inside update_game_loop via an accumulator
+        render_fps_val = getattr(C, 'RENDER_FPS', getattr(C, 'FPS', 60)); self.game_update_timer.start(max(1, 1000 // max(1, render_fps_val)))
 
         info("MainWindow initialization complete.")
         debug("MainWindow.__init__ finished.")
@@ -494,6 +509,8 @@ class MainWindow(QMainWindow):
         clear_qt_key_events_this_frame()
     def keyPressEvent(self, event: QKeyEvent):
         qt_key_enum = Qt.Key(event.key()); update_qt_key_press(qt_key_enum, event.isAutoRepeat())
+        if qt_key_enum == self._profiler_toggle_key and self.current_view_name == "game_scene" and not event.isAutoRepeat():
+            get_tick_profiler().toggle_overlay(); event.accept(); return
         active_ui_element = self.current_modal_dialog if self.current_modal_dialog else self.current_view_name; navigated_by_keyboard_this_event = False
         if active_ui_element in ["menu", "map_select"] and not event.isAutoRepeat():
             key_pressed = event.key(); nav_direction = 0; is_activation_key = key_pressed in [Qt.Key.Key_Return, Qt.Key.Key_Enter, Qt.Key.Key_Space]
@@ -557,9 +574,44 @@ class MainWindow(QMainWindow):
                 except pygame.error as e_pump:
                     if self.render_print_limiter.can_log("joy_pump_fail_game_loop"): warning(f"AppCore GameLoop: Pygame event pump error: {e_pump}")
             elif self.render_print_limiter.can_log("joy_sys_not_init_game_loop"): warning("AppCore GameLoop: Pygame joystick not globally init. Cannot pump events for gameplay.")
+        fixed_dt_sec = 1.0 / max(1, getattr(C, 'FPS', 60))
+        now_sec = time.perf_counter()
+        frame_elapsed_sec = min(max(0.0, now_sec - self._last_game_loop_time_sec), getattr(C, 'MAX_FRAME_DELTA_SEC', 0.25))
+        self._last_game_loop_time_sec = now_sec
+
+        interpolation_alpha = 1.0
+        if self.current_game_mode in ("couch_play", "host_waiting") and self.app_status.app_running:
+            # Fixed-timestep accumulator: logic always advances in steps of exactly 1/FPS. Several
+            # steps may run per timer tick to catch up, capped so a long stall doesn't spiral.
+            self._logic_time_accumulator_sec += frame_elapsed_sec
+            max_logic_steps = max(1, int(getattr(C, 'MAX_LOGIC_STEPS_PER_TICK', 5)))
+            logic_steps_this_tick = 0
+            while self._logic_time_accumulator_sec >= fixed_dt_sec and logic_steps_this_tick < max_logic_steps:
+                self.game_scene_widget.capture_interpolation_snapshot()
+                self._logic_time_accumulator_sec -= fixed_dt_sec
+                logic_steps_this_tick += 1
+                step_ok = self._run_game_logic_step(fixed_dt_sec)
+                clear_qt_key_events_this_frame() # Key presses are consumed by exactly one logic step
+                if not step_ok: break
+            if self._logic_time_accumulator_sec >= fixed_dt_sec: # Catch-up cap hit; drop the backlog
+                if self.render_print_limiter.can_log("logic_catchup_cap_hit"):
+                    debug(f"AppCore GameLoop: Logic fell behind by {self._logic_time_accumulator_sec * 1000.0:.1f}ms. Dropping backlog after {logic_steps_this_tick} steps.")
+                self._logic_time_accumulator_sec %= fixed_dt_sec
+            interpolation_alpha = self._logic_time_accumulator_sec / fixed_dt_sec
+        else:
+            self._logic_time_accumulator_sec = 0.0
+            self._run_game_logic_step(fixed_dt_sec)
+            clear_qt_key_events_this_frame()
+            self.game_scene_widget.clear_interpolation_snapshot()
+
+        if self.current_view_name == "game_scene":
+            self.game_scene_widget.set_interpolation_alpha(interpolation_alpha)
+            if self.game_elements: self.game_scene_widget.update_game_state(0)
+
+    def _run_game_logic_step(self, dt_sec: float) -> bool:
+        """Runs one fixed-size logic step for the current local game mode. Returns False if the loop should stop catching up."""
         game_is_ready_for_logic = self.game_elements.get('game_ready_for_logic', False)
         init_is_in_progress = self.game_elements.get('initialization_in_progress', True)
-        dt_sec = 1.0 / max(1, getattr(C, 'FPS', 60))
 
         if self.current_game_mode == "couch_play" and self.app_status.app_running:
             if game_is_ready_for_logic and not init_is_in_progress:
@@ -571,9 +623,9 @@ class MainWindow(QMainWindow):
                     self.request_map_change
                 )
                 if not continue_game and not self.game_elements.get("_map_change_initiated_by_trigger", False):
-                    self.stop_current_game_mode(show_menu=True)
+                    self.stop_current_game_mode(show_menu=True); return False
                 elif self.game_elements.get("_map_change_initiated_by_trigger", False):
-                    self.game_elements["_map_change_initiated_by_trigger"] = False
+                    self.game_elements["_map_change_initiated_by_trigger"] = False; return False # New map loaded; end this tick's catch-up
         elif self.current_game_mode == "host_active" and self.app_status.app_running and self.server_state and self.server_state.client_ready:
              if game_is_ready_for_logic and not init_is_in_progress: pass
         elif self.current_game_mode == "host_waiting" and self.app_status.app_running and self.server_state:
@@ -581,14 +633,14 @@ class MainWindow(QMainWindow):
                 p1: Optional[Player] = self.game_elements.get("player1"); p1_actions: Dict[str, bool] = {}
                 if p1 and isinstance(p1, Player):
                     p1_actions = self.get_p1_input_snapshot_for_logic(p1)
-                    if p1_actions.get("pause"): self.stop_current_game_mode(show_menu=True); return
+                    if p1_actions.get("pause"): self.stop_current_game_mode(show_menu=True); return False
                     if p1_actions.get("reset"):
                         info("AppCore (host_waiting): Player 1 initiated game reset.")
                         screen_w = self.game_scene_widget.width() if self.game_scene_widget.width() > 1 else self.width(); screen_h = self.game_scene_widget.height() if self.game_scene_widget.height() > 1 else self.height()
                         map_name_to_reload = self.game_elements.get("map_name", self.game_elements.get("loaded_map_name"))
                         if map_name_to_reload:
                             try: from main_game.game_setup import initialize_game_elements
-                            except ImportError: error("AppCore CRITICAL (host_waiting reset): Could not import initialize_game_elements! Reset will fail."); return
+                            except ImportError: error("AppCore CRITICAL (host_waiting reset): Could not import initialize_game_elements! Reset will fail."); return False
                             reset_ok = initialize_game_elements(current_width=screen_w, current_height=screen_h, game_elements_ref=self.game_elements, for_game_mode=str(self.current_game_mode), map_module_name=map_name_to_reload)
                             if reset_ok: info("AppCore (host_waiting): Game reset successful."); p1_after_reset = self.game_elements.get("player1"); camera_after_reset = self.game_elements.get("camera")
                             if p1_after_reset and camera_after_reset: camera_after_reset.update(p1_after_reset)
@@ -601,6 +653,8 @@ class MainWindow(QMainWindow):
                     
                     # **FIX APPLIED HERE**
                     platforms_list_this_frame = self.game_elements.get("platforms_list", [])
+                    platforms_grid_host_wait = self.game_elements.get("platforms_grid")
+                    if platforms_grid_host_wait is not None: platforms_list_this_frame = platforms_grid_host_wait # Spatial index for collision queries
                     ladders_list_this_frame = self.game_elements.get("ladders_list", [])
                     hazards_list_this_frame = self.game_elements.get("hazards_list", []) 
 
@@ -612,29 +666,35 @@ class MainWindow(QMainWindow):
                         
                         p1.update(dt_sec, platforms_list_this_frame, ladders_list_this_frame, hazards_list_this_frame, other_players_for_p1_local, hittable_targets_for_p1_melee)
 
+                platforms_grid_appcore = self.game_elements.get("platforms_grid")
+                platform_collidables_appcore = platforms_grid_appcore if platforms_grid_appcore is not None else self.game_elements.get("platforms_list", [])
                 active_players_for_ai_host_wait = [p1] if p1 and hasattr(p1,'alive') and p1.alive() else []
                 for enemy in list(self.game_elements.get("enemy_list",[])):
-                    if hasattr(enemy, 'update'): enemy.update(dt_sec, active_players_for_ai_host_wait, self.game_elements.get("platforms_list",[]), self.game_elements.get("hazards_list",[]), self.game_elements.get("enemy_list",[]))
+                    if hasattr(enemy, 'update'): enemy.update(dt_sec, active_players_for_ai_host_wait, platform_collidables_appcore, self.game_elements.get("hazards_list",[]), self.game_elements.get("enemy_list",[]))
                 
-                current_statues_list_appcore = list(self.game_elements.get("statue_objects", [])); platforms_list_appcore = self.game_elements.get("platforms_list", [])
+                current_statues_list_appcore = list(self.game_elements.get("statue_objects", [])); platforms_list_appcore = platform_collidables_appcore
                 statues_to_keep_appcore = []; statues_killed_this_frame_appcore = []
                 for statue_instance_ac in current_statues_list_appcore:
                     if hasattr(statue_instance_ac, 'alive') and statue_instance_ac.alive():
                         if hasattr(statue_instance_ac, 'apply_physics_step') and not statue_instance_ac.is_smashed: statue_instance_ac.apply_physics_step(dt_sec, platforms_list_appcore)
                         if hasattr(statue_instance_ac, 'update'): statue_instance_ac.update(dt_sec)
+                        if platforms_grid_appcore is not None and statue_instance_ac.is_smashed and statue_instance_ac in platforms_grid_appcore: platforms_grid_appcore.remove(statue_instance_ac) # Smashed statues are no longer solid
                         if statue_instance_ac.alive(): statues_to_keep_appcore.append(statue_instance_ac)
                         else: statues_killed_this_frame_appcore.append(statue_instance_ac); debug(f"AppCore (host_waiting): Statue {statue_instance_ac.statue_id} no longer alive.")
                 self.game_elements["statue_objects"] = statues_to_keep_appcore
                 if statues_killed_this_frame_appcore:
                     current_platforms = self.game_elements.get("platforms_list", []); new_platforms_list_ac = [p_plat for p_plat in current_platforms if not (isinstance(p_plat, Statue) and p_plat in statues_killed_this_frame_appcore)]
                     if len(new_platforms_list_ac) != len(current_platforms): self.game_elements["platforms_list"] = new_platforms_list_ac; debug(f"AppCore (host_waiting): Updated platforms_list after statue removal. New count: {len(new_platforms_list_ac)}")
+                    if platforms_grid_appcore is not None:
+                        for killed_statue_ac in statues_killed_this_frame_appcore: platforms_grid_appcore.remove(killed_statue_ac)
+                    else: platform_collidables_appcore = self.game_elements.get("platforms_list", [])
                 
                 projectiles_current_list = self.game_elements.get("projectiles_list", [])
                 for proj_obj in list(projectiles_current_list):
                     if hasattr(proj_obj, 'update'):
                         proj_targets = [e for e in self.game_elements.get("enemy_list",[]) if hasattr(e, 'alive') and e.alive()]
                         proj_targets.extend([s for s in self.game_elements.get("statue_objects", []) if hasattr(s, 'alive') and s.alive() and not getattr(s, 'is_smashed', False)])
-                        proj_obj.update(dt_sec, self.game_elements.get("platforms_list",[]), proj_targets)
+                        proj_obj.update(dt_sec, platform_collidables_appcore, proj_targets)
                     if not (hasattr(proj_obj, 'alive') and proj_obj.alive()):
                         projectiles_list_ref = self.game_elements.get("projectiles_list");
                         if projectiles_list_ref and proj_obj in projectiles_list_ref: projectiles_list_ref.remove(proj_obj)
@@ -669,7 +729,7 @@ class MainWindow(QMainWindow):
                         chest_instance_logic.on_ground = False
                         if chest_landed_on_p1_and_killed: chest_instance_logic.on_ground = True
                         if not chest_landed_on_p1_and_killed and not chest_instance_logic.is_collected_flag_internal and chest_instance_logic.state == 'closed':
-                            for plat_chest in self.game_elements.get("platforms_list", []):
+                            for plat_chest in query_platforms(platform_collidables_appcore, chest_instance_logic.rect):
                                 if isinstance(plat_chest, Statue) and plat_chest.is_smashed: continue
                                 if hasattr(plat_chest, 'rect') and chest_instance_logic.rect.intersects(plat_chest.rect):
                                      # ... (chest platform collision as before for each chest_instance_logic) ...
@@ -695,10 +755,7 @@ class MainWindow(QMainWindow):
                     else: camera.static_update()
         elif self.current_game_mode == "join_active" and self.app_status.app_running and self.client_state and self.client_state.map_download_status == "present": pass
         
-        if self.current_view_name == "game_scene":
-            if self.game_elements: self.game_scene_widget.update_game_state(0)
-        
-        clear_qt_key_events_this_frame()
+        return True
 
     def closeEvent(self, event: QCloseEvent):
         info("MainWindow: Close event received. Shutting down application."); debug("closeEvent called.")
@@ -722,6 +779,8 @@ class MainWindow(QMainWindow):
             self.actual_controls_settings_instance.deleteLater(); self.actual_controls_settings_instance = None; debug("Controls settings instance cleaned up.")
         if self.app_status.app_running: self.app_status.quit_app()
         app_game_modes.stop_current_game_mode_logic(self, show_menu=False)
+        tick_profiler = get_tick_profiler()
+        if getattr(C, 'PROFILER_DUMP_CSV_ON_EXIT', False) or tick_profiler.overlay_used: tick_profiler.dump_csv() # Only sessions someone profiled
         if game_config._pygame_initialized_globally:
             if game_config._joystick_initialized_globally:
                 try:
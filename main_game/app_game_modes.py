@@ -90,7 +90,9 @@ def _initialize_game_entities(main_window: 'MainWindow', map_name_folder_stem: s
 
     if mode == "couch_play" and num_players_for_couch_coop is not None:
         main_window.game_elements['num_active_players_for_mode'] = num_players_for_couch_coop
-    else: # Default for host, join
+    elif mode == "host_game": # Host plus a slot for every remote client it may accept (players 2-4)
+        main_window.game_elements['num_active_players_for_mode'] = 1 + max(1, min(3, int(getattr(C, "MAX_REMOTE_PLAYERS", 3))))
+    else: # Default for join; the server's snapshots add the other players
         main_window.game_elements['num_active_players_for_mode'] = 2 if mode != "join_ip" and mode != "join_lan" else 1
 
     success = initialize_game_elements(
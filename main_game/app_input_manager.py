@@ -27,6 +27,12 @@ _qt_key_events_this_frame_global: List[Tuple[QKeyEvent.Type, Qt.Key, bool]] = []
 _app_input_limiter = PrintLimiter(default_limit=10, default_period_sec=1.0) # Shortened period for more frequent logs
 
 
+def _get_platform_collidables(game_elements_ref: Dict[str, Any]) -> Any:
+    """The 'platforms_grid' spatial index when the map has one (can_stand_up queries it), else platforms_list."""
+    platforms_grid = game_elements_ref.get("platforms_grid")
+    return platforms_grid if platforms_grid is not None else game_elements_ref.get("platforms_list", [])
+
+
 def update_qt_key_press(key: Qt.Key, is_auto_repeat: bool):
     _qt_keys_pressed_snapshot_global[key] = True
     if not is_auto_repeat:
@@ -74,7 +80,7 @@ def get_input_snapshot(
             dict(_qt_keys_pressed_snapshot_global), 
             list(_qt_key_events_this_frame_global), 
             keyboard_map_to_use_for_qt, 
-            game_elements_ref.get("platforms_list", []), 
+            _get_platform_collidables(game_elements_ref), 
             joystick_data=None
         )
         for action, is_active in keyboard_action_events.items():
@@ -150,7 +156,7 @@ def get_input_snapshot(
 
                 controller_action_events = process_player_input_logic(
                     player_instance, {}, [], active_runtime_joystick_map,
-                    game_elements_ref.get("platforms_list", []), joystick_data=joystick_data_for_handler
+                    _get_platform_collidables(game_elements_ref), joystick_data=joystick_data_for_handler
                 )
 
                 # --- DEBUG: After calling process_player_input_logic for joystick ---
@@ -10,16 +10,26 @@ MODIFIED: All internal path constructions within loading functions now assume
           `relative_asset_folder` is a path *relative to the project root*
           (e.g., "assets/category/subcategory") and `resource_path` is applied
           to the full combined path including the GIF filename.
+MODIFIED: Added a process-wide, reference-counted frame cache. GIFs are decoded once per
+          (path, mtime) and every caller shares the same immutable tuple of QPixmaps.
+          Owners passed to the loaders release their reference when garbage collected;
+          unreferenced entries are dropped by trim_frame_cache(). Hit/miss counters are
+          available through get_frame_cache_stats().
+MODIFIED: Left-facing (mirrored) frames are built once per frame sequence and shared
+          (get_mirrored_frames / prepare_mirrored_animations); character animation loaders
+          prepare them at load time so animation handlers only swap references.
 """
-# version 2.0.8 (Refined internal path construction for resource_path)
+# version 2.2.0 (Pre-mirrored frame sequences)
 
 from PySide6.QtWidgets import (
     QApplication # Only needed if running this file directly for testing
 )
 import os
 import sys
+import threading
+import weakref
 from PIL import Image # Pillow library for GIF processing
-from typing import Dict, List, Optional, Tuple # For type hinting
+from typing import Any, Dict, List, Optional, Sequence, Tuple # For type hinting
 
 from PySide6.QtGui import QPixmap, QImage, QColor, QPainter, QFont # PySide6 image/drawing tools
 from PySide6.QtCore import QSize, Qt # For QSize and Qt enums
@@ -94,17 +104,134 @@ def _create_error_placeholder(color: QColor, text: str = "ERR", size: QSize = QS
     painter.end()
     return pixmap
 
+# --- Shared Frame Cache ---
+# Keyed by (normalized absolute path, mtime_ns) so an edited asset on disk is decoded again.
+# Entries hold an immutable tuple of QPixmaps plus the number of live owners using it.
+FrameCacheKey = Tuple[str, int]
+_frame_cache: Dict[FrameCacheKey, Dict[str, Any]] = {}
+_frame_cache_lock = threading.RLock()
+_frame_cache_counters: Dict[str, int] = {'hits': 0, 'misses': 0, 'evictions': 0}
+# id(frames tuple) -> cache entry, so a frame sequence handed out by the cache can find its mirrored twin
+_frame_cache_entries_by_frames_id: Dict[int, Dict[str, Any]] = {}
+# Mirrors of sequences that did not come from the cache (placeholders, fallbacks): id -> (sequence, mirrored)
+_uncached_mirrored_frames: Dict[int, Tuple[Sequence[QPixmap], Tuple[QPixmap, ...]]] = {}
+
+def _release_frame_cache_ref(cache_key: FrameCacheKey):
+    """weakref.finalize callback: drops one owner reference from a cache entry."""
+    with _frame_cache_lock:
+        entry = _frame_cache.get(cache_key)
+        if entry is not None and entry['refs'] > 0:
+            entry['refs'] -= 1
+
+def _acquire_cached_frames(normalized_path: str, owner: Optional[Any]) -> Tuple[QPixmap, ...]:
+    try:
+        mtime_ns = os.stat(normalized_path).st_mtime_ns
+    except OSError:
+        mtime_ns = 0
+    cache_key: FrameCacheKey = (normalized_path, mtime_ns)
+    with _frame_cache_lock:
+        entry = _frame_cache.get(cache_key)
+        if entry is not None:
+            _frame_cache_counters['hits'] += 1
+        else:
+            _frame_cache_counters['misses'] += 1
+            entry = {'frames': tuple(_decode_gif_frames(normalized_path)), 'mirrored': None, 'refs': 0}
+            _frame_cache[cache_key] = entry
+            _frame_cache_entries_by_frames_id[id(entry['frames'])] = entry
+        if owner is not None:
+            try:
+                weakref.finalize(owner, _release_frame_cache_ref, cache_key)
+                entry['refs'] += 1
+            except TypeError: # Owner cannot be weak-referenced; frames are still shared, just not counted
+                pass
+        return entry['frames']
+
+def trim_frame_cache() -> int:
+    """Drops cache entries no live owner references. Returns the number of entries evicted."""
+    with _frame_cache_lock:
+        unused_keys = [key for key, entry in _frame_cache.items() if entry['refs'] <= 0]
+        for key in unused_keys:
+            _frame_cache_entries_by_frames_id.pop(id(_frame_cache[key]['frames']), None)
+            del _frame_cache[key]
+        _frame_cache_counters['evictions'] += len(unused_keys)
+        _uncached_mirrored_frames.clear()
+    if unused_keys:
+        debug(f"Assets FrameCache: Trimmed {len(unused_keys)} unreferenced entries.")
+    return len(unused_keys)
+
+def clear_frame_cache():
+    """Empties the frame cache and resets its counters."""
+    with _frame_cache_lock:
+        _frame_cache.clear()
+        _frame_cache_entries_by_frames_id.clear()
+        _uncached_mirrored_frames.clear()
+        for counter_name in _frame_cache_counters:
+            _frame_cache_counters[counter_name] = 0
+
+def get_frame_cache_stats() -> Dict[str, int]:
+    """Returns hit/miss/eviction counters plus current entry, frame and owner-reference totals."""
+    with _frame_cache_lock:
+        stats = dict(_frame_cache_counters)
+        stats['entries'] = len(_frame_cache)
+        stats['frames'] = sum(len(entry['frames']) for entry in _frame_cache.values())
+        stats['refs'] = sum(entry['refs'] for entry in _frame_cache.values())
+        stats['mirrored'] = sum(1 for entry in _frame_cache.values() if entry['mirrored'] is not None)
+    return stats
+
+def _mirror_frames(frames: Sequence[QPixmap]) -> Tuple[QPixmap, ...]:
+    mirrored_frames: List[QPixmap] = []
+    for frame_pixmap in frames:
+        q_img = frame_pixmap.toImage() if frame_pixmap is not None and not frame_pixmap.isNull() else None
+        mirrored_frames.append(QPixmap.fromImage(q_img.mirrored(True, False)) if q_img is not None and not q_img.isNull() else frame_pixmap)
+    return tuple(mirrored_frames)
+
+def get_mirrored_frames(frames: Sequence[QPixmap]) -> Sequence[QPixmap]:
+    """
+    Returns the horizontally mirrored (left-facing) twin of a frame sequence, index for index.
+    Sequences from the frame cache share one mirrored tuple process-wide; any other sequence
+    is mirrored once and memoized until the next trim_frame_cache().
+    """
+    if not frames:
+        return frames
+    with _frame_cache_lock:
+        entry = _frame_cache_entries_by_frames_id.get(id(frames))
+        if entry is not None and entry['frames'] is frames:
+            if entry['mirrored'] is None:
+                entry['mirrored'] = _mirror_frames(frames)
+            return entry['mirrored']
+        memo = _uncached_mirrored_frames.get(id(frames))
+        if memo is not None and memo[0] is frames:
+            return memo[1]
+        mirrored_frames = _mirror_frames(frames)
+        _uncached_mirrored_frames[id(frames)] = (frames, mirrored_frames)
+        return mirrored_frames
+
+def prepare_mirrored_animations(animations_dict: Optional[Dict[str, Sequence[QPixmap]]]):
+    """Builds the mirrored twin of every sequence in an animations dict up front (at load time)."""
+    if not animations_dict:
+        return
+    for frames in animations_dict.values():
+        if frames: get_mirrored_frames(frames)
+
 # --- GIF Loading Function ---
-def load_gif_frames(full_absolute_path_to_gif_file: str) -> List[QPixmap]:
-    """Loads all frames from a GIF file into a list of QPixmaps."""
-    loaded_frames: List[QPixmap] = []
+def load_gif_frames(full_absolute_path_to_gif_file: str, owner: Optional[Any] = None) -> Sequence[QPixmap]:
+    """
+    Returns all frames of a GIF file as a shared, immutable tuple of QPixmaps.
+    Frames are decoded once per (path, mtime) and served from the process-wide cache
+    afterwards. `owner` (e.g. the Player/Enemy using the frames) holds a cache reference
+    until it is garbage collected.
+    """
     normalized_path = os.path.normpath(full_absolute_path_to_gif_file)
     
     if not os.path.exists(normalized_path):
         # FileNotFoundError handled by calling functions, but log here too for asset-specific trace
         error(f"Assets Error (load_gif_frames): GIF file not found at: '{normalized_path}'")
         return [_create_error_placeholder(QCOLOR_RED_FALLBACK, "FNF")]
+    return _acquire_cached_frames(normalized_path, owner)
 
+def _decode_gif_frames(normalized_path: str) -> List[QPixmap]:
+    """Decodes all frames from a GIF file into a list of QPixmaps (uncached)."""
+    loaded_frames: List[QPixmap] = []
     try:
         pil_gif_image = Image.open(normalized_path)
         frame_index = 0
@@ -136,13 +263,14 @@ def load_gif_frames(full_absolute_path_to_gif_file: str) -> List[QPixmap]:
 
 
 # --- Player Animation Loading Function ---
-def load_all_player_animations(relative_asset_folder: str) -> Optional[Dict[str, List[QPixmap]]]:
+def load_all_player_animations(relative_asset_folder: str, owner: Optional[Any] = None) -> Optional[Dict[str, Sequence[QPixmap]]]:
     """
     Loads all player animations from a specified folder.
     `relative_asset_folder` should be the path from the project root,
     e.g., "assets/playable_characters/player1".
+    Frame sequences are shared through the frame cache; `owner` is passed to load_gif_frames.
     """
-    animations_dict: Dict[str, List[QPixmap]] = {}
+    animations_dict: Dict[str, Sequence[QPixmap]] = {}
     animation_filenames_map = {
         'idle': '__Idle.gif', 'run': '__Run.gif', 'jump': '__Jump.gif', 'fall': '__Fall.gif',
         'attack': '__Attack.gif', 'attack2': '__Attack2.gif', 'attack_combo': '__AttackCombo2hit.gif',
@@ -177,7 +305,7 @@ def load_all_player_animations(relative_asset_folder: str) -> Optional[Dict[str,
              placeholder_color = QCOLOR_RED_FALLBACK if anim_state_name in core_player_animations else QCOLOR_BLUE_FALLBACK
              animations_dict[anim_state_name] = [_create_error_placeholder(placeholder_color, anim_state_name[:3])]
              continue
-         animations_dict[anim_state_name] = load_gif_frames(absolute_gif_path)
+         animations_dict[anim_state_name] = load_gif_frames(absolute_gif_path, owner)
 
     if missing_files_report:
         warning(f"Assets (Player Folder: '{relative_asset_folder}'): Missing CORE animation files: {', '.join(missing_files_report)}")
@@ -193,16 +321,18 @@ def load_all_player_animations(relative_asset_folder: str) -> Optional[Dict[str,
              # Avoid double logging for core animations already reported as missing
              if anim_name not in core_player_animations and anim_name not in missing_files_report:
                 debug(f"Assets Debug (Player Folder: '{relative_asset_folder}'): Non-core animation '{anim_name}' is placeholder or missing.")
+    prepare_mirrored_animations(animations_dict)
     return animations_dict
 
 # --- Enemy Animation Loading Function ---
-def load_enemy_animations(relative_asset_folder: str) -> Optional[Dict[str, List[QPixmap]]]:
+def load_enemy_animations(relative_asset_folder: str, owner: Optional[Any] = None) -> Optional[Dict[str, Sequence[QPixmap]]]:
     """
     Loads generic enemy animations from a specified folder.
     `relative_asset_folder` should be the path from the project root,
     e.g., "assets/enemy_characters/soldier/green".
+    Frame sequences are shared through the frame cache; `owner` is passed to load_gif_frames.
     """
-    animations_dict: Dict[str, List[QPixmap]] = {}
+    animations_dict: Dict[str, Sequence[QPixmap]] = {}
     enemy_animation_filenames_map = {
         'idle': '__Idle.gif', 'run': '__Run.gif', 'attack': '__Attack.gif',
         'attack_nm': '__AttackNoMovement.gif', 'hit': '__Hit.gif',
@@ -229,7 +359,7 @@ def load_enemy_animations(relative_asset_folder: str) -> Optional[Dict[str, List
             elif anim_state_name in important_status_anims: placeholder_color = QCOLOR_YELLOW_FALLBACK
             animations_dict[anim_state_name] = [_create_error_placeholder(placeholder_color, anim_state_name[:3])]
             continue
-        animations_dict[anim_state_name] = load_gif_frames(absolute_gif_path)
+        animations_dict[anim_state_name] = load_gif_frames(absolute_gif_path, owner)
 
     if missing_files_report:
         warning(f"Assets (Enemy Folder: '{relative_asset_folder}'): Missing animation files: {', '.join(missing_files_report)}")
@@ -243,6 +373,7 @@ def load_enemy_animations(relative_asset_folder: str) -> Optional[Dict[str, List
              is_optional = '_nm' in anim_name
              if not is_optional and anim_name not in core_enemy_animations and anim_name not in important_status_anims:
                  debug(f"Assets Debug (Enemy Folder: '{relative_asset_folder}'): Non-core/status animation '{anim_name}' is placeholder or missing.")
+    prepare_mirrored_animations(animations_dict)
     return animations_dict
 
 def _is_placeholder_qpixmap_check(pixmap: QPixmap, size: QSize = QSize(30,40)) -> bool:
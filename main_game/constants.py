@@ -30,7 +30,26 @@ except NameError:
 GAME_WIDTH = 960
 GAME_HEIGHT = 600
 TILE_SIZE = 40.0
-FPS = 60
+FPS = 60 # Fixed logic rate: every simulation step advances exactly 1/FPS seconds
+RENDER_FPS = 120 # Repaint rate of the game loop timer; positions are interpolated between logic steps
+MAX_LOGIC_STEPS_PER_TICK = 5 # Catch-up cap: logic steps run per timer tick when behind before the backlog is dropped
+MAX_FRAME_DELTA_SEC = 0.25 # Wall-clock time counted for one timer tick at most (e.g. after a window drag stall)
+INTERPOLATION_MAX_DISTANCE = TILE_SIZE * 4 # Moves larger than this in one step (respawn/teleport) snap instead of interpolating
+RENDER_CULL_CELL_SIZE = TILE_SIZE * 8 # World-space cell size of the render registry's culling grid
+RENDER_CULL_MARGIN_PX = INTERPOLATION_MAX_DISTANCE # View rect is grown by this before culling (sprites larger than their rect, interpolation offsets)
+STATIC_LAYER_CACHE_ENABLED = True # Bake platforms, ladders and background tiles into chunk pixmaps instead of drawing each tile
+STATIC_CHUNK_SIZE = 512 # World pixels per side of one baked static chunk
+STATIC_CHUNK_CACHE_MAX_CHUNKS = 96 # Baked chunk pixmaps kept (about 1 MB each); least recently drawn are re-baked on demand
+RENDER_BACKEND = "raster" # Game scene backend chosen at startup: "raster" (QPainter on the CPU) or "opengl" (QOpenGLWidget, falls back to raster)
+
+# --- Tick Profiler (main_game/tick_profiler.py) ---
+PROFILER_ENABLED = True # Times named phases of every logic tick and paint; overhead is a few perf_counter calls per phase
+PROFILER_WINDOW_FRAMES = 600 # Rolling window per phase used for the p50/p95/max figures
+PROFILER_OVERLAY_TOGGLE_KEY = "F3" # Qt key name (Qt.Key.Key_<name>) that shows/hides the in-game profiler overlay
+PROFILER_OVERLAY_REFRESH_SEC = 0.25
+PROFILER_DUMP_CSV_ON_EXIT = False # Always write per-frame phase timings to PROFILER_CSV_DIR when the app closes (otherwise only if the overlay was shown)
+PROFILER_CSV_MAX_ROWS = 60000 # Most recent frames kept for the CSV dump
+PROFILER_CSV_DIR = os.path.join(PROJECT_ROOT, "profiler_logs")
 
 PLAYER_ROLL_CONTROL_ACCEL_FACTOR = 0.4
 PLAYER_ACCEL = 0.5
@@ -56,6 +75,7 @@ LANDING_FRICTION_MULTIPLIER = 0.8
 GROUND_SNAP_THRESHOLD = 5.0
 CEILING_SNAP_THRESHOLD = 2.0
 MIN_SIGNIFICANT_FALL_VEL = 1.5
+SPATIAL_GRID_CELL_SIZE = TILE_SIZE * 4 # World-space cell size for the platform collision grid
 
 ANIM_FRAME_DURATION = 80
 
@@ -126,6 +146,9 @@ GREY_PROJECTILE_LIFESPAN = 1500
 GREY_PROJECTILE_SPRITE_PATH = "assets/weapons/grey.gif" # UPDATED
 GREY_PROJECTILE_DIMENSIONS = (40.0, 40.0)
 
+# --- Projectile Sprite Atlas ---
+PROJECTILE_ROTATION_STEPS = 16 # Pre-rotated directions for rotating projectiles (BoltProjectile); angles snap to 360/N degrees
+
 # --- Enemy Defaults (can be overridden by specific enemy types or properties) ---
 ENEMY_MAX_HEALTH = 300
 ENEMY_RUN_SPEED_LIMIT = 5.0
@@ -248,10 +271,40 @@ SERVER_IP_BIND = '0.0.0.0'
 SERVER_PORT_TCP = 5555
 SERVICE_NAME = "platformer_adventure_lan_v1"
 DISCOVERY_PORT_UDP = 5556
-BUFFER_SIZE = 8192
+BUFFER_SIZE = 8192 # Minimum free space for each recv_into on a stream (network_comms.StreamDecoder)
+STREAM_DECODER_MAX_MESSAGE_BYTES = 67108864 # A longer JSON line or binary frame closes the connection as corrupt
 BROADCAST_INTERVAL_S = 1.0
 CLIENT_SEARCH_TIMEOUT_S = 5.0
-MAP_DOWNLOAD_CHUNK_SIZE = 4096
+NETWORK_UI_WAIT_S = 0.05 # Longest a waiting network phase blocks before processing Qt events (it wakes early on network activity)
+MAP_DOWNLOAD_CHUNK_SIZE = 16384 # Bytes of compressed map bundle per binary chunk
+MAP_TRANSFER_WINDOW_BYTES = 262144 # Bundle bytes the server sends ahead of what the client has acknowledged
+MAP_BUNDLE_COMPRESS_LEVEL = 6 # zlib level for map bundles (built once per map per hosting session)
+MAP_CACHE_MAX_ENTRIES = 16 # Map versions a client keeps in maps/.cache/ (least recently used are removed)
+SERVER_PORT_UDP_GAME = 5557 # Per-frame snapshots and input; TCP keeps control commands and map transfer
+UDP_GAME_CHANNEL_ENABLED = True
+UDP_MAX_DATAGRAM_BYTES = 1400 # Snapshots larger than this (usually full ones) go over TCP instead
+UDP_HELLO_INTERVAL_S = 0.25 # Client re-sends its UDP hello until the server's first datagram arrives
+SERVER_SEND_QUEUE_MAX_BYTES = 262144 # Per client; over this, TCP snapshots are dropped (newer ones replace unsent ones anyway)
+SERVER_SEND_STALL_TIMEOUT_S = 5.0 # A client whose send queue makes no progress this long is disconnected
+NETWORK_STATS_REFRESH_S = 0.5 # How often the host publishes per-client network stats for its overlay
+NET_PING_INTERVAL_S = 0.5 # Server and client each ping the other this often for RTT/jitter
+NET_STATS_LOG_INTERVAL_S = 10.0 # How often RTT, rates and snapshot counts are written to the log
+SNAPSHOT_HISTORY_SIZE = 64 # Sent snapshots kept as delta baselines until the client acknowledges a newer one
+CLIENT_INTERPOLATION_DELAY_MS = 100.0 # Client renders this far behind the server so it can interpolate between snapshots
+CLIENT_EXTRAPOLATION_MAX_MS = 50.0 # How long positions keep moving when the next snapshot is late
+CLIENT_SNAPSHOT_BUFFER_SIZE = 32
+CLIENT_INTERPOLATION_SNAP_DISTANCE = 160.0 # Moves larger than this between snapshots (respawn, teleport) are not smoothed
+CLIENT_PREDICTION_ENABLED = True # Client simulates its own player from local input and reconciles with the server
+CLIENT_PREDICTION_CORRECTION_THRESHOLD = 2.0 # Pixels the server may differ from the prediction before replaying inputs
+CLIENT_PREDICTION_MAX_PENDING = 120 # Unacknowledged input commands kept for replay
+CLIENT_INPUT_REDUNDANCY = 3 # Newest unacknowledged commands repeated in each input datagram
+SERVER_INPUT_QUEUE_MAX = 6 # Queued client commands beyond this are dropped (their presses carry forward)
+MAX_REMOTE_PLAYERS = 3 # Clients a host accepts, as players 2-4
+INTEREST_MANAGEMENT_ENABLED = True # Each client only gets the enemies, statues and projectiles near its camera
+INTEREST_MARGIN_PX = 320.0 # Entities within this distance outside a client's view become relevant to it
+INTEREST_EXIT_MARGIN_PX = 480.0 # ...and stay relevant until they are this far outside it (avoids despawn/respawn flicker)
+INTEREST_GRID_CELL_SIZE = 512.0 # Cell size of the per-tick grid that supplies relevance candidates
+INTEREST_DEFAULT_VIEW_SIZE = (1920.0, 1080.0) # View assumed around a client's player until it reports its camera
 
 # --- Editor Specific ---
 EDITOR_SCREEN_INITIAL_WIDTH = 2000
@@ -9,8 +9,16 @@ MODIFIED: Removed local trigger flag, relying on MainWindow.map_change_is_active
 MODIFIED: Ensured player.animations is checked to be a dictionary before using it.
 MODIFIED: Updated to handle multiple chests by iterating through 'collectible_list'.
 MODIFIED: Fixed trigger rect processing to correctly handle QRectF objects.
+MODIFIED: Platform collision for players, enemies, statues, projectiles and chests goes through
+          the 'platforms_grid' spatial index. Smashed/killed statues are removed from it incrementally.
+MODIFIED: Each tick is split into named phases (input, chests, players, enemies, statues,
+          projectiles, triggers, camera, renderables) for the tick profiler.
+MODIFIED: all_renderable_objects is a persistent RenderRegistry (layer-ordered, keyed by entity) instead
+          of being rebuilt, de-duplicated and sorted every tick. Entities are unregistered where they die
+          (chests, enemies, statues, projectiles), fired projectiles and petrification statues register
+          themselves when spawned, and the static map lists are only re-registered when one changes.
 """
-# version 2.0.31 (Fixed trigger rect TypeError)
+# version 2.0.34 (Persistent render registry)
 
 import time
 import math
@@ -24,6 +32,9 @@ from main_game.items import Chest
 from player.statue import Statue
 from main_game.tiles import Platform, Ladder, Lava, BackgroundTile
 from player.player import Player
+from main_game.spatial_grid import query_platforms
+from main_game.render_registry import RenderRegistry, get_render_registry, sync_static_renderables, unregister_renderable
+from main_game.tick_profiler import get_tick_profiler
 
 _SCRIPT_LOGGING_ENABLED = True # Set to False for release builds if desired
 
@@ -69,11 +80,27 @@ except ImportError:
     if _SCRIPT_LOGGING_ENABLED: log_critical("CouchPlayLogic: Failed to import project's logger. Using isolated fallback for couch_play_logic.py.")
 # --- End Logger Setup ---
 
+# (render kind, game_elements list) of the entities registered with the render registry by identity
+_COUCH_ENTITY_RENDER_KINDS = (('enemy', "enemy_list"), ('statue', "statue_objects"),
+                              ('collectible', "collectible_list"), ('projectile', "projectiles_list"))
+
 _start_time_couch_play_monotonic = time.monotonic()
 def get_current_ticks_monotonic() -> int:
     return int((time.monotonic() - _start_time_couch_play_monotonic) * 1000)
 
 
+def _get_couch_render_registry(game_elements_ref: Dict[str, Any]) -> RenderRegistry:
+    """The render registry. When it is (re)created for a new map or a reset, every entity that already exists is registered."""
+    previous_registry = game_elements_ref.get("render_registry")
+    render_registry = get_render_registry(game_elements_ref)
+    if render_registry is not previous_registry:
+        for render_kind, list_key in _COUCH_ENTITY_RENDER_KINDS:
+            for entity in game_elements_ref.get(list_key) or []:
+                if entity is not None: render_registry.set((render_kind, id(entity)), entity)
+        if _SCRIPT_LOGGING_ENABLED: log_debug(f"COUCH_PLAY DEBUG: Render registry created with {len(render_registry)} entity renderables.")
+    return render_registry
+
+
 def run_couch_play_mode(
     game_elements_ref: Dict[str, Any],
     app_status_obj: Any, # Typically an instance of AppStatus from app_core
@@ -87,17 +114,6 @@ def run_couch_play_mode(
     request_map_change_callback: Optional[callable] = None # Callback to request map change
     ) -> bool: # Returns True to continue game, False to stop
 
-    try:
-        from main_game.game_setup import get_layer_order_key
-    except ImportError:
-        log_warning("COUCH_PLAY_LOGIC WARNING (run_couch_play_mode): Could not import get_layer_order_key from game_setup. Using fallback for sorting.")
-        def get_layer_order_key(item: Any) -> int: 
-            if isinstance(item, dict) and 'layer_order' in item: return int(item['layer_order'])
-            if hasattr(item, 'layer_order'): return int(getattr(item, 'layer_order', 0))
-            if isinstance(item, Player): return 100 
-            if isinstance(item, BackgroundTile): return -10 
-            return 0 
-
     if not game_elements_ref.get('game_ready_for_logic', False) or \
        game_elements_ref.get('initialization_in_progress', True):
         if _SCRIPT_LOGGING_ENABLED and (not hasattr(run_couch_play_mode, "_init_wait_logged_couch") or not run_couch_play_mode._init_wait_logged_couch): # type: ignore
@@ -108,12 +124,17 @@ def run_couch_play_mode(
     if hasattr(run_couch_play_mode, "_init_wait_logged_couch"):
         delattr(run_couch_play_mode, "_init_wait_logged_couch")
 
+    tick_profiler = get_tick_profiler()
+    tick_profiler.begin_frame("logic")
+
 
     player1: Optional[Player] = game_elements_ref.get("player1")
     player2: Optional[Player] = game_elements_ref.get("player2")
     player3: Optional[Player] = game_elements_ref.get("player3")
     player4: Optional[Player] = game_elements_ref.get("player4")
     platforms_list_this_frame: List[Any] = game_elements_ref.get("platforms_list", [])
+    platforms_grid: Optional[Any] = game_elements_ref.get("platforms_grid")
+    platform_collidables: Any = platforms_grid if platforms_grid is not None else platforms_list_this_frame
     ladders_list: List[Ladder] = game_elements_ref.get("ladders_list", [])
     hazards_list: List[Lava] = game_elements_ref.get("hazards_list", []) # Correctly named hazards_list
     current_enemies_list_ref: List[Enemy] = game_elements_ref.get("enemy_list", [])
@@ -157,6 +178,8 @@ def run_couch_play_mode(
         player1 = game_elements_ref.get("player1"); player2 = game_elements_ref.get("player2")
         player3 = game_elements_ref.get("player3"); player4 = game_elements_ref.get("player4")
         platforms_list_this_frame = game_elements_ref.get("platforms_list", [])
+        platforms_grid = game_elements_ref.get("platforms_grid")
+        platform_collidables = platforms_grid if platforms_grid is not None else platforms_list_this_frame
         ladders_list = game_elements_ref.get("ladders_list", [])
         hazards_list = game_elements_ref.get("hazards_list", [])
         current_enemies_list_ref = game_elements_ref.get("enemy_list", [])
@@ -167,6 +190,8 @@ def run_couch_play_mode(
         trigger_squares = game_elements_ref.get("trigger_squares_list", [])
         if _SCRIPT_LOGGING_ENABLED: log_debug(f"COUCH_PLAY DEBUG (Reset): Enemies={len(current_enemies_list_ref)}, Statues={len(statue_objects_list_ref)}, CustomImages: {len(processed_custom_images_for_render_couch)}")
 
+    tick_profiler.lap("input")
+    render_registry = _get_couch_render_registry(game_elements_ref)
 
     all_chests_from_collectibles: List[Chest] = [
         item for item in collectible_items_list_ref
@@ -176,6 +201,7 @@ def run_couch_play_mode(
 
     for chest_instance in all_chests_from_collectibles:
         if not chest_instance.alive():
+            unregister_renderable(game_elements_ref, 'collectible', chest_instance)
             continue 
 
         if chest_instance.state == 'closed' and not chest_instance.is_collected_flag_internal:
@@ -228,7 +254,7 @@ def run_couch_play_mode(
             if not chest_landed_on_player_and_killed_this_chest and \
                not chest_instance.is_collected_flag_internal and \
                chest_instance.state == 'closed':
-                for platform_collidable in platforms_list_this_frame:
+                for platform_collidable in query_platforms(platform_collidables, chest_instance.rect):
                     if isinstance(platform_collidable, Statue) and platform_collidable.is_smashed: continue 
                     if not hasattr(platform_collidable, 'rect') or not isinstance(platform_collidable.rect, QRectF): continue
 
@@ -273,6 +299,7 @@ def run_couch_play_mode(
         
         if chest_instance.alive(): 
             chests_to_keep_after_this_frame.append(chest_instance)
+        else: unregister_renderable(game_elements_ref, 'collectible', chest_instance) # Collected and faded out
 
     other_collectibles_in_list = [
         item for item in collectible_items_list_ref
@@ -286,6 +313,7 @@ def run_couch_play_mode(
     if _SCRIPT_LOGGING_ENABLED:
         log_debug(f"COUCH_PLAY DEBUG: Chests processed. Kept: {len(chests_to_keep_after_this_frame)}, "
                   f"Total in collectible_list: {len(game_elements_ref.get('collectible_list',[]))}")
+    tick_profiler.lap("chests")
 
 
     active_players_for_collision_check = [p for p in [player1, player2, player3, player4] if p and hasattr(p, '_valid_init') and p._valid_init and hasattr(p, 'alive') and p.alive()]
@@ -304,21 +332,25 @@ def run_couch_play_mode(
         p_instance.game_elements_ref_for_projectiles = game_elements_ref
         
         if isinstance(p_instance.animations, dict) and p_instance.animations:
-            p_instance.update(dt_sec, platforms_list_this_frame, ladders_list, hazards_list, all_others_for_this_player, hittable_targets_for_player_melee)
+            p_instance.update(dt_sec, platform_collidables, ladders_list, hazards_list, all_others_for_this_player, hittable_targets_for_player_melee)
         elif _SCRIPT_LOGGING_ENABLED:
             log_warning(f"COUCH_PLAY_LOGIC: Skipping update for Player {p_instance.player_id} due to invalid/missing animations attribute.")
 
     if _SCRIPT_LOGGING_ENABLED: log_debug(f"COUCH_PLAY DEBUG: Players updated.")
+    tick_profiler.lap("players")
 
     active_players_for_ai = [p for p in player_instances_to_update if not getattr(p,'is_dead',True) and hasattr(p,'alive') and p.alive()]
     enemies_to_keep_this_frame = []
     for enemy_instance in list(current_enemies_list_ref): 
         if hasattr(enemy_instance, '_valid_init') and enemy_instance._valid_init:
-            enemy_instance.update(dt_sec, active_players_for_ai, platforms_list_this_frame, hazards_list, current_enemies_list_ref) 
+            enemy_instance.update(dt_sec, active_players_for_ai, platform_collidables, hazards_list, current_enemies_list_ref) 
             if hasattr(enemy_instance, 'alive') and enemy_instance.alive():
                 enemies_to_keep_this_frame.append(enemy_instance)
+                continue
+        unregister_renderable(game_elements_ref, 'enemy', enemy_instance)
     game_elements_ref["enemy_list"] = enemies_to_keep_this_frame
     if _SCRIPT_LOGGING_ENABLED: log_debug(f"COUCH_PLAY DEBUG: Enemies updated. Count: {len(enemies_to_keep_this_frame)}")
+    tick_profiler.lap("enemies")
 
     statues_to_keep_this_frame_couch = []
     statues_killed_this_frame_couch = [] 
@@ -326,14 +358,19 @@ def run_couch_play_mode(
         if hasattr(statue_instance_couch, 'alive') and statue_instance_couch.alive():
             if hasattr(statue_instance_couch, 'apply_physics_step') and \
                (not statue_instance_couch.is_smashed or (statue_instance_couch.is_smashed and not statue_instance_couch.death_animation_finished)):
-                statue_instance_couch.apply_physics_step(dt_sec, platforms_list_this_frame)
+                statue_instance_couch.apply_physics_step(dt_sec, platform_collidables)
             
             if hasattr(statue_instance_couch, 'update'): statue_instance_couch.update(dt_sec) 
             
+            if platforms_grid is not None and statue_instance_couch.is_smashed and statue_instance_couch in platforms_grid:
+                platforms_grid.remove(statue_instance_couch) # Smashed statues are no longer solid
+
             if statue_instance_couch.alive(): 
                 statues_to_keep_this_frame_couch.append(statue_instance_couch)
             else:
                 statues_killed_this_frame_couch.append(statue_instance_couch)
+                unregister_renderable(game_elements_ref, 'statue', statue_instance_couch)
+        else: unregister_renderable(game_elements_ref, 'statue', statue_instance_couch)
     
     game_elements_ref["statue_objects"] = statues_to_keep_this_frame_couch 
     
@@ -346,7 +383,10 @@ def run_couch_play_mode(
         if len(new_main_platforms_list) != len(current_main_platforms):
             game_elements_ref["platforms_list"] = new_main_platforms_list
             platforms_list_this_frame = new_main_platforms_list 
+        if platforms_grid is not None:
+            for killed_statue_couch in statues_killed_this_frame_couch: platforms_grid.remove(killed_statue_couch)
     if _SCRIPT_LOGGING_ENABLED: log_debug(f"COUCH_PLAY DEBUG: Statues updated. Count: {len(statues_to_keep_this_frame_couch)}")
+    tick_profiler.lap("statues")
 
     hittable_targets_for_projectiles: List[Any] = []
     for p_target in player_instances_to_update: 
@@ -362,11 +402,13 @@ def run_couch_play_mode(
     projectiles_to_keep_this_frame = []
     for proj_instance in list(projectiles_list): 
         if hasattr(proj_instance, 'update') and hasattr(proj_instance, 'alive') and proj_instance.alive():
-            proj_instance.update(dt_sec, platforms_list_this_frame, hittable_targets_for_projectiles)
+            proj_instance.update(dt_sec, platform_collidables, hittable_targets_for_projectiles)
         if hasattr(proj_instance, 'alive') and proj_instance.alive(): 
             projectiles_to_keep_this_frame.append(proj_instance)
+        else: unregister_renderable(game_elements_ref, 'projectile', proj_instance)
     game_elements_ref["projectiles_list"] = projectiles_to_keep_this_frame
     if _SCRIPT_LOGGING_ENABLED: log_debug(f"COUCH_PLAY DEBUG: Projectiles updated. Count: {len(projectiles_to_keep_this_frame)}")
+    tick_profiler.lap("projectiles")
 
     if _SCRIPT_LOGGING_ENABLED: log_debug(f"COUCH_PLAY DEBUG: Collectibles (including chests) updated via loop. Total in list: {len(game_elements_ref.get('collectible_list',[]))}")
 
@@ -413,6 +455,7 @@ def run_couch_play_mode(
             else: 
                 continue 
             break 
+    tick_profiler.lap("triggers")
 
     if camera_obj:
         focus_targets_alive_couch = [p for p in player_instances_to_update if p and hasattr(p, 'alive') and p.alive() and not getattr(p, 'is_dead', True) and not getattr(p, 'is_petrified', False)]
@@ -428,46 +471,24 @@ def run_couch_play_mode(
         else:
             camera_obj.static_update() 
     if _SCRIPT_LOGGING_ENABLED: log_debug(f"COUCH_PLAY DEBUG: Camera updated.")
+    tick_profiler.lap("camera")
 
-    new_all_renderables_couch: List[Any] = []
-    _added_renderable_ids_couch = set()
-
-    def add_to_renderables_couch_if_new(obj_to_add: Any, render_list: List[Any]):
-        if obj_to_add is not None:
-            obj_id_for_check = id(obj_to_add)
-            if obj_id_for_check not in _added_renderable_ids_couch:
-                render_list.append(obj_to_add)
-                _added_renderable_ids_couch.add(obj_id_for_check)
-
-    for static_key_couch in ["background_tiles_list", "ladders_list", "hazards_list", "platforms_list"]:
-        for item_couch_static in game_elements_ref.get(static_key_couch, []):
-            add_to_renderables_couch_if_new(item_couch_static, new_all_renderables_couch)
-    
-    custom_image_added_count = 0
-    for custom_img_dict_couch in processed_custom_images_for_render_couch:
-        add_to_renderables_couch_if_new(custom_img_dict_couch, new_all_renderables_couch)
-        custom_image_added_count +=1
-    if _SCRIPT_LOGGING_ENABLED: log_debug(f"COUCH_PLAY DEBUG: Added {custom_image_added_count} custom image dicts to renderables list from 'processed_custom_images_for_render_couch'.")
-
-    for dynamic_key_couch in ["enemy_list", "statue_objects", "collectible_list", "projectiles_list", "trigger_squares_list"]:
-        for item_couch_dyn in game_elements_ref.get(dynamic_key_couch, []):
-            add_to_renderables_couch_if_new(item_couch_dyn, new_all_renderables_couch)
-
+    # Statics re-register only when a list was replaced or resized (a statue left platforms_list);
+    # entities were registered on spawn and unregistered where they died above.
+    sync_static_renderables(render_registry, game_elements_ref)
     for p_render_couch in player_instances_to_update:
-        if p_render_couch:
-            if hasattr(p_render_couch, 'alive') and p_render_couch.alive():
-                add_to_renderables_couch_if_new(p_render_couch, new_all_renderables_couch)
-            elif getattr(p_render_couch, 'is_dead', False) and not getattr(p_render_couch, 'death_animation_finished', True):
-                add_to_renderables_couch_if_new(p_render_couch, new_all_renderables_couch) 
-
-    try:
-        new_all_renderables_couch.sort(key=get_layer_order_key)
-        if _SCRIPT_LOGGING_ENABLED: log_debug(f"COUCH_PLAY DEBUG: Sorted renderables. Final count: {len(new_all_renderables_couch)}")
-    except NameError as e_name: log_error(f"COUCH_PLAY ERROR: NameError during sort - get_layer_order_key not defined? {e_name}. Render order might be incorrect.")
-    except Exception as e_sort: log_error(f"COUCH_PLAY ERROR: Error sorting renderables: {e_sort}. Render order might be incorrect.")
-
-    game_elements_ref["all_renderable_objects"] = new_all_renderables_couch
-    if _SCRIPT_LOGGING_ENABLED: log_debug(f"COUCH_PLAY DEBUG: Assembled and sorted renderables. Final count: {len(game_elements_ref['all_renderable_objects'])}")
+        player_render_key = ('player', p_render_couch.player_id)
+        if (hasattr(p_render_couch, 'alive') and p_render_couch.alive()) or \
+           (getattr(p_render_couch, 'is_dead', False) and not getattr(p_render_couch, 'death_animation_finished', True)):
+            render_registry.set(player_render_key, p_render_couch) # No-op when it's already registered
+        else: render_registry.remove(player_render_key)
+    tick_profiler.lap("renderables")
+    tick_profiler.set_count("players", len(player_instances_to_update))
+    tick_profiler.set_count("enemies", len(game_elements_ref["enemy_list"]))
+    tick_profiler.set_count("statues", len(game_elements_ref["statue_objects"]))
+    tick_profiler.set_count("projectiles", len(game_elements_ref["projectiles_list"]))
+    tick_profiler.set_count("renderables", len(render_registry))
+    tick_profiler.end_frame()
 
     def is_player_truly_gone_couch(p_instance_couch: Optional[Player]):
         if not p_instance_couch or not hasattr(p_instance_couch, '_valid_init') or not p_instance_couch._valid_init: return True
@@ -17,11 +17,16 @@ MODIFIED: Added enemy_spawns_data_cache and statue_spawns_data_cache for client-
 MODIFIED: Ensured player.animations is checked to be a dictionary before using it.
 MODIFIED: Removed assignment to a single 'current_chest', now relies on 'collectible_list' for all chests.
 MODIFIED: Corrected _process_trigger_squares to handle QRectF directly for 'rect' property.
+MODIFIED: Builds 'platforms_grid' (PlatformSpatialGrid) over platforms_list for collision queries.
+MODIFIED: Trims unreferenced frame-cache entries after setup and logs cache hit/miss stats.
+MODIFIED: Preloads the projectile sprite atlas at map start.
+MODIFIED: Requested player count survives the game_elements reset (was always falling back to the default).
 """
-# version 2.2.12 (Handle QRectF in _process_trigger_squares)
+# version 2.2.16 (Keep requested player count across reset)
 
 import os
 import sys
+import gc
 import random
 from typing import Dict, Optional, Any, List, Tuple, cast
 
@@ -41,12 +46,14 @@ try:
     from main_game.tiles import Platform, Ladder, Lava, BackgroundTile
     from main_game.items import Chest
     from main_game.camera import Camera
-    from main_game.assets import resource_path
+    from main_game.spatial_grid import PlatformSpatialGrid
+    from main_game.assets import resource_path, trim_frame_cache, get_frame_cache_stats
 
     from player.player import Player
     from enemy.enemy import Enemy
     from enemy.enemy_knight import EnemyKnight
     from player.statue import Statue
+    from player.projectiles import preload_projectile_sprites
 
 except ImportError as e_gs_imp:
     import logging
@@ -266,10 +273,11 @@ def initialize_game_elements(current_width: int, current_height: int,
                              for_game_mode: str,
                              map_module_name: str) -> bool:
     info(f"GameSetup: Initializing game elements for map '{map_module_name}', mode '{for_game_mode}'. Screen: {current_width}x{current_height}")
+    requested_num_players = game_elements_ref.get('num_active_players_for_mode', 1 if for_game_mode != "couch_play" else 2)
     game_elements_ref.clear()
     game_elements_ref['game_ready_for_logic'] = False
     game_elements_ref['initialization_in_progress'] = True
-    game_elements_ref['num_active_players_for_mode'] = game_elements_ref.get('num_active_players_for_mode', 1 if for_game_mode != "couch_play" else 2)
+    game_elements_ref['num_active_players_for_mode'] = requested_num_players
     game_elements_ref['current_game_mode'] = for_game_mode
 
     level_loader = LevelLoader()
@@ -297,6 +305,7 @@ def initialize_game_elements(current_width: int, current_height: int,
     game_elements_ref['map_folder_path'] = os.path.join(maps_base_dir_abs_for_loader, map_module_name)
 
     game_elements_ref["platforms_list"] = _create_platform_data_list_from_map(map_data.get("platforms_list", []))
+    game_elements_ref["platforms_grid"] = PlatformSpatialGrid(game_elements_ref["platforms_list"])
     game_elements_ref["ladders_list"] = _create_ladder_data_list_from_map(map_data.get("ladders_list", []))
     game_elements_ref["hazards_list"] = _create_hazard_data_list_from_map(map_data.get("hazards_list", []))
     game_elements_ref["background_tiles_list"] = _create_background_tile_list_from_map(map_data.get("background_tiles_list", []))
@@ -385,5 +394,13 @@ def initialize_game_elements(current_width: int, current_height: int,
     game_elements_ref['camera_level_dims_set'] = True # Flag that camera knows level bounds
     game_elements_ref['initialization_in_progress'] = False
     game_elements_ref['game_ready_for_logic'] = True
+
+    preload_projectile_sprites() # Firing a projectile must not decode or rotate images mid-game
+
+    gc.collect() # Entities from the previous map release their frame-cache references when collected
+    trim_frame_cache()
+    frame_cache_stats = get_frame_cache_stats()
+    info(f"GameSetup: Frame cache - hits: {frame_cache_stats['hits']}, misses: {frame_cache_stats['misses']}, "
+         f"entries: {frame_cache_stats['entries']}, frames: {frame_cache_stats['frames']}, refs: {frame_cache_stats['refs']}")
     info(f"GameSetup: Initialization for map '{map_module_name}' completed. Game ready for mode '{for_game_mode}'.")
     return True
\ No newline at end of file
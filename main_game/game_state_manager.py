@@ -11,8 +11,17 @@ MODIFIED: Deferred import of initialize_game_elements in reset_game_state.
 MODIFIED: Corrected player key in get_network_game_state.
 MODIFIED: EnemyKnight instantiation from network data.
 MODIFIED: Corrected import paths for logger and projectile classes.
+MODIFIED: set_network_game_state can leave a client-predicted player to the client (predicted_player_id).
+MODIFIED: set_network_game_state keeps a persistent RenderRegistry (game_elements["render_registry"])
+          keyed by entity id instead of rebuilding, de-duplicating and re-sorting all_renderable_objects
+          for every state; entities are patched in place and only spawns/despawns touch the list.
+MODIFIED: The client's registry bakes static platforms, ladders and background tiles into chunk
+          pixmaps (main_game.static_layer_cache) when STATIC_LAYER_CACHE_ENABLED.
+MODIFIED: The client's registry comes from render_registry.get_render_registry, shared with couch play.
+MODIFIED: set_network_game_state runs on the network thread; it applies the state (_apply_network_game_state)
+          holding the registry's lock, which the GUI thread's query_visible also takes.
 """
-# version 2.2.3 (Corrected import paths for logger/projectiles)
+# version 2.3.3 (Apply network state under the render registry lock)
 
 import os
 import sys
@@ -37,6 +46,7 @@ try:
     import main_game.config as game_config
     from main_game.logger import info, debug, warning, error, critical
     from main_game.camera import Camera
+    from main_game.render_registry import RenderRegistry, get_render_registry, sync_static_renderables
 
     # Modules from sibling packages (absolute imports from project root)
     from enemy.enemy import Enemy
@@ -66,6 +76,7 @@ except ImportError as e_gsm_imp:
     class C: pass; 
     class game_config: pass; 
     class Camera: pass; 
+    class RenderRegistry: pass;
     class Enemy: pass; 
     class EnemyKnight: pass;
     class Chest: pass; 
@@ -197,36 +208,40 @@ def get_network_game_state(game_elements: Dict[str, Any]) -> Dict[str, Any]:
 def set_network_game_state(
     network_state_data: Dict[str, Any],
     game_elements: Dict[str, Any],
-    client_player_id: Optional[int] = None
+    client_player_id: Optional[int] = None,
+    predicted_player_id: Optional[int] = None
 ):
+    """
+    Applies a server state to the client's game_elements. The player numbered
+    `predicted_player_id` is only created from it if missing; otherwise the client's
+    own prediction/reconciliation owns that player's state.
+    """
     if not network_state_data:
         warning("GSM set_network_game_state: Received empty network_state_data. No changes made.")
         return
 
     debug(f"GSM Client: Processing received network state. Client Player ID: {client_player_id}")
-    new_all_renderables: List[Any] = []
-    current_all_renderables_set = set() # To avoid duplicates if item is in multiple source lists
-
-    def add_to_renderables_if_new(obj: Any):
-        if obj is not None:
-            # Using object identity for set check
-            is_present = False
-            for item in new_all_renderables:
-                if item is obj: # Check object identity
-                    is_present = True
-                    break
-            if not is_present:
-                new_all_renderables.append(obj)
-                current_all_renderables_set.add(id(obj)) # Store id to track presence by identity
+    render_registry = get_render_registry(game_elements)
+    with render_registry.lock: # The GUI thread culls from the registry while this thread updates it
+        _apply_network_game_state(network_state_data, game_elements, render_registry, predicted_player_id)
+
+
+def _apply_network_game_state(
+    network_state_data: Dict[str, Any],
+    game_elements: Dict[str, Any],
+    render_registry: RenderRegistry,
+    predicted_player_id: Optional[int]
+):
+    live_render_keys: set = set() # Entities still renderable after this state; the rest are despawned from the registry
+
+    def keep_renderable(key: Tuple[str, Any], obj: Any):
+        render_registry.set(key, obj) # No-op when it's already registered
+        live_render_keys.add(key)
 
     # Static elements (platforms, ladders, hazards, background_tiles, custom_images, triggers)
-    # These are typically loaded once from map data and don't change state via network (unless map changes)
-    # If map changes, initialize_game_elements will reload them.
-    # Here, we just ensure they are in the render list if they exist.
-    for static_list_key in ["platforms_list", "ladders_list", "hazards_list", "background_tiles_list", "trigger_squares_list"]:
-        for static_item in game_elements.get(static_list_key, []): add_to_renderables_if_new(static_item)
-    for custom_img_dict in game_elements.get("processed_custom_images_for_render", []):
-        add_to_renderables_if_new(custom_img_dict)
+    # These are loaded once from map data and don't change via network; if the map changes,
+    # initialize_game_elements replaces the lists and the registry re-registers them.
+    sync_static_renderables(render_registry, game_elements)
 
 
     enemy_spawns_data_cache: List[Dict[str, Any]] = game_elements.get("enemy_spawns_data_cache", [])
@@ -242,10 +257,11 @@ def set_network_game_state(
                 initial_props_for_new_player = game_elements.get(f"player{i}_spawn_props", {})
                 player_instance_local = Player(float(spawn_pos_from_net[0]), float(spawn_pos_from_net[1]), player_id=i, initial_properties=initial_props_for_new_player)
                 game_elements[player_key_local] = player_instance_local
+                if i == predicted_player_id: player_instance_local.set_network_data(player_data_from_server) # Starting point for prediction
             if player_instance_local and hasattr(player_instance_local, 'set_network_data'):
-                player_instance_local.set_network_data(player_data_from_server)
+                if i != predicted_player_id: player_instance_local.set_network_data(player_data_from_server)
                 is_renderable = getattr(player_instance_local, '_valid_init', False) and ( (hasattr(player_instance_local, 'alive') and player_instance_local.alive()) or (getattr(player_instance_local, 'is_dead', False) and not getattr(player_instance_local, 'death_animation_finished', True) and not getattr(player_instance_local, 'is_petrified', False)) or getattr(player_instance_local, 'is_petrified', False) )
-                if is_renderable: add_to_renderables_if_new(player_instance_local)
+                if is_renderable: keep_renderable(('player', i), player_instance_local)
         elif player_instance_local and getattr(player_instance_local, '_valid_init', False):
             if hasattr(player_instance_local, 'alive') and player_instance_local.alive() and hasattr(player_instance_local, 'kill'): player_instance_local.kill()
             game_elements[player_key_local] = None
@@ -288,7 +304,7 @@ def set_network_game_state(
                     if (hasattr(client_enemy_instance, 'alive') and client_enemy_instance.alive()) or \
                        (getattr(client_enemy_instance, 'is_dead', False) and not getattr(client_enemy_instance, 'death_animation_finished', True) and not getattr(client_enemy_instance, 'is_petrified', False)) or \
                        getattr(client_enemy_instance, 'is_petrified', False):
-                        add_to_renderables_if_new(client_enemy_instance)
+                        keep_renderable(('enemy', enemy_id_str), client_enemy_instance)
     game_elements["enemy_list"] = new_enemy_list_for_client
 
     new_statue_list_for_client: List[Statue] = []
@@ -309,7 +325,7 @@ def set_network_game_state(
                     if hasattr(client_statue_instance, 'set_network_data'): client_statue_instance.set_network_data(statue_data_from_server)
                     new_statue_list_for_client.append(client_statue_instance)
                     if (hasattr(client_statue_instance, 'alive') and client_statue_instance.alive()) or (getattr(client_statue_instance,'is_smashed',False) and not getattr(client_statue_instance,'death_animation_finished',True)):
-                        add_to_renderables_if_new(client_statue_instance)
+                        keep_renderable(('statue', statue_id_from_server), client_statue_instance)
     game_elements["statue_objects"] = new_statue_list_for_client
 
     current_chest_obj_synced_client: Optional[Chest] = None
@@ -327,7 +343,7 @@ def set_network_game_state(
             current_chest_obj_synced_client = current_chest_obj_local_client
             if (hasattr(current_chest_obj_synced_client, 'alive') and current_chest_obj_synced_client.alive()) or \
                getattr(current_chest_obj_synced_client, 'state', 'closed') in ['opening', 'opened_visible', 'fading']:
-                add_to_renderables_if_new(current_chest_obj_synced_client)
+                keep_renderable(('chest', 0), current_chest_obj_synced_client)
     else: game_elements["current_chest"] = None
     game_elements.get("collectible_list", []).clear()
     if current_chest_obj_synced_client: game_elements.get("collectible_list", []).append(current_chest_obj_synced_client)
@@ -351,7 +367,7 @@ def set_network_game_state(
                 ProjectileClass = projectile_class_map.get(str(proj_type_str)) if proj_type_str else None
                 if owner_instance_client and ProjectileClass and all(k in proj_data_from_server for k in ['pos','vel']):
                     pos_data_proj, vel_data_proj = proj_data_from_server['pos'], proj_data_from_server['vel']
-                    spawn_dir_qpointf = QPointF(float(vel_data_proj[0]), float(vel_data_proj[1])).normalized()
+                    spawn_dir_qpointf = QPointF(float(vel_data_proj[0]), float(vel_data_proj[1])) # Projectile __init__ normalizes
                     client_proj_instance = ProjectileClass(float(pos_data_proj[0]), float(pos_data_proj[1]), spawn_dir_qpointf, owner_instance_client)
                     if hasattr(client_proj_instance, 'projectile_id'): client_proj_instance.projectile_id = proj_id_from_server
                     if hasattr(client_proj_instance, 'game_elements_ref'): client_proj_instance.game_elements_ref = game_elements
@@ -361,15 +377,10 @@ def set_network_game_state(
                 client_proj_instance.set_network_data(proj_data_from_server)
                 if hasattr(client_proj_instance, 'alive') and client_proj_instance.alive():
                     new_projectiles_list_for_client.append(client_proj_instance)
-                    add_to_renderables_if_new(client_proj_instance)
+                    keep_renderable(('projectile', proj_id_from_server), client_proj_instance)
     game_elements["projectiles_list"] = new_projectiles_list_for_client
 
-    # Ensure renderables are sorted by layer order
-    if 'get_layer_order_key' in globals() and callable(globals()['get_layer_order_key']):
-        new_all_renderables.sort(key=globals()['get_layer_order_key'])
-    else:
-        warning("GSM Client: get_layer_order_key not found. Render order might be incorrect.")
-    game_elements["all_renderable_objects"] = new_all_renderables
+    for render_kind in ('player', 'enemy', 'statue', 'chest', 'projectile'): render_registry.retain(render_kind, live_render_keys)
 
     server_map_name = network_state_data.get('map_name')
     camera_instance_client: Optional[Camera] = game_elements.get('camera')
@@ -0,0 +1,211 @@
+# main_game/headless.py
+# -*- coding: utf-8 -*-
+"""
+Headless couch-play runner: loads a map with initialize_game_elements and steps
+run_couch_play_mode with scripted inputs, without MainWindow or any widget.
+QPixmaps still work because Qt is started with the 'offscreen' platform plugin,
+so this runs on machines without a display (CI soak tests, perf measurements).
+
+Usage:
+    python -m main_game.headless --map big --players 4 --ticks 10000
+    python -m main_game.headless --map original --players 2 --ticks 600 --script idle --seed 7
+
+Scripted input is seeded per player, so the same seed replays the same key presses.
+Game timers (cooldowns, animation) still read the wall clock; use --realtime to pace
+ticks at FPS when timer-dependent behaviour should match an interactive session.
+"""
+# version 1.0.1 (Per-phase profiler summary and --profile-csv)
+
+import os
+import sys
+import time
+import random
+import argparse
+from typing import Dict, List, Optional, Any, Tuple, Set
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen") # Must be set before the Qt GUI application is created
+
+_HEADLESS_PY_FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+_PROJECT_ROOT_FOR_HEADLESS = os.path.dirname(_HEADLESS_PY_FILE_DIR)
+if _PROJECT_ROOT_FOR_HEADLESS not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT_FOR_HEADLESS)
+
+from PySide6.QtGui import QGuiApplication, QKeyEvent
+from PySide6.QtCore import Qt
+
+import main_game.constants as C
+import main_game.config as game_config
+from main_game.logger import info, warning, error
+from main_game.game_setup import initialize_game_elements
+from main_game.couch_play_logic import run_couch_play_mode
+from main_game.assets import get_frame_cache_stats
+from main_game.tick_profiler import get_tick_profiler
+from player.player_input_handler import process_player_input_logic
+
+
+class HeadlessAppStatus:
+    """Stand-in for app_core.AppStatus; run_couch_play_mode only needs `app_running`."""
+    def __init__(self):
+        self.app_running = True
+    def quit_app(self):
+        self.app_running = False
+
+
+class ScriptedInputSource:
+    """
+    Produces keyboard-style input for one player and feeds it through the normal
+    process_player_input_logic path, exactly like a real keyboard player.
+    Scripts: 'idle' (no input) or 'random' (wander, jump, attack and fire projectiles).
+    """
+    _WANDER_DIRECTIONS: Tuple[Optional[str], ...] = ("left", "right", None)
+    _PRESS_ACTIONS: Tuple[Tuple[str, float], ...] = (
+        ("jump", 0.03), ("attack1", 0.02), ("attack2", 0.01), ("dash", 0.005), ("roll", 0.005), ("interact", 0.01),
+    )
+    _PROJECTILE_ACTIONS: Tuple[str, ...] = tuple(f"projectile{i}" for i in range(1, 8))
+
+    def __init__(self, player_id: int, seed: int, script: str = "random"):
+        self.player_id = player_id
+        self.script = script
+        self.rng = random.Random(seed * 1000 + player_id)
+        self.mappings: Dict[str, Qt.Key] = game_config.DEFAULT_KEYBOARD_P1_MAPPINGS
+        self.held_actions: Set[str] = set()
+        self.segment_ticks_left = 0
+
+    def _next_tick_keys(self) -> Tuple[Dict[Qt.Key, bool], List[Tuple[QKeyEvent.Type, Qt.Key, bool]]]:
+        if self.script != "random":
+            return {}, []
+        if self.segment_ticks_left <= 0:
+            direction = self.rng.choice(self._WANDER_DIRECTIONS)
+            self.held_actions = {direction} if direction else set()
+            if self.rng.random() < 0.1: self.held_actions.add("down")
+            self.segment_ticks_left = self.rng.randint(20, 120)
+        self.segment_ticks_left -= 1
+
+        pressed_actions = [action for action, chance in self._PRESS_ACTIONS if self.rng.random() < chance]
+        if self.rng.random() < 0.01:
+            pressed_actions.append(self.rng.choice(self._PROJECTILE_ACTIONS))
+
+        keys_held = {self.mappings[action]: True for action in self.held_actions if action in self.mappings}
+        key_events = [(QKeyEvent.Type.KeyPress, self.mappings[action], False) for action in pressed_actions if action in self.mappings]
+        for _event_type, key, _auto_repeat in key_events: keys_held[key] = True
+        return keys_held, key_events
+
+    def get_input_snapshot(self, player_instance: Any, platforms_list: List[Any]) -> Dict[str, bool]:
+        keys_held, key_events = self._next_tick_keys()
+        player_instance.control_scheme = "keyboard_p1" # Scripted input always goes through the keyboard path
+        return process_player_input_logic(player_instance, keys_held, key_events, self.mappings, platforms_list, joystick_data=None)
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values: return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def run_headless(map_name: str, num_players: int, num_ticks: int, seed: int = 0, script: str = "random",
+                 screen_width: int = getattr(C, 'GAME_WIDTH', 960), screen_height: int = getattr(C, 'GAME_HEIGHT', 600),
+                 realtime: bool = False) -> Dict[str, Any]:
+    """
+    Runs `num_ticks` fixed steps of couch play on `map_name` and returns a summary dict
+    (ticks run, wall time, tick timing percentiles in ms, entity counts, frame cache stats).
+    """
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    game_elements: Dict[str, Any] = {'num_active_players_for_mode': max(1, min(4, num_players))}
+    pending_map_change: List[str] = []
+
+    if not initialize_game_elements(screen_width, screen_height, game_elements, "couch_play", map_name):
+        error(f"Headless: initialize_game_elements failed for map '{map_name}'.")
+        return {'ok': False, 'ticks_run': 0}
+
+    input_sources = {pid: ScriptedInputSource(pid, seed, script) for pid in range(1, 5)}
+    def make_input_callback(pid: int):
+        return lambda player_instance: input_sources[pid].get_input_snapshot(player_instance, game_elements.get("platforms_list", []))
+
+    app_status = HeadlessAppStatus()
+    get_tick_profiler().reset() # Phase stats cover the run only, not map loading
+    dt_sec = 1.0 / max(1, getattr(C, 'FPS', 60))
+    tick_durations_ms: List[float] = []
+    stopped_early = False
+    run_start = time.perf_counter()
+
+    for tick_index in range(num_ticks):
+        tick_start = time.perf_counter()
+        continue_game = run_couch_play_mode(
+            game_elements, app_status,
+            make_input_callback(1), make_input_callback(2), make_input_callback(3), make_input_callback(4),
+            lambda: None, lambda: dt_sec,
+            lambda title, msg, prog: None,
+            lambda new_map_name: pending_map_change.append(new_map_name)
+        )
+        tick_durations_ms.append((time.perf_counter() - tick_start) * 1000.0)
+
+        if pending_map_change:
+            next_map_name = pending_map_change.pop()
+            pending_map_change.clear()
+            info(f"Headless: Map change to '{next_map_name}' requested at tick {tick_index}.")
+            game_elements.clear(); game_elements['num_active_players_for_mode'] = max(1, min(4, num_players))
+            if not initialize_game_elements(screen_width, screen_height, game_elements, "couch_play", next_map_name):
+                error(f"Headless: Map change to '{next_map_name}' failed. Stopping."); stopped_early = True; break
+        elif not continue_game:
+            warning(f"Headless: run_couch_play_mode requested stop at tick {tick_index}.")
+            stopped_early = True; break
+
+        if realtime:
+            remaining_sec = dt_sec - (time.perf_counter() - tick_start)
+            if remaining_sec > 0: time.sleep(remaining_sec)
+        app.processEvents()
+
+    wall_time_sec = time.perf_counter() - run_start
+    sorted_durations = sorted(tick_durations_ms)
+    return {
+        'ok': True,
+        'map': map_name, 'players': game_elements.get('num_active_players_for_mode'),
+        'ticks_run': len(tick_durations_ms), 'stopped_early': stopped_early,
+        'wall_time_sec': wall_time_sec,
+        'ticks_per_sec': (len(tick_durations_ms) / wall_time_sec) if wall_time_sec > 0 else 0.0,
+        'tick_ms_mean': (sum(tick_durations_ms) / len(tick_durations_ms)) if tick_durations_ms else 0.0,
+        'tick_ms_p50': _percentile(sorted_durations, 0.50),
+        'tick_ms_p95': _percentile(sorted_durations, 0.95),
+        'tick_ms_max': sorted_durations[-1] if sorted_durations else 0.0,
+        'enemies': len(game_elements.get('enemy_list', [])),
+        'projectiles': len(game_elements.get('projectiles_list', [])),
+        'statues': len(game_elements.get('statue_objects', [])),
+        'frame_cache': get_frame_cache_stats(),
+        'phases': get_tick_profiler().get_summary(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run couch play without a window (soak tests, perf measurements).")
+    parser.add_argument("--map", default="original", help="Map folder name under maps/ (default: original)")
+    parser.add_argument("--players", type=int, default=2, help="Number of players, 1-4 (default: 2)")
+    parser.add_argument("--ticks", type=int, default=600, help="Number of fixed logic steps to run (default: 600)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for scripted input (default: 0)")
+    parser.add_argument("--script", choices=["random", "idle"], default="random", help="Scripted input behaviour (default: random)")
+    parser.add_argument("--width", type=int, default=getattr(C, 'GAME_WIDTH', 960), help="Virtual screen width for the camera")
+    parser.add_argument("--height", type=int, default=getattr(C, 'GAME_HEIGHT', 600), help="Virtual screen height for the camera")
+    parser.add_argument("--realtime", action="store_true", help="Sleep so ticks advance at FPS instead of as fast as possible")
+    parser.add_argument("--profile-csv", metavar="PATH", default=None, help="Write the tick profiler's per-tick phase timings to PATH")
+    args = parser.parse_args(argv)
+
+    summary = run_headless(args.map, args.players, max(0, args.ticks), seed=args.seed, script=args.script,
+                           screen_width=args.width, screen_height=args.height, realtime=args.realtime)
+    if not summary.get('ok'):
+        print(f"Headless run FAILED: could not initialize map '{args.map}'.")
+        return 1
+    print(f"Headless run: map={summary['map']} players={summary['players']} ticks={summary['ticks_run']}"
+          f"{' (stopped early)' if summary['stopped_early'] else ''}")
+    print(f"  wall={summary['wall_time_sec']:.2f}s  ticks/s={summary['ticks_per_sec']:.1f}")
+    print(f"  tick ms: mean={summary['tick_ms_mean']:.3f} p50={summary['tick_ms_p50']:.3f} "
+          f"p95={summary['tick_ms_p95']:.3f} max={summary['tick_ms_max']:.3f}")
+    print(f"  entities: enemies={summary['enemies']} projectiles={summary['projectiles']} statues={summary['statues']}")
+    print(f"  frame cache: {summary['frame_cache']}")
+    for phase_key, p50, p95, max_ms in summary['phases']:
+        print(f"  {phase_key:<22} p50={p50:.3f} p95={p95:.3f} max={max_ms:.3f}")
+    if args.profile_csv:
+        get_tick_profiler().dump_csv(args.profile_csv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
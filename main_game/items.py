@@ -6,8 +6,9 @@ Uses resource_path helper. Refactored for PySide6.
 Chest now has gravity applied by an external physics step.
 MODIFIED: Path for CHEST_CLOSED_SPRITE_PATH is now correctly handled via constants.py and resource_path.
 MODIFIED: Corrected logger fallback and import path.
+MODIFIED: Chest exposes get_render_sprite() for GameSceneWidget's world-space sprite path.
 """
-# version 2.0.7 (Asset path refactor, Logger fix)
+# version 2.0.8 (get_render_sprite)
 import os
 import sys # Added for logger fallback
 import random
@@ -79,7 +80,7 @@ class Chest:
         
         if _SCRIPT_LOGGING_ENABLED: debug(f"Chest: Attempting to load animation from: '{full_chest_animation_path}' (resolved from constant: '{chest_sprite_path_constant}')")
 
-        self.all_frames = load_gif_frames(full_chest_animation_path)
+        self.all_frames = load_gif_frames(full_chest_animation_path, owner=self)
         self.initial_image_frames = self.all_frames 
 
         self.num_opening_frames = 0
@@ -333,6 +334,12 @@ class Chest:
 
         self._update_rect_from_image_and_pos()
 
+    def get_render_sprite(self) -> Optional[Tuple[QPixmap, float]]:
+        """(pixmap, opacity) drawn at rect.topLeft() in world space, or None when there's nothing to draw."""
+        if not self._alive or self.state == 'collected' or not self.rect.isValid() or not self.image or self.image.isNull():
+            return None
+        return self.image, self.alpha / 255.0
+
     def draw_pyside(self, painter: QPainter, camera: Any):
         if not self._alive or self.state == 'collected' or not self.rect.isValid() or not self.image or self.image.isNull():
             return
@@ -0,0 +1,293 @@
+# main_game/render_registry.py
+# -*- coding: utf-8 -*-
+"""
+Persistent, layer-ordered render list for game modes that update entities in place.
+Entries are keyed by entity (e.g. ('enemy', '3'), ('player', 2)) and kept in a flat
+list ordered by get_layer_order_key, which is what GameSceneWidget draws as
+game_elements["all_renderable_objects"]. Adding an entity bisects its layer into
+the list and removing one only scans its own layer, so applying a state where
+nothing spawned or despawned leaves the list untouched instead of rebuilding and
+re-sorting it. Static map objects are registered once per map and re-registered
+only when their source lists are replaced or change length. An object registered
+under two keys (a statue that is also a platform) is drawn once.
+Code that appends to the list directly (e.g. a statue from petrification) is
+tolerated: the registry notices the length mismatch and drops the unregistered
+objects, as a rebuild from the entity lists would; their owner registers them.
+MODIFIED: query_visible(world_rect) returns only the renderables overlapping a rect, in draw
+          order. Static objects that can't move (no 'vel') are bucketed into a uniform grid of
+          RENDER_CULL_CELL_SIZE cells when registered; moving entities, which are few, are
+          tested against the rect directly. GameSceneWidget culls with the camera's view.
+MODIFIED: With a StaticLayerCache, static platforms, ladders and background tiles are baked into
+          chunk pixmaps instead of being registered one by one; each draw layer's StaticChunkLayer is
+          registered as a single renderable ('static_layer', layer).
+MODIFIED: get_render_registry(game_elements) is shared by the client and couch play. Code that spawns an
+          entity (a projectile, a petrification statue) calls register_renderable, and the game loop calls
+          unregister_renderable when one dies, so couch play no longer rebuilds the list every tick.
+MODIFIED: The client applies server states on its network thread while the GUI thread paints, so the
+          registry has a lock (RenderRegistry.lock) taken by every mutator, by set_network_game_state for
+          the whole state, and by query_visible. query_visible no longer modifies anything: unregistered
+          objects appended to the list are dropped by the next mutation instead.
+"""
+# version 1.3.1 (Lock shared by mutation and query_visible)
+
+import math
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+from PySide6.QtCore import QRectF
+
+import main_game.constants as C
+
+try:
+    from main_game.logger import debug
+except ImportError:
+    def debug(msg, *args, **kwargs): print(f"DEBUG_RENDER_REGISTRY: {msg}")
+
+
+STATIC_KIND = 'static'
+STATIC_LAYER_KIND = 'static_layer'
+
+# game_elements lists holding the map's static objects, in the order they are registered
+STATIC_RENDER_LIST_KEYS = ("platforms_list", "ladders_list", "hazards_list", "background_tiles_list",
+                           "trigger_squares_list", "processed_custom_images_for_render")
+_NO_STATIC_OBJECTS: Tuple[Any, ...] = () # Same object every call, so a missing list doesn't change the static signature
+
+CellKey = Tuple[int, int]
+_UNKNOWN_DRAW_ORDER = (0, 0)
+
+
+def _render_rect(obj: Any) -> Optional[QRectF]:
+    """World rect of an entity or a custom image dict, or None if it has no usable one."""
+    rect = obj.get('rect') if isinstance(obj, dict) else getattr(obj, 'rect', None)
+    return rect if isinstance(rect, QRectF) and rect.isValid() else None
+
+
+class RenderRegistry:
+    def __init__(self, layer_key_func: Callable[[Any], int],
+                 cull_cell_size: float = getattr(C, 'RENDER_CULL_CELL_SIZE', 320.0),
+                 static_layer_cache: Optional[Any] = None):
+        """
+        Args:
+            layer_key_func (Callable[[Any], int]): Draw layer of an object (game_setup.get_layer_order_key).
+            cull_cell_size (float): Width/height of one culling grid cell in world pixels.
+            static_layer_cache (Optional[StaticLayerCache]): Bakes the static objects it accepts into chunks.
+        """
+        self.layer_key_func = layer_key_func
+        self.lock = threading.RLock() # Mutation vs. query_visible from another thread (client: network thread vs. paint)
+        self.static_layer_cache = static_layer_cache
+        self._baked_statics: Dict[Hashable, Any] = {} # Static key -> object baked into static_layer_cache
+        self.renderables: List[Any] = [] # Draw order; shared as game_elements["all_renderable_objects"]
+        self._layer_keys: List[int] = [] # Parallel to renderables, ascending
+        self._entries: Dict[Hashable, Any] = {}
+        self._keys_by_kind: Dict[str, Set[Hashable]] = {}
+        self._key_counts_by_obj_id: Dict[int, int] = {}
+        # Culling index
+        self.cull_cell_size = max(1.0, float(cull_cell_size))
+        self._draw_order_by_obj_id: Dict[int, Tuple[int, int]] = {} # (layer key, insertion sequence): same order as renderables
+        self._next_draw_sequence = 0
+        self._static_cells: Dict[CellKey, List[Any]] = {}
+        self._static_cell_keys_by_obj_id: Dict[int, List[CellKey]] = {}
+        self._unculled_by_obj_id: Dict[int, Any] = {} # Moving or rect-less objects, tested every query
+        self._static_signature: Optional[Tuple[Tuple[int, int], ...]] = None
+        # Metrics
+        self.inserts = 0
+        self.removals = 0
+        self.external_changes = 0
+
+    def __len__(self) -> int:
+        return len(self.renderables)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        return self._entries.get(key)
+
+    def _drop_external_changes(self):
+        if len(self.renderables) == len(self._layer_keys): return
+        registered_ids = self._key_counts_by_obj_id
+        self.renderables[:] = [obj for obj in self.renderables if id(obj) in registered_ids]
+        self._layer_keys[:] = [self.layer_key_func(obj) for obj in self.renderables]
+        self.external_changes += 1
+
+    def _index_of(self, obj: Any, layer_key: int) -> int:
+        renderables = self.renderables
+        for index in range(bisect_left(self._layer_keys, layer_key), bisect_right(self._layer_keys, layer_key)):
+            if renderables[index] is obj: return index
+        for index, candidate in enumerate(renderables): # Its layer key changed since it was added
+            if candidate is obj: return index
+        return -1
+
+    def set(self, key: Tuple[str, Any], obj: Any):
+        """Registers `obj` under `key` (kind, id); replaces a different object previously registered there."""
+        with self.lock:
+            self._drop_external_changes()
+            existing_obj = self._entries.get(key)
+            if existing_obj is obj: return
+            if existing_obj is not None: self.remove(key)
+            self._entries[key] = obj
+            self._keys_by_kind.setdefault(key[0], set()).add(key)
+            key_count = self._key_counts_by_obj_id.get(id(obj), 0)
+            self._key_counts_by_obj_id[id(obj)] = key_count + 1
+            if key_count: return # Already drawn under another key
+            layer_key = self.layer_key_func(obj)
+            index = bisect_right(self._layer_keys, layer_key) # After everything already on its layer
+            self.renderables.insert(index, obj)
+            self._layer_keys.insert(index, layer_key)
+            self._index_for_culling(obj, layer_key, is_static=(key[0] == STATIC_KIND))
+            self.inserts += 1
+
+    def remove(self, key: Tuple[str, Any]) -> bool:
+        with self.lock:
+            obj = self._entries.pop(key, None)
+            if obj is None: return False
+            self._keys_by_kind.get(key[0], set()).discard(key)
+            key_count = self._key_counts_by_obj_id.pop(id(obj), 1) - 1
+            if key_count: self._key_counts_by_obj_id[id(obj)] = key_count; return True
+            self._unindex_for_culling(obj)
+            self._drop_external_changes()
+            index = self._index_of(obj, self.layer_key_func(obj))
+            if index >= 0:
+                del self.renderables[index]
+                del self._layer_keys[index]
+            self.removals += 1
+            return True
+
+    def retain(self, kind: str, live_keys: Iterable[Hashable]):
+        """Removes every entry of `kind` whose key isn't in `live_keys` (the entities that despawned)."""
+        with self.lock:
+            live_key_set = live_keys if isinstance(live_keys, set) else set(live_keys)
+            for stale_key in self._keys_by_kind.get(kind, set()) - live_key_set: self.remove(stale_key)
+
+    def sync_static(self, static_lists: Sequence[Sequence[Any]]):
+        """Registers the map's static objects. Only does work when one of the lists was replaced or resized."""
+        with self.lock:
+            signature = tuple((id(static_list), len(static_list)) for static_list in static_lists)
+            if signature == self._static_signature: return
+            self._static_signature = signature
+            static_layer_cache = self.static_layer_cache
+            live_static_keys: Set[Hashable] = set()
+            for static_list in static_lists:
+                for static_obj in static_list:
+                    if static_obj is None: continue
+                    static_key = (STATIC_KIND, id(static_obj))
+                    live_static_keys.add(static_key)
+                    if static_layer_cache is not None and static_layer_cache.accepts(static_obj):
+                        if static_key in self._baked_statics: continue
+                        self._baked_statics[static_key] = static_obj
+                        static_layer, is_new_layer = static_layer_cache.add(static_obj, self.layer_key_func(static_obj))
+                        if is_new_layer: self.set((STATIC_LAYER_KIND, static_layer.layer_order), static_layer)
+                    else: self.set(static_key, static_obj)
+            for removed_static_key in set(self._baked_statics) - live_static_keys: # Invalidates the chunks it was baked into
+                static_layer_cache.remove(self._baked_statics.pop(removed_static_key))
+            self.retain(STATIC_KIND, live_static_keys)
+            debug(f"RenderRegistry: Static layer synced, {len(live_static_keys)} objects, {len(self._baked_statics)} baked "
+                  f"({len(self.renderables)} renderables total).")
+
+    # --- Culling ---
+    def _cell_range(self, rect: QRectF) -> Tuple[int, int, int, int]:
+        inv_cell = 1.0 / self.cull_cell_size
+        return (int(math.floor(rect.left() * inv_cell)), int(math.floor(rect.top() * inv_cell)),
+                int(math.floor(rect.right() * inv_cell)), int(math.floor(rect.bottom() * inv_cell)))
+
+    def _index_for_culling(self, obj: Any, layer_key: int, is_static: bool):
+        obj_id = id(obj)
+        self._draw_order_by_obj_id[obj_id] = (layer_key, self._next_draw_sequence)
+        self._next_draw_sequence += 1
+        rect = _render_rect(obj) if is_static and not hasattr(obj, 'vel') else None
+        if rect is None: self._unculled_by_obj_id[obj_id] = obj; return
+        min_cx, min_cy, max_cx, max_cy = self._cell_range(rect)
+        cell_keys: List[CellKey] = []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                self._static_cells.setdefault((cx, cy), []).append(obj)
+                cell_keys.append((cx, cy))
+        self._static_cell_keys_by_obj_id[obj_id] = cell_keys
+
+    def _unindex_for_culling(self, obj: Any):
+        obj_id = id(obj)
+        self._draw_order_by_obj_id.pop(obj_id, None)
+        if self._unculled_by_obj_id.pop(obj_id, None) is not None: return
+        for cell_key in self._static_cell_keys_by_obj_id.pop(obj_id, []):
+            cell_objects = self._static_cells.get(cell_key)
+            if cell_objects is None: continue
+            cell_objects[:] = [o for o in cell_objects if o is not obj]
+            if not cell_objects: del self._static_cells[cell_key]
+
+    def query_visible(self, world_rect: QRectF) -> List[Any]:
+        """
+        Renderables whose rect overlaps `world_rect` (plus any without a rect), in draw order.
+        Read-only and taken under `lock`, so it can run on the paint thread while another thread mutates.
+        """
+        candidates: Dict[int, Any] = {}
+        min_cx, min_cy, max_cx, max_cy = self._cell_range(world_rect)
+        with self.lock:
+            static_cells = self._static_cells
+            if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) > len(static_cells): # View covers more cells than are occupied
+                for (cx, cy), cell_objects in static_cells.items():
+                    if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy:
+                        for obj in cell_objects: candidates[id(obj)] = obj
+            else:
+                for cx in range(min_cx, max_cx + 1):
+                    for cy in range(min_cy, max_cy + 1):
+                        cell_objects = static_cells.get((cx, cy))
+                        if cell_objects:
+                            for obj in cell_objects: candidates[id(obj)] = obj
+            found: Dict[int, Any] = {}
+            for obj_id, obj in candidates.items():
+                rect = _render_rect(obj)
+                if rect is not None and rect.intersects(world_rect): found[obj_id] = obj
+            for obj_id, obj in self._unculled_by_obj_id.items():
+                rect = _render_rect(obj)
+                if rect is None or rect.intersects(world_rect): found[obj_id] = obj
+            draw_order = self._draw_order_by_obj_id
+            return sorted(found.values(), key=lambda o: draw_order.get(id(o), _UNKNOWN_DRAW_ORDER))
+
+    def clear(self):
+        with self.lock:
+            self.renderables.clear(); self._layer_keys.clear()
+            self._entries.clear(); self._keys_by_kind.clear(); self._key_counts_by_obj_id.clear()
+            self._draw_order_by_obj_id.clear(); self._static_cells.clear()
+            self._static_cell_keys_by_obj_id.clear(); self._unculled_by_obj_id.clear()
+            self._static_signature = None
+            self._baked_statics.clear()
+            if self.static_layer_cache is not None: self.static_layer_cache.clear()
+
+
+def get_render_registry(game_elements: Dict[str, Any]) -> RenderRegistry:
+    """The registry backing game_elements["all_renderable_objects"], recreated when game_elements was re-initialized (new map, reset)."""
+    render_registry: Optional[RenderRegistry] = game_elements.get("render_registry")
+    if render_registry is None or game_elements.get("all_renderable_objects") is not render_registry.renderables:
+        try: from main_game.game_setup import get_layer_order_key # Deferred: game_setup imports the modules that import this one
+        except ImportError:
+            debug("RenderRegistry: get_layer_order_key not available. Render order might be incorrect.")
+            def get_layer_order_key(item: Any) -> int: return int(getattr(item, 'layer_order', 0)) if not isinstance(item, dict) else int(item.get('layer_order', 0))
+        static_layer_cache = None
+        if getattr(C, 'STATIC_LAYER_CACHE_ENABLED', True):
+            from main_game.static_layer_cache import StaticLayerCache
+            static_layer_cache = StaticLayerCache()
+        render_registry = RenderRegistry(get_layer_order_key, static_layer_cache=static_layer_cache)
+        game_elements["render_registry"] = render_registry
+        game_elements["all_renderable_objects"] = render_registry.renderables
+    return render_registry
+
+
+def sync_static_renderables(render_registry: RenderRegistry, game_elements: Dict[str, Any]):
+    """Registers the map's static lists (STATIC_RENDER_LIST_KEYS); a no-op unless one was replaced or resized."""
+    render_registry.sync_static([game_elements.get(static_list_key) or _NO_STATIC_OBJECTS for static_list_key in STATIC_RENDER_LIST_KEYS])
+
+
+def register_renderable(game_elements: Dict[str, Any], kind: str, obj: Any):
+    """
+    Adds a newly spawned entity to what gets drawn: registers it under (kind, id(obj)) when a
+    RenderRegistry backs all_renderable_objects, otherwise appends it to the plain list.
+    """
+    all_renderables = game_elements.get("all_renderable_objects")
+    render_registry = game_elements.get("render_registry")
+    if render_registry is not None and all_renderables is render_registry.renderables: render_registry.set((kind, id(obj)), obj)
+    elif all_renderables is not None: all_renderables.append(obj)
+
+
+def unregister_renderable(game_elements: Dict[str, Any], kind: str, obj: Any) -> bool:
+    """Removes an entity registered with register_renderable. False if it wasn't registered."""
+    render_registry = game_elements.get("render_registry")
+    if render_registry is None or game_elements.get("all_renderable_objects") is not render_registry.renderables: return False
+    return render_registry.remove((kind, id(obj)))
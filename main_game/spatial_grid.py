@@ -0,0 +1,154 @@
+# main_game/spatial_grid.py
+# -*- coding: utf-8 -*-
+"""
+Uniform-grid spatial index for collidable platforms.
+Static platforms are bucketed into fixed-size world cells once at map load so
+collision checks only visit platforms near the querying rect instead of the
+whole platforms_list. Objects that can move (statues created by petrification)
+are kept in a small dynamic bucket that is returned with every query.
+The grid is iterable and sized like a list, so code that still needs a full
+scan (e.g. Player.can_stand_up) can be handed the grid unchanged.
+"""
+# version 1.0.0 (Initial uniform grid for platforms)
+
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from PySide6.QtCore import QRectF
+
+import main_game.constants as C
+
+try:
+    from main_game.logger import debug, warning
+except ImportError:
+    def debug(msg, *args, **kwargs): print(f"DEBUG_SPATIAL_GRID: {msg}")
+    def warning(msg, *args, **kwargs): print(f"WARNING_SPATIAL_GRID: {msg}")
+
+
+CellKey = Tuple[int, int]
+
+# Collision resolution nudges rects by up to one frame of movement while iterating the
+# candidates, so queries are padded by a tile to keep results identical to a full scan.
+COLLISION_QUERY_MARGIN = float(getattr(C, 'TILE_SIZE', 40.0))
+
+
+class PlatformSpatialGrid:
+    def __init__(self, platforms: Optional[Iterable[Any]] = None,
+                 cell_size: float = getattr(C, 'SPATIAL_GRID_CELL_SIZE', 160.0)):
+        """
+        Args:
+            platforms (Optional[Iterable[Any]]): Initial collidables. Each must expose a QRectF `rect`.
+            cell_size (float): Width/height of one grid cell in world pixels.
+        """
+        self.cell_size = max(1.0, float(cell_size))
+        self._cells: Dict[CellKey, List[Any]] = {}
+        self._cells_by_obj_id: Dict[int, List[CellKey]] = {}
+        self._dynamic_objects: List[Any] = []
+        self._all_objects: List[Any] = []
+        self._insertion_order: Dict[int, int] = {}
+        self._next_order = 0
+        if platforms is not None:
+            for platform_obj in platforms:
+                self.insert(platform_obj)
+
+    def _cell_range(self, rect: QRectF) -> Tuple[int, int, int, int]:
+        inv_cell = 1.0 / self.cell_size
+        min_cx = int(math.floor(rect.left() * inv_cell))
+        min_cy = int(math.floor(rect.top() * inv_cell))
+        # Rects touching a cell edge don't intersect (QRectF.intersects is exclusive), so
+        # the right/bottom edge is nudged inward before bucketing.
+        max_cx = int(math.floor((rect.right() - 1e-6) * inv_cell))
+        max_cy = int(math.floor((rect.bottom() - 1e-6) * inv_cell))
+        return min_cx, min_cy, max(min_cx, max_cx), max(min_cy, max_cy)
+
+    def insert(self, obj: Any, dynamic: Optional[bool] = None):
+        """
+        Adds a collidable to the grid. Objects with a `vel` attribute (e.g. Statue)
+        are treated as dynamic unless `dynamic` is given explicitly.
+        """
+        obj_id = id(obj)
+        if obj_id in self._insertion_order:
+            return
+        rect = getattr(obj, 'rect', None)
+        if not isinstance(rect, QRectF) or not rect.isValid():
+            warning(f"PlatformSpatialGrid: Object {type(obj).__name__} has no valid rect. Not indexed.")
+            return
+        self._insertion_order[obj_id] = self._next_order
+        self._next_order += 1
+        self._all_objects.append(obj)
+        is_dynamic = hasattr(obj, 'vel') if dynamic is None else dynamic
+        if is_dynamic:
+            self._dynamic_objects.append(obj)
+            return
+        min_cx, min_cy, max_cx, max_cy = self._cell_range(rect)
+        cell_keys: List[CellKey] = []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                self._cells.setdefault((cx, cy), []).append(obj)
+                cell_keys.append((cx, cy))
+        self._cells_by_obj_id[obj_id] = cell_keys
+
+    def append(self, obj: Any):
+        """List-style alias for insert()."""
+        self.insert(obj)
+
+    def remove(self, obj: Any) -> bool:
+        """Removes a collidable. Returns False if it was not indexed."""
+        obj_id = id(obj)
+        if obj_id not in self._insertion_order:
+            return False
+        del self._insertion_order[obj_id]
+        self._all_objects = [o for o in self._all_objects if o is not obj]
+        cell_keys = self._cells_by_obj_id.pop(obj_id, None)
+        if cell_keys is None:
+            self._dynamic_objects = [o for o in self._dynamic_objects if o is not obj]
+            return True
+        for key in cell_keys:
+            bucket = self._cells.get(key)
+            if bucket is None: continue
+            bucket[:] = [o for o in bucket if o is not obj]
+            if not bucket: del self._cells[key]
+        return True
+
+    def query(self, rect: QRectF, margin: float = 0.0) -> List[Any]:
+        """
+        Returns the collidables whose cells overlap `rect` (grown by `margin`), plus all
+        dynamic objects, in insertion order (same order a linear scan of platforms_list
+        would give). Callers still do their own exact `intersects` test.
+        """
+        if margin:
+            rect = rect.adjusted(-margin, -margin, margin, margin)
+        min_cx, min_cy, max_cx, max_cy = self._cell_range(rect)
+        found: Dict[int, Any] = {}
+        cells = self._cells
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    for obj in bucket:
+                        found[id(obj)] = obj
+        for obj in self._dynamic_objects:
+            found[id(obj)] = obj
+        if len(found) <= 1:
+            return list(found.values())
+        order = self._insertion_order
+        return sorted(found.values(), key=lambda o: order[id(o)])
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._all_objects)
+
+    def __len__(self) -> int:
+        return len(self._insertion_order)
+
+    def __contains__(self, obj: Any) -> bool:
+        return id(obj) in self._insertion_order
+
+
+def query_platforms(platforms: Any, rect: QRectF, margin: float = COLLISION_QUERY_MARGIN) -> Iterable[Any]:
+    """
+    Returns collision candidates for `rect`. Accepts either a PlatformSpatialGrid
+    or a plain list (server/client paths), in which case the list itself is returned.
+    """
+    if isinstance(platforms, PlatformSpatialGrid):
+        return platforms.query(rect, margin)
+    return platforms
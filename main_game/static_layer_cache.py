@@ -0,0 +1,165 @@
+# main_game/static_layer_cache.py
+# -*- coding: utf-8 -*-
+"""
+Chunked pre-rendering of the static map layers.
+Platforms, ladders and background tiles don't change after initialize_game_elements,
+so instead of calling each one's draw_pyside every frame they are handed to a
+StaticChunkLayer (one per draw layer) that buckets them into fixed-size world
+chunks of STATIC_CHUNK_SIZE pixels. A chunk is baked into a QPixmap by drawing its
+objects with their own draw_pyside the first time it comes into view, and after
+that a frame only blits the chunk pixmaps overlapping the viewport, so frame cost
+no longer scales with the number of static tiles.
+Baked pixmaps are kept up to STATIC_CHUNK_CACHE_MAX_CHUNKS (least recently drawn
+are dropped and re-baked on demand). Adding or removing a baked object invalidates
+only the chunks its rect touches. Statues (solid or smashed), lava (animated) and
+anything that can move are never baked and keep drawing themselves.
+"""
+# version 1.0.0 (Chunked static layer pre-rendering)
+
+import math
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from PySide6.QtCore import QPointF, QRectF, Qt
+from PySide6.QtGui import QPainter, QPixmap
+
+import main_game.constants as C
+from main_game.tiles import Platform, Ladder, BackgroundTile
+
+try:
+    from main_game.logger import debug
+except ImportError:
+    def debug(msg, *args, **kwargs): print(f"DEBUG_STATIC_LAYER_CACHE: {msg}")
+
+
+BAKED_STATIC_TYPES = (BackgroundTile, Platform, Ladder)
+
+ChunkKey = Tuple[int, int]
+
+
+class _ChunkCamera:
+    """Stands in for the game camera while baking: maps world coordinates into one chunk's pixmap."""
+    def __init__(self, chunk_origin: QPointF):
+        self._offset = -chunk_origin
+
+    def apply(self, target_rect_world: QRectF) -> QRectF:
+        return target_rect_world.translated(self._offset)
+
+    def apply_to_point(self, target_point_world: QPointF) -> QPointF:
+        return target_point_world + self._offset
+
+
+class StaticChunkLayer:
+    """All baked objects of one draw layer. Registered as a single renderable at that layer."""
+    def __init__(self, layer_order: int, chunk_size: int, pixmap_cache: "OrderedDict[Tuple[int, ChunkKey], QPixmap]",
+                 max_cached_chunks: int):
+        self.layer_order = layer_order # Read by game_setup.get_layer_order_key
+        self.chunk_size = chunk_size
+        self._objects_by_chunk: Dict[ChunkKey, List[Any]] = {}
+        self._chunk_keys_by_obj_id: Dict[int, List[ChunkKey]] = {}
+        self._pixmap_cache = pixmap_cache # Shared by every layer of the cache, so the limit is global
+        self._max_cached_chunks = max_cached_chunks
+        self.last_chunks_drawn = 0
+
+    def __len__(self) -> int:
+        return len(self._chunk_keys_by_obj_id)
+
+    def _chunk_range(self, rect: QRectF) -> Tuple[int, int, int, int]:
+        inv_chunk = 1.0 / self.chunk_size
+        return (int(math.floor(rect.left() * inv_chunk)), int(math.floor(rect.top() * inv_chunk)),
+                int(math.floor(rect.right() * inv_chunk)), int(math.floor(rect.bottom() * inv_chunk)))
+
+    def _invalidate(self, chunk_key: ChunkKey):
+        self._pixmap_cache.pop((self.layer_order, chunk_key), None)
+
+    def add(self, obj: Any):
+        if id(obj) in self._chunk_keys_by_obj_id: return
+        min_cx, min_cy, max_cx, max_cy = self._chunk_range(obj.rect)
+        chunk_keys = [(cx, cy) for cx in range(min_cx, max_cx + 1) for cy in range(min_cy, max_cy + 1)]
+        for chunk_key in chunk_keys:
+            self._objects_by_chunk.setdefault(chunk_key, []).append(obj)
+            self._invalidate(chunk_key)
+        self._chunk_keys_by_obj_id[id(obj)] = chunk_keys
+
+    def remove(self, obj: Any) -> bool:
+        chunk_keys = self._chunk_keys_by_obj_id.pop(id(obj), None)
+        if chunk_keys is None: return False
+        for chunk_key in chunk_keys:
+            chunk_objects = self._objects_by_chunk.get(chunk_key)
+            if chunk_objects is not None:
+                chunk_objects[:] = [o for o in chunk_objects if o is not obj]
+                if not chunk_objects: del self._objects_by_chunk[chunk_key]
+            self._invalidate(chunk_key)
+        return True
+
+    def _bake_chunk(self, chunk_key: ChunkKey) -> QPixmap:
+        chunk_origin = QPointF(float(chunk_key[0] * self.chunk_size), float(chunk_key[1] * self.chunk_size))
+        chunk_pixmap = QPixmap(self.chunk_size, self.chunk_size)
+        chunk_pixmap.fill(Qt.GlobalColor.transparent)
+        chunk_painter = QPainter(chunk_pixmap)
+        chunk_painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        chunk_painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, False)
+        chunk_camera = _ChunkCamera(chunk_origin)
+        for obj in self._objects_by_chunk.get(chunk_key, []): obj.draw_pyside(chunk_painter, chunk_camera)
+        chunk_painter.end()
+        return chunk_pixmap
+
+    def draw_pyside(self, painter: QPainter, camera: Any):
+        """Blits the chunks overlapping the painter's visible area, baking any that aren't cached."""
+        self.last_chunks_drawn = 0
+        if not self._objects_by_chunk: return
+        inverted_transform, is_invertible = painter.worldTransform().inverted()
+        visible_rect = inverted_transform.mapRect(QRectF(painter.viewport())) if is_invertible else QRectF(painter.window())
+        camera_offset = camera.get_offset()
+        min_cx, min_cy, max_cx, max_cy = self._chunk_range(visible_rect.translated(-camera_offset))
+        pixmap_cache = self._pixmap_cache
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                if (cx, cy) not in self._objects_by_chunk: continue
+                cache_key = (self.layer_order, (cx, cy))
+                chunk_pixmap = pixmap_cache.get(cache_key)
+                if chunk_pixmap is None:
+                    chunk_pixmap = pixmap_cache[cache_key] = self._bake_chunk((cx, cy))
+                    while len(pixmap_cache) > self._max_cached_chunks: pixmap_cache.popitem(last=False)
+                else: pixmap_cache.move_to_end(cache_key)
+                painter.drawPixmap(QPointF(cx * self.chunk_size + camera_offset.x(), cy * self.chunk_size + camera_offset.y()), chunk_pixmap)
+                self.last_chunks_drawn += 1
+
+    def alive(self) -> bool:
+        return True
+
+
+class StaticLayerCache:
+    """The StaticChunkLayers of one map, keyed by draw layer."""
+    def __init__(self, chunk_size: int = getattr(C, 'STATIC_CHUNK_SIZE', 512),
+                 max_cached_chunks: int = getattr(C, 'STATIC_CHUNK_CACHE_MAX_CHUNKS', 96)):
+        self.chunk_size = max(64, int(chunk_size))
+        self.max_cached_chunks = max(1, int(max_cached_chunks))
+        self.layers: Dict[int, StaticChunkLayer] = {}
+        self._layer_by_obj_id: Dict[int, StaticChunkLayer] = {}
+        self._pixmap_cache: "OrderedDict[Tuple[int, ChunkKey], QPixmap]" = OrderedDict()
+
+    @staticmethod
+    def accepts(obj: Any) -> bool:
+        rect = getattr(obj, 'rect', None)
+        return isinstance(obj, BAKED_STATIC_TYPES) and not hasattr(obj, 'vel') and isinstance(rect, QRectF) and rect.isValid()
+
+    def add(self, obj: Any, layer_order: int) -> Tuple[StaticChunkLayer, bool]:
+        """Bakes `obj` into its layer's chunks. Returns the layer and whether it was just created."""
+        layer = self.layers.get(layer_order)
+        is_new_layer = layer is None
+        if layer is None: layer = self.layers[layer_order] = StaticChunkLayer(layer_order, self.chunk_size, self._pixmap_cache, self.max_cached_chunks)
+        layer.add(obj)
+        self._layer_by_obj_id[id(obj)] = layer
+        return layer, is_new_layer
+
+    def remove(self, obj: Any) -> bool:
+        layer = self._layer_by_obj_id.pop(id(obj), None)
+        return layer.remove(obj) if layer is not None else False
+
+    def chunks_drawn(self) -> int:
+        return sum(layer.last_chunks_drawn for layer in self.layers.values())
+
+    def clear(self):
+        self.layers.clear(); self._layer_by_obj_id.clear(); self._pixmap_cache.clear()
+        debug("StaticLayerCache: Cleared.")
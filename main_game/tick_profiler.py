@@ -0,0 +1,217 @@
+# main_game/tick_profiler.py
+# -*- coding: utf-8 -*-
+"""
+Lightweight per-frame phase profiler for logic ticks and paint events.
+A frame is opened with begin_frame(kind), split into named phases either with
+lap(name) (time since the previous lap, for straight-line code such as
+run_couch_play_mode) or with a `with scope(name):` block, and closed with
+end_frame(). Each phase keeps a rolling window of samples for p50/p95/max,
+the overlay text is rebuilt at most a few times per second, and the raw
+per-frame rows can be written to CSV (on app exit) for offline analysis.
+MODIFIED: overlay_used records whether the overlay was shown this session; the app only dumps the CSV
+          on exit then, unless PROFILER_DUMP_CSV_ON_EXIT is set.
+"""
+# version 1.0.1 (CSV dump only for profiled sessions)
+
+import os
+import csv
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import main_game.constants as C
+
+try:
+    from main_game.logger import info, warning, error
+except ImportError:
+    def info(msg, *args, **kwargs): print(f"INFO_TICK_PROFILER: {msg}")
+    def warning(msg, *args, **kwargs): print(f"WARNING_TICK_PROFILER: {msg}")
+    def error(msg, *args, **kwargs): print(f"ERROR_TICK_PROFILER: {msg}")
+
+
+class RollingPhaseStats:
+    """Rolling window of millisecond samples for one phase."""
+    def __init__(self, window_size: int):
+        self.samples: Deque[float] = deque(maxlen=max(1, window_size))
+        self.total_samples = 0
+
+    def add(self, ms: float):
+        self.samples.append(ms)
+        self.total_samples += 1
+
+    def summary(self) -> Tuple[float, float, float]:
+        """Returns (p50, p95, max) in ms over the current window."""
+        if not self.samples: return 0.0, 0.0, 0.0
+        ordered = sorted(self.samples)
+        last_index = len(ordered) - 1
+        return ordered[int(last_index * 0.50)], ordered[int(round(last_index * 0.95))], ordered[-1]
+
+
+class _ProfileScope:
+    __slots__ = ("profiler", "name", "start")
+    def __init__(self, profiler: "TickProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.name, (time.perf_counter() - self.start) * 1000.0)
+        return False
+
+
+class _NullScope:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, exc_type, exc_value, traceback): return False
+
+_NULL_SCOPE = _NullScope()
+
+
+class TickProfiler:
+    def __init__(self, enabled: bool = getattr(C, 'PROFILER_ENABLED', True),
+                 window_size: int = getattr(C, 'PROFILER_WINDOW_FRAMES', 600),
+                 max_csv_rows: int = getattr(C, 'PROFILER_CSV_MAX_ROWS', 60000)):
+        self.enabled = enabled
+        self.overlay_visible = False
+        self.overlay_used = False # Overlay was shown at some point this session
+        self.window_size = window_size
+        self.phase_stats: Dict[str, RollingPhaseStats] = {} # "<kind>.<phase>" -> stats, in first-seen order
+        self.counts: Dict[str, int] = {}
+        self.csv_rows: Deque[Tuple[str, int, float, Dict[str, float], Dict[str, int]]] = deque(maxlen=max(1, max_csv_rows))
+        self.frame_indices: Dict[str, int] = {}
+        self._session_start = time.perf_counter()
+        self._frame_kind: Optional[str] = None
+        self._frame_start = 0.0
+        self._last_lap = 0.0
+        self._frame_phases: Dict[str, float] = {}
+        self._frame_counts: Dict[str, int] = {}
+        self._overlay_lines_cache: List[str] = []
+        self._overlay_built_at = 0.0
+
+    # --- Recording ---
+    def begin_frame(self, kind: str):
+        """Opens a frame ('logic' or 'render'). An unfinished previous frame (early return) is discarded."""
+        if not self.enabled: return
+        now = time.perf_counter()
+        self._frame_kind = kind
+        self._frame_start = now
+        self._last_lap = now
+        self._frame_phases = {}
+        self._frame_counts = {}
+
+    def lap(self, phase_name: str):
+        """Attributes the time since the previous lap (or begin_frame) to `phase_name`."""
+        if self._frame_kind is None: return
+        now = time.perf_counter()
+        self.record(phase_name, (now - self._last_lap) * 1000.0)
+        self._last_lap = now
+
+    def scope(self, phase_name: str):
+        """Context manager timing its block as `phase_name`. Returns a shared no-op scope when disabled."""
+        if not self.enabled: return _NULL_SCOPE
+        return _ProfileScope(self, phase_name)
+
+    def record(self, phase_name: str, ms: float):
+        if not self.enabled: return
+        if self._frame_kind is not None:
+            self._frame_phases[phase_name] = self._frame_phases.get(phase_name, 0.0) + ms
+            self._last_lap = time.perf_counter() # Time spent in a scope isn't counted again by the next lap
+        else:
+            self._add_sample(phase_name, ms)
+
+    def set_count(self, count_name: str, value: int):
+        if not self.enabled: return
+        self.counts[count_name] = value
+        if self._frame_kind is not None: self._frame_counts[count_name] = value
+
+    def end_frame(self):
+        if self._frame_kind is None: return
+        kind = self._frame_kind
+        total_ms = (time.perf_counter() - self._frame_start) * 1000.0
+        self._frame_kind = None
+        for phase_name, ms in self._frame_phases.items():
+            self._add_sample(f"{kind}.{phase_name}", ms)
+        self._add_sample(f"{kind}.total", total_ms)
+        frame_index = self.frame_indices.get(kind, 0)
+        self.frame_indices[kind] = frame_index + 1
+        phases_with_total = dict(self._frame_phases); phases_with_total["total"] = total_ms
+        self.csv_rows.append((kind, frame_index, self._frame_start - self._session_start, phases_with_total, self._frame_counts))
+
+    def _add_sample(self, key: str, ms: float):
+        stats = self.phase_stats.get(key)
+        if stats is None:
+            stats = RollingPhaseStats(self.window_size)
+            self.phase_stats[key] = stats
+        stats.add(ms)
+
+    # --- Reporting ---
+    def toggle_overlay(self) -> bool:
+        self.overlay_visible = not self.overlay_visible
+        self.overlay_used = self.overlay_used or self.overlay_visible
+        self._overlay_built_at = 0.0
+        info(f"TickProfiler: Overlay {'shown' if self.overlay_visible else 'hidden'}.")
+        return self.overlay_visible
+
+    def get_summary(self) -> List[Tuple[str, float, float, float]]:
+        """Returns [(phase_key, p50_ms, p95_ms, max_ms), ...] in first-seen order."""
+        return [(key, *stats.summary()) for key, stats in self.phase_stats.items()]
+
+    def get_overlay_lines(self) -> List[str]:
+        """Overlay text, rebuilt at most every PROFILER_OVERLAY_REFRESH_SEC so sorting stays off the paint path."""
+        now = time.perf_counter()
+        if now - self._overlay_built_at < getattr(C, 'PROFILER_OVERLAY_REFRESH_SEC', 0.25):
+            return self._overlay_lines_cache
+        self._overlay_built_at = now
+        lines = [f"{'phase':<22}{'p50':>7}{'p95':>7}{'max':>7}  (ms)"]
+        for key, p50, p95, max_ms in self.get_summary():
+            lines.append(f"{key:<22}{p50:>7.2f}{p95:>7.2f}{max_ms:>7.2f}")
+        if self.counts:
+            lines.append("  ".join(f"{name}={value}" for name, value in self.counts.items()))
+        self._overlay_lines_cache = lines
+        return lines
+
+    def dump_csv(self, file_path: Optional[str] = None) -> Optional[str]:
+        """Writes all retained frame rows to CSV. Returns the path written, or None if there was nothing to write."""
+        if not self.csv_rows: return None
+        if file_path is None:
+            csv_dir = getattr(C, 'PROFILER_CSV_DIR', os.path.join(getattr(C, 'PROJECT_ROOT', os.getcwd()), "profiler_logs"))
+            file_path = os.path.join(csv_dir, f"tick_profile_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+        phase_columns: List[str] = []
+        count_columns: List[str] = []
+        for _kind, _index, _t, phases, counts in self.csv_rows:
+            for name in phases:
+                if name not in phase_columns: phase_columns.append(name)
+            for name in counts:
+                if name not in count_columns: count_columns.append(name)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+            with open(file_path, "w", newline="", encoding="utf-8") as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(["kind", "frame", "time_sec"] + [f"{name}_ms" for name in phase_columns] + count_columns)
+                for kind, index, t, phases, counts in self.csv_rows:
+                    writer.writerow([kind, index, f"{t:.4f}"] +
+                                    [f"{phases[name]:.4f}" if name in phases else "" for name in phase_columns] +
+                                    [counts.get(name, "") for name in count_columns])
+        except OSError as e_csv:
+            error(f"TickProfiler: Could not write CSV '{file_path}': {e_csv}")
+            return None
+        info(f"TickProfiler: Wrote {len(self.csv_rows)} frame rows to '{file_path}'.")
+        return file_path
+
+    def reset(self):
+        self.phase_stats.clear(); self.counts.clear(); self.csv_rows.clear(); self.frame_indices.clear()
+        self._frame_kind = None
+        self._session_start = time.perf_counter()
+        self._overlay_lines_cache = []; self._overlay_built_at = 0.0
+
+
+_tick_profiler: Optional[TickProfiler] = None
+
+def get_tick_profiler() -> TickProfiler:
+    """Process-wide profiler shared by the game loop, the couch logic and the scene widget."""
+    global _tick_profiler
+    if _tick_profiler is None:
+        _tick_profiler = TickProfiler()
+    return _tick_profiler
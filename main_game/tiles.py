@@ -5,8 +5,9 @@ Defines classes for static and interactive tiles in the game world.
 Refactored for PySide6 with deferred QPixmap creation.
 Lava class now uses animated GIF. BackgroundTile added.
 MODIFIED: `BackgroundTile` now correctly uses `resource_path` for its image path.
+MODIFIED: Tiles expose get_render_sprite() for GameSceneWidget's world-space sprite path.
 """
-# version 2.1.6 (BackgroundTile image path correction)
+# version 2.1.7 (get_render_sprite)
 
 import sys # For logger fallback
 from typing import Optional, Any, Tuple, Dict, List 
@@ -83,6 +84,12 @@ class Platform:
                 self._image = QPixmap(1,1); self._image.fill(Qt.GlobalColor.magenta)
         return self._image
 
+    def get_render_sprite(self) -> Optional[Tuple[QPixmap, float]]:
+        """(pixmap, opacity) drawn at rect.topLeft() in world space; None falls back to draw_pyside."""
+        if not self.rect.isValid(): return None
+        img_to_draw = self.image
+        return (img_to_draw, 1.0) if img_to_draw and not img_to_draw.isNull() else None
+
     def draw_pyside(self, painter: QPainter, camera: Any): 
         if not self.rect.isValid(): return
         
@@ -158,6 +165,12 @@ class Ladder:
                 self._image = QPixmap(1,1); self._image.fill(Qt.GlobalColor.magenta)
         return self._image
 
+    def get_render_sprite(self) -> Optional[Tuple[QPixmap, float]]:
+        """(pixmap, opacity) drawn at rect.topLeft() in world space; None falls back to draw_pyside."""
+        if not self.rect.isValid(): return None
+        img_to_draw = self.image
+        return (img_to_draw, 1.0) if img_to_draw and not img_to_draw.isNull() else None
+
     def draw_pyside(self, painter: QPainter, camera: Any):
         if not self.rect.isValid(): return
         img_to_draw = self.image
@@ -197,7 +210,7 @@ class Lava:
             # LAVA_SPRITE_PATH from constants.py is already relative to project root (e.g., "assets/environment/lava.gif")
             lava_gif_path_relative_to_project = getattr(C, 'LAVA_SPRITE_PATH', "assets/environment/lava.gif") 
             full_path = resource_path(lava_gif_path_relative_to_project) # resource_path prepends the absolute base path
-            loaded_raw_frames = load_gif_frames(full_path)
+            loaded_raw_frames = load_gif_frames(full_path, owner=self)
             if not loaded_raw_frames or (loaded_raw_frames and loaded_raw_frames[0].isNull()):
                 logger.warning(f"{self.log_prefix}: Failed to load GIF from '{full_path}'. Will use color fill fallback.")
             else:
@@ -259,6 +272,12 @@ class Lava:
         return current_scaled_frames[self._current_frame_index]
 
 
+    def get_render_sprite(self) -> Optional[Tuple[QPixmap, float]]:
+        """(pixmap, opacity) drawn at rect.topLeft() in world space; None falls back to draw_pyside."""
+        if not self.rect.isValid(): return None
+        img_to_draw = self.image
+        return (img_to_draw, 1.0) if img_to_draw and not img_to_draw.isNull() else None
+
     def draw_pyside(self, painter: QPainter, camera: Any):
         if not self.rect.isValid(): return
         img_to_draw = self.image
@@ -351,6 +370,12 @@ class BackgroundTile:
         return self._scaled_image_cache
 
 
+    def get_render_sprite(self) -> Optional[Tuple[QPixmap, float]]:
+        """(pixmap, opacity) drawn at rect.topLeft() in world space; None falls back to draw_pyside."""
+        if not self.rect.isValid(): return None
+        img_to_draw = self.image
+        return (img_to_draw, 1.0) if img_to_draw and not img_to_draw.isNull() else None
+
     def draw_pyside(self, painter: QPainter, camera: Any):
         if not self.rect.isValid(): return
         
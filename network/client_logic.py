@@ -5,15 +5,48 @@ Handles client-side game logic, connection to server, and LAN discovery for PySi
 UI updates are handled by emitting signals to the main application.
 Map paths now use map_name_folder/map_name_file.py structure.
 MODIFIED: Deferred import of initialize_game_elements in run_client_mode.
+MODIFIED: Server state arrives as binary delta snapshots decoded by network_comms.SnapshotDecoder;
+          the newest decoded snapshot is acknowledged to the server with "snapshot_ack".
+MODIFIED: Opens the server's sequenced UDP game channel ("udp_channel" command) for per-frame snapshots
+          and input; pause/reset input and anything sent before the channel is confirmed stays on TCP.
+MODIFIED: Decoded snapshots go into a SnapshotInterpolationBuffer; each frame applies the state sampled
+          CLIENT_INTERPOLATION_DELAY_MS in the past (interpolated, or briefly extrapolated when late).
+MODIFIED: P2 is predicted locally from sequenced input commands (ClientPlayerPredictor) and reconciled
+          against the server's 'last_input_seq'; the loop runs at a fixed FPS step.
+MODIFIED: The server assigns the player slot ("assign_player", 2-4) instead of the client assuming P2;
+          a "server_full" reply ends the join. Every other player in the snapshot is shown as remote.
+MODIFIED: The TCP connection and UDP channel are served by one event-driven network loop
+          (network.event_loop) that queues decoded messages for the game thread and sends UDP hellos
+          on a timer; map sync waits on ClientState.network_activity instead of recv timeouts and sleeps.
+MODIFIED: Maps download as a compressed map bundle (network.map_bundle) of the whole map folder, in
+          binary chunks written to a .part file and acknowledged by offset. A local folder whose content
+          hash matches the server's skips the download, an interrupted download resumes from the .part
+          file on the next join, and the bundle is checksummed before it replaces the map folder.
+MODIFIED: Downloaded map versions go into a content-addressed MapCache (network.map_cache) and are
+          installed from there. The client sends its cache manifest ("map_manifest") on connect; set_map's
+          content hash is compared with the installed folder's recorded hash (a stat fingerprint, not a
+          re-read), a stale folder is replaced, and a version seen before is installed without a download.
+MODIFIED: Input messages carry the camera's world rect ("view") so the server only sends the enemies,
+          statues and projectiles near it (network.interest_management); ones that leave it are despawned.
+MODIFIED: Network statistics (network.net_stats): ping/pong round trips give RTT and jitter, the server's
+          pongs carry its average tick time, and bytes/messages per second per direction plus snapshots
+          applied/skipped/extrapolated go to game_elements["network_client_stats"] for the F3 overlay
+          and to the log every NET_STATS_LOG_INTERVAL_S.
+MODIFIED: content_hash and bundle_hash from the server are validated (is_valid_content_hash) before they
+          reach the map cache or a .part file path; a malformed set_map hash is a map error.
 """
-# version 2.1.2 (Deferred import initialize_game_elements in run_client_mode)
+# version 2.11.1 (Validate server map hashes)
 
+import json
+import selectors
 import socket
+import threading
 import time
 import traceback
 import os
 import importlib
-from typing import Optional, Dict, Any, Tuple
+from collections import deque
+from typing import Optional, Dict, Any, Tuple, List, Deque
 
 try:
     from main_game.logger import info, debug, warning, error, critical
@@ -26,7 +59,15 @@ except ImportError:
     def critical(msg, *args, **kwargs): print(f"CRITICAL: {msg}")
 
 import main_game.constants as C
-from network.network_comms import get_local_ip, encode_data, decode_data_stream
+from network.network_comms import (get_local_ip, encode_data, decode_data_stream, SnapshotDecoder, SNAPSHOT_PROTOCOL_VERSION,
+                                   encode_udp_datagram, decode_udp_datagram, SequenceFilter,
+                                   UDP_KIND_HELLO, UDP_KIND_SNAPSHOT, UDP_KIND_INPUT)
+from network.event_loop import NetworkEventLoop, StreamConnection
+from network.map_bundle import decode_map_chunk, is_safe_map_name, is_valid_content_hash, partial_bundle_path
+from network.map_cache import MapCache
+from network.net_stats import ConnectionStats, format_client_overlay_lines
+from network.snapshot_interpolation import SnapshotInterpolationBuffer
+from network.client_prediction import ClientPlayerPredictor
 from main_game.game_state_manager import set_network_game_state
 # REMOVE THIS LINE: from game_setup import initialize_game_elements # This was the problematic top-level import
 import main_game.config as game_config
@@ -35,7 +76,12 @@ import main_game.config as game_config
 class ClientState:
     def __init__(self):
         self.client_tcp_socket: Optional[socket.socket] = None
-        self.server_state_buffer: bytes = b""
+        self.network_loop: Optional[NetworkEventLoop] = None # Reads/writes the server connection and UDP channel
+        self.server_stream: Optional[StreamConnection] = None
+        self.server_messages: Deque[Any] = deque() # Decoded server messages (dict) and snapshot payloads (bytes), arrival order
+        self.server_messages_lock = threading.Lock()
+        self.network_activity = threading.Event() # Set by the network loop when a message arrives or the server disconnects
+        self.server_disconnected: bool = False
         self.last_received_server_state: Optional[Dict[str, Any]] = None
         self.app_running = True
         self.service_name = getattr(C, "SERVICE_NAME", "platformer_adventure_lan_v1")
@@ -47,7 +93,200 @@ class ClientState:
         self.map_download_progress: float = 0.0
         self.map_total_size_bytes: int = 0
         self.map_received_bytes: int = 0
-        self.map_file_buffer: bytes = b""
+        self.map_acked_bytes: int = 0 # Last offset acknowledged to the server ("map_bundle_ack")
+        self.map_bundle_hash: Optional[str] = None
+        self.map_content_hash: Optional[str] = None # Map version the server is hosting (set_map / map_bundle_info)
+        self.map_cache: Optional[MapCache] = None # Created once the maps folder is known
+        self.map_partial_path: Optional[str] = None # maps/.downloads/<name>-<hash>.part; kept if the download is interrupted
+        self.map_partial_file: Optional[Any] = None
+        self.map_download_attempts: int = 0
+        self.map_status_ui_dirty: bool = False # Refresh the sync dialog now (status itself must stay "present" etc.)
+        self.player_id: int = 2 # Slot the server assigned us ("assign_player"); 2 for servers that don't send it
+        self.snapshot_decoder: SnapshotDecoder = SnapshotDecoder()
+        self.last_sent_snapshot_ack: int = 0
+        self.interpolation_buffer: SnapshotInterpolationBuffer = SnapshotInterpolationBuffer()
+        self.player_predictor: ClientPlayerPredictor = ClientPlayerPredictor()
+        self.udp_socket: Optional[socket.socket] = None
+        self.udp_token: int = 0
+        self.udp_send_seq: int = 0
+        self.udp_snapshot_filter: SequenceFilter = SequenceFilter()
+        self.udp_channel_confirmed: bool = False # True once a snapshot datagram from the server arrived
+        self.net_stats: ConnectionStats = ConnectionStats()
+        self.udp_bytes_sent: int = 0
+        self.udp_datagrams_sent: int = 0
+        self.udp_bytes_received: int = 0
+        self.udp_datagrams_received: int = 0
+
+# Commands with these presses must not be lost, so they go over TCP even when the UDP channel is up
+_RELIABLE_INPUT_ACTIONS = ("pause", "reset")
+
+
+def _queue_server_message(client_state_obj: ClientState, message: Any):
+    """Network loop: hands a decoded message or snapshot payload to the game thread."""
+    with client_state_obj.server_messages_lock: client_state_obj.server_messages.append(message)
+    client_state_obj.network_activity.set()
+
+
+def _pop_server_message(client_state_obj: ClientState) -> Optional[Any]:
+    with client_state_obj.server_messages_lock:
+        return client_state_obj.server_messages.popleft() if client_state_obj.server_messages else None
+
+
+def _on_server_stream_message(client_state_obj: ClientState, message: Any):
+    """Network loop: pings and pongs are handled here so the RTT doesn't include the game thread's frame."""
+    if isinstance(message, dict):
+        command = message.get("command")
+        if command == "pong": client_state_obj.net_stats.on_pong(message); return
+        if command == "ping": _send_to_server(client_state_obj, {"command": "pong", "t": message.get("t")}); return
+    _queue_server_message(client_state_obj, message)
+
+
+def _send_ping(client_state_obj: ClientState, server_stream: StreamConnection) -> bool:
+    """Network loop timer. Stops with the connection it was started for."""
+    if client_state_obj.server_stream is not server_stream or client_state_obj.server_disconnected: return False
+    _send_to_server(client_state_obj, client_state_obj.net_stats.make_ping())
+    return True
+
+
+def _on_server_stream_closed(client_state_obj: ClientState):
+    client_state_obj.server_disconnected = True
+    client_state_obj.network_activity.set()
+
+
+def _send_to_server(client_state_obj: ClientState, message: Dict[str, Any]) -> bool:
+    """Queues a JSON message on the TCP connection. False once the connection is gone."""
+    encoded_message = encode_data(message)
+    if not encoded_message or not client_state_obj.server_stream: return False
+    return client_state_obj.server_stream.send(encoded_message)
+
+
+def _start_client_network(client_state_obj: ClientState):
+    network_loop = NetworkEventLoop("client")
+    client_state_obj.network_loop = network_loop
+    with client_state_obj.server_messages_lock: client_state_obj.server_messages.clear()
+    client_state_obj.network_activity.clear()
+    client_state_obj.server_disconnected = False
+    client_state_obj.server_stream = StreamConnection(network_loop, client_state_obj.client_tcp_socket,
+                                                      on_message=lambda _stream, msg: _on_server_stream_message(client_state_obj, msg),
+                                                      on_close=lambda _stream: _on_server_stream_closed(client_state_obj),
+                                                      recv_size=client_state_obj.buffer_size * 2)
+    client_state_obj.server_stream.start()
+    client_state_obj.net_stats = ConnectionStats()
+    network_loop.call_every(client_state_obj.net_stats.ping_interval_s, _send_ping, client_state_obj, client_state_obj.server_stream, run_now=False)
+    network_loop.start()
+
+
+def _stop_client_network(client_state_obj: ClientState):
+    """Closes the server connection and UDP channel and stops the network loop."""
+    _close_client_udp_channel(client_state_obj)
+    if client_state_obj.server_stream:
+        info("Client: Closing TCP connection to server.")
+        client_state_obj.server_stream.close()
+    if client_state_obj.network_loop:
+        client_state_obj.network_loop.stop()
+        client_state_obj.network_loop = None
+    client_state_obj.server_stream = None
+    if client_state_obj.client_tcp_socket:
+        try: client_state_obj.client_tcp_socket.close()
+        except: pass
+        client_state_obj.client_tcp_socket = None
+
+
+def _open_client_udp_channel(client_state_obj: ClientState, server_udp_port: int, token: int):
+    _close_client_udp_channel(client_state_obj)
+    if not getattr(C, "UDP_GAME_CHANNEL_ENABLED", True) or not client_state_obj.client_tcp_socket or not client_state_obj.network_loop: return
+    try:
+        server_ip = client_state_obj.client_tcp_socket.getpeername()[0]
+        udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        udp_socket.connect((server_ip, int(server_udp_port))) # Connected: only the server's datagrams are received
+        udp_socket.setblocking(False)
+    except (socket.error, TypeError, ValueError) as e_udp:
+        warning(f"Client: Could not open UDP game channel: {e_udp}. Using TCP only."); return
+    client_state_obj.udp_socket = udp_socket
+    client_state_obj.udp_token = int(token)
+    client_state_obj.udp_send_seq = 0
+    client_state_obj.udp_snapshot_filter = SequenceFilter()
+    client_state_obj.udp_channel_confirmed = False
+    client_state_obj.network_loop.call_soon_threadsafe(_watch_client_udp_channel, client_state_obj, udp_socket)
+    info(f"Client: UDP game channel to {server_ip}:{server_udp_port} opened.")
+
+
+def _watch_client_udp_channel(client_state_obj: ClientState, udp_socket: socket.socket):
+    """Network loop: reads snapshot datagrams and sends hellos until the server's first datagram arrives."""
+    if client_state_obj.udp_socket is not udp_socket or not client_state_obj.network_loop: return # Closed meanwhile
+    client_state_obj.network_loop.register(udp_socket, selectors.EVENT_READ, lambda mask: _on_client_udp_readable(client_state_obj, udp_socket))
+    client_state_obj.network_loop.call_every(float(getattr(C, "UDP_HELLO_INTERVAL_S", 0.25)), _send_udp_hello, client_state_obj, udp_socket)
+
+
+def _send_udp_hello(client_state_obj: ClientState, udp_socket: socket.socket) -> bool:
+    """Network loop timer: lets the server learn our UDP address. Stops once the channel is confirmed."""
+    if client_state_obj.udp_socket is not udp_socket or client_state_obj.udp_channel_confirmed: return False
+    _send_udp_datagram(client_state_obj, UDP_KIND_HELLO)
+    return True
+
+
+def _close_client_udp_channel(client_state_obj: ClientState):
+    udp_socket = client_state_obj.udp_socket
+    client_state_obj.udp_socket = None
+    client_state_obj.udp_channel_confirmed = False
+    if not udp_socket: return
+    network_loop = client_state_obj.network_loop
+    if network_loop and network_loop.is_running(): network_loop.call_soon_threadsafe(_unwatch_and_close_socket, network_loop, udp_socket)
+    else: _unwatch_and_close_socket(network_loop, udp_socket)
+
+
+def _unwatch_and_close_socket(network_loop: Optional[NetworkEventLoop], sock: socket.socket):
+    if network_loop: network_loop.unregister(sock)
+    try: sock.close()
+    except: pass
+
+
+def _send_udp_datagram(client_state_obj: ClientState, kind: int, payload: bytes = b"") -> bool:
+    if not client_state_obj.udp_socket: return False
+    client_state_obj.udp_send_seq += 1
+    try:
+        sent_bytes = client_state_obj.udp_socket.send(encode_udp_datagram(kind, client_state_obj.udp_token, client_state_obj.udp_send_seq, payload))
+        client_state_obj.udp_bytes_sent += sent_bytes; client_state_obj.udp_datagrams_sent += 1
+        return True
+    except (BlockingIOError, InterruptedError): return True # Dropped like any lost datagram
+    except socket.error as e_udp_send:
+        debug(f"Client: UDP send failed: {e_udp_send}"); return False
+
+
+def _on_client_udp_readable(client_state_obj: ClientState, udp_socket: socket.socket):
+    """Network loop: queues snapshot payloads from pending datagrams; stale/duplicate datagrams are dropped."""
+    while client_state_obj.udp_socket is udp_socket:
+        try: datagram = udp_socket.recv(65535)
+        except (BlockingIOError, InterruptedError): break
+        except socket.error as e_udp_recv: # e.g. ICMP port unreachable before the server bound its socket
+            debug(f"Client: UDP recv error: {e_udp_recv}"); break
+        decoded_datagram = decode_udp_datagram(datagram)
+        if decoded_datagram is None: continue
+        kind, token, seq, payload = decoded_datagram
+        if token != client_state_obj.udp_token or kind != UDP_KIND_SNAPSHOT: continue
+        client_state_obj.udp_bytes_received += len(datagram); client_state_obj.udp_datagrams_received += 1
+        if not client_state_obj.udp_snapshot_filter.accept(seq): continue
+        if not client_state_obj.udp_channel_confirmed:
+            client_state_obj.udp_channel_confirmed = True
+            info("Client: UDP game channel confirmed; per-frame input now goes over UDP.")
+        _queue_server_message(client_state_obj, payload)
+
+
+def _refresh_client_network_stats(client_state_obj: ClientState) -> Dict[str, Any]:
+    """Copies the decoder, UDP filter and interpolation counters into net_stats and samples the transfer rates."""
+    net_stats = client_state_obj.net_stats
+    snapshot_decoder, udp_filter = client_state_obj.snapshot_decoder, client_state_obj.udp_snapshot_filter
+    interp_stats = client_state_obj.interpolation_buffer.get_stats()
+    net_stats.snapshots_applied = snapshot_decoder.snapshots_decoded
+    net_stats.snapshots_skipped = snapshot_decoder.snapshots_rejected + udp_filter.dropped_stale + interp_stats['snapshots_dropped_late']
+    net_stats.frames_extrapolated = interp_stats['frames_extrapolated'] + interp_stats['frames_held']
+    net_stats.udp_datagrams_lost = udp_filter.missing
+    server_stream = client_state_obj.server_stream
+    net_stats.update_rates(client_state_obj.udp_bytes_sent + (server_stream.bytes_sent if server_stream else 0),
+                           client_state_obj.udp_bytes_received + (server_stream.bytes_received if server_stream else 0),
+                           client_state_obj.udp_datagrams_sent + (server_stream.messages_sent if server_stream else 0),
+                           client_state_obj.udp_datagrams_received + (server_stream.messages_received if server_stream else 0))
+    return net_stats.summary()
 
 
 def find_server_on_lan(client_state_obj: ClientState,
@@ -62,7 +301,7 @@ def find_server_on_lan(client_state_obj: ClientState,
         listen_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         listen_socket.bind(('', client_state_obj.discovery_port_udp))
-        listen_socket.settimeout(0.5)
+        listen_socket.setblocking(False)
         debug(f"Client (find_server_on_lan): UDP listen socket bound to port {client_state_obj.discovery_port_udp}.")
     except socket.error as e_socket:
         error_msg = f"Failed to bind UDP listen socket on port {client_state_obj.discovery_port_udp}: {e_socket}"
@@ -72,14 +311,20 @@ def find_server_on_lan(client_state_obj: ClientState,
     start_search_time = time.monotonic()
     client_local_ip = get_local_ip()
     debug(f"Client (find_server_on_lan): Searching (Service: '{client_state_obj.service_name}'). My IP: {client_local_ip}. Timeout: {client_state_obj.client_search_timeout_s}s.")
+    discovery_selector = selectors.DefaultSelector()
+    discovery_selector.register(listen_socket, selectors.EVENT_READ)
     while (time.monotonic() - start_search_time) < client_state_obj.client_search_timeout_s:
         if not client_state_obj.app_running:
             debug("Client (find_server_on_lan): LAN server search aborted (app_running is False).")
             if ui_update_callback: ui_update_callback("cancelled", "Search cancelled by application.")
             break
         try:
-            if listen_socket:
-                raw_udp_data, sender_address = listen_socket.recvfrom(client_state_obj.buffer_size)
+            # Returns as soon as a broadcast arrives; the cap only bounds how long a cancel goes unnoticed
+            remaining_search_s = client_state_obj.client_search_timeout_s - (time.monotonic() - start_search_time)
+            if not discovery_selector.select(max(0.0, min(remaining_search_s, 0.25))): continue
+            while True:
+                try: raw_udp_data, sender_address = listen_socket.recvfrom(client_state_obj.buffer_size)
+                except (BlockingIOError, InterruptedError): break
                 decoded_messages_list, _ = decode_data_stream(raw_udp_data)
                 if not decoded_messages_list: continue
                 decoded_udp_message = decoded_messages_list[0]
@@ -94,11 +339,12 @@ def find_server_on_lan(client_state_obj: ClientState,
                     found_server_ip, found_server_port = server_ip, server_port
                     if ui_update_callback: ui_update_callback("found", (server_ip, server_port, server_map_name))
                     break
-        except socket.timeout: continue
+            if found_server_ip: break
         except Exception as e_udp:
             error_msg = f"Client: Error processing UDP broadcast: {e_udp}"
             error(error_msg, exc_info=True)
             if ui_update_callback: ui_update_callback("error", error_msg)
+    discovery_selector.close()
     if listen_socket: listen_socket.close()
     if not found_server_ip and client_state_obj.app_running:
         info(f"Client (find_server_on_lan): No server for '{client_state_obj.service_name}' after timeout.")
@@ -106,6 +352,56 @@ def find_server_on_lan(client_state_obj: ClientState,
     return (found_server_ip, found_server_port) if found_server_ip and found_server_port else None
 
 
+def _request_map_bundle(client_state_obj: ClientState, maps_base_dir_abs: str, bundle_hash: Optional[str], bundle_size: int):
+    """Asks for the map bundle, resuming from a .part file left by an earlier attempt at the same bundle."""
+    resume_offset = 0
+    previous_partial_path = partial_bundle_path(maps_base_dir_abs, client_state_obj.server_selected_map_name, bundle_hash) if bundle_hash else None
+    if previous_partial_path and os.path.exists(previous_partial_path):
+        resume_offset = os.path.getsize(previous_partial_path)
+        if bundle_size and resume_offset > bundle_size: resume_offset = 0 # Not this bundle after all; rewritten from the start
+        elif resume_offset: info(f"Client: Resuming map download at {resume_offset}/{bundle_size} bytes.")
+    client_state_obj.map_download_attempts += 1
+    client_state_obj.map_download_status = "downloading"
+    client_state_obj.map_received_bytes = client_state_obj.map_acked_bytes = resume_offset
+    client_state_obj.map_total_size_bytes = bundle_size
+    client_state_obj.map_download_progress = resume_offset * 100.0 / bundle_size if bundle_size else 0.0
+    _send_to_server(client_state_obj, {"command": "request_map_bundle", "name": client_state_obj.server_selected_map_name, "offset": resume_offset})
+
+
+def _open_map_partial_file(client_state_obj: ClientState, maps_base_dir_abs: str, bundle_hash: str, offset: int) -> bool:
+    """Opens the .part file for the bundle the server is about to send, positioned at `offset`."""
+    _close_map_partial_file(client_state_obj)
+    partial_path = partial_bundle_path(maps_base_dir_abs, client_state_obj.server_selected_map_name, bundle_hash)
+    if not partial_path:
+        error(f"Client Error: Server sent an invalid bundle hash {str(bundle_hash)[:16]!r} for the map download."); return False
+    try:
+        os.makedirs(os.path.dirname(partial_path), exist_ok=True)
+        if offset > 0 and os.path.exists(partial_path) and os.path.getsize(partial_path) >= offset:
+            partial_file = open(partial_path, "r+b"); partial_file.truncate(offset); partial_file.seek(offset)
+        elif offset > 0: return False # Server resumed somewhere we have no data for
+        else: partial_file = open(partial_path, "wb")
+    except OSError as e_open:
+        error(f"Client Error: Could not open '{partial_path}' for the map download: {e_open}"); return False
+    client_state_obj.map_bundle_hash, client_state_obj.map_partial_path, client_state_obj.map_partial_file = bundle_hash, partial_path, partial_file
+    return True
+
+
+def _close_map_partial_file(client_state_obj: ClientState):
+    if client_state_obj.map_partial_file:
+        try: client_state_obj.map_partial_file.close()
+        except OSError: pass
+        client_state_obj.map_partial_file = None
+
+
+def _acknowledge_map_chunks(client_state_obj: ClientState):
+    """Flushes what was written and tells the server, which keeps at most MAP_TRANSFER_WINDOW_BYTES beyond it in flight."""
+    if client_state_obj.map_partial_file is None or client_state_obj.map_received_bytes <= client_state_obj.map_acked_bytes: return
+    try: client_state_obj.map_partial_file.flush()
+    except OSError as e_flush: error(f"Client Error: Could not write the map download: {e_flush}"); return
+    client_state_obj.map_acked_bytes = client_state_obj.map_received_bytes
+    _send_to_server(client_state_obj, {"command": "map_bundle_ack", "offset": client_state_obj.map_acked_bytes})
+
+
 def run_client_mode(client_state_obj: ClientState,
                     game_elements_ref: Dict[str, Any],
                     ui_status_update_callback: Optional[callable] = None,
@@ -155,7 +451,7 @@ def run_client_mode(client_state_obj: ClientState,
         if ui_status_update_callback: ui_status_update_callback("Connecting...", f"{server_ip_to_connect}:{server_port_to_connect}", 0)
         client_state_obj.client_tcp_socket.settimeout(10.0)
         client_state_obj.client_tcp_socket.connect((server_ip_to_connect, server_port_to_connect))
-        client_state_obj.client_tcp_socket.settimeout(0.05)
+        client_state_obj.client_tcp_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) # Input and acks are small and latency-bound
         info("Client: TCP Connection to server successful!")
         connection_succeeded = True
     except socket.timeout: connection_error_msg = "Connection Timed Out"
@@ -169,7 +465,8 @@ def run_client_mode(client_state_obj: ClientState,
         client_state_obj.client_tcp_socket = None
         return
 
-    client_state_obj.map_download_status = "waiting_map_info"; client_state_obj.server_state_buffer = b""
+    client_state_obj.map_download_status = "waiting_map_info"
+    _start_client_network(client_state_obj)
     map_sync_phase_active = True
     last_ui_update_time = 0
 
@@ -178,11 +475,13 @@ def run_client_mode(client_state_obj: ClientState,
         project_root_from_constants = getattr(C, 'PROJECT_ROOT', os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         maps_base_dir_abs = os.path.join(project_root_from_constants, maps_base_dir_abs)
     debug(f"ClientLogic: Using maps base directory: {maps_base_dir_abs}")
+    client_state_obj.map_cache = MapCache(maps_base_dir_abs, int(getattr(C, "MAP_CACHE_MAX_ENTRIES", 16)))
+    _send_to_server(client_state_obj, {"command": "map_manifest", **client_state_obj.map_cache.get_manifest()})
 
     while map_sync_phase_active and client_state_obj.app_running:
         if process_qt_events_callback: process_qt_events_callback()
         if not client_state_obj.app_running: break
-        if ui_status_update_callback and (time.monotonic() - last_ui_update_time > 0.1 or client_state_obj.map_download_status == "changed_internally"):
+        if ui_status_update_callback and (time.monotonic() - last_ui_update_time > 0.1 or client_state_obj.map_status_ui_dirty):
             dialog_title_map = "Synchronizing Map"; dialog_msg_map = "Waiting for map info..."; dialog_prog_map = 0.0
             if client_state_obj.map_download_status == "checking": dialog_msg_map = f"Checking: {client_state_obj.server_selected_map_name or 'Unknown Map'}..."
             elif client_state_obj.map_download_status == "missing": dialog_msg_map = f"Map '{client_state_obj.server_selected_map_name}' missing. Requesting..."
@@ -196,72 +495,126 @@ def run_client_mode(client_state_obj: ClientState,
                 dialog_title_map = "Map Error"; dialog_msg_map = f"Failed map sync: {client_state_obj.server_selected_map_name or 'Unknown'}"; dialog_prog_map = -1.0
             ui_status_update_callback(dialog_title_map, dialog_msg_map, dialog_prog_map)
             last_ui_update_time = time.monotonic()
-            if client_state_obj.map_download_status == "changed_internally": client_state_obj.map_download_status = "processing"
+            client_state_obj.map_status_ui_dirty = False
+        client_state_obj.network_activity.clear()
         try:
-            assert client_state_obj.client_tcp_socket is not None
-            server_data_chunk = client_state_obj.client_tcp_socket.recv(client_state_obj.buffer_size)
-            if not server_data_chunk: info("Client: Server disconnected during map sync."); map_sync_phase_active = False; break
-            client_state_obj.server_state_buffer += server_data_chunk
-            decoded_messages, client_state_obj.server_state_buffer = decode_data_stream(client_state_obj.server_state_buffer)
-            for msg in decoded_messages:
+            while map_sync_phase_active: # Messages after start_game_now stay queued for the game loop
+                msg = _pop_server_message(client_state_obj)
+                if msg is None: break
+                if not isinstance(msg, dict):
+                    map_chunk = decode_map_chunk(msg) if client_state_obj.map_partial_file else None
+                    if map_chunk is None: continue # Snapshot frames sent right after start_game_now; not acked, so safe to drop
+                    chunk_offset, chunk_bytes = map_chunk
+                    if chunk_offset != client_state_obj.map_received_bytes: continue # From a request we've since replaced
+                    try: client_state_obj.map_partial_file.write(chunk_bytes)
+                    except OSError as e_write:
+                        error(f"Client Error: Could not write the map download: {e_write}")
+                        _close_map_partial_file(client_state_obj); client_state_obj.map_download_status = "error"; client_state_obj.map_status_ui_dirty = True
+                        continue
+                    client_state_obj.map_received_bytes += len(chunk_bytes)
+                    if client_state_obj.map_total_size_bytes > 0: client_state_obj.map_download_progress = (client_state_obj.map_received_bytes/client_state_obj.map_total_size_bytes)*100.0
+                    client_state_obj.map_status_ui_dirty = True
+                    continue
                 cmd = msg.get("command")
-                if cmd == "set_map":
+                if cmd == "assign_player":
+                    assigned_player_id = msg.get("player_id")
+                    if isinstance(assigned_player_id, int) and 2 <= assigned_player_id <= 4:
+                        client_state_obj.player_id = assigned_player_id
+                        info(f"Client: Server assigned us player {assigned_player_id}.")
+                    else: warning(f"Client: Ignoring invalid player assignment: {assigned_player_id}")
+                elif cmd == "server_full":
+                    error("Client: Server is full (all remote player slots taken).")
+                    client_state_obj.map_download_status = "server_full"; map_sync_phase_active = False
+                    client_state_obj.map_status_ui_dirty = True
+                elif cmd == "set_map":
                     client_state_obj.server_selected_map_name = msg.get("name")
                     info(f"Client: Server map: {client_state_obj.server_selected_map_name}")
+                    if msg.get("snapshot_protocol") != SNAPSHOT_PROTOCOL_VERSION:
+                        warning(f"Client: Server snapshot protocol {msg.get('snapshot_protocol')} differs from ours ({SNAPSHOT_PROTOCOL_VERSION}). Game state may not sync.")
                     client_state_obj.map_download_status = "checking"
-                    if client_state_obj.server_selected_map_name:
+                    if msg.get("content_hash") is not None and not is_valid_content_hash(msg.get("content_hash")):
+                        error(f"Client Error: Invalid content hash {str(msg.get('content_hash'))[:16]!r} in set_map command.")
+                        client_state_obj.map_download_status = "error"
+                    elif is_safe_map_name(client_state_obj.server_selected_map_name):
                         map_folder_path = os.path.join(maps_base_dir_abs, client_state_obj.server_selected_map_name)
                         map_py_file_path = os.path.join(map_folder_path, f"{client_state_obj.server_selected_map_name}.py")
-                        if os.path.exists(map_py_file_path):
+                        server_content_hash = client_state_obj.map_content_hash = msg.get("content_hash")
+                        map_cache = client_state_obj.map_cache
+                        if server_content_hash:
+                            installed_content_hash = map_cache.installed_hash(client_state_obj.server_selected_map_name)
+                            map_is_current = installed_content_hash == server_content_hash
+                            if not map_is_current and map_cache.has(server_content_hash): # Seen this version before
+                                map_is_current = map_cache.install(server_content_hash, client_state_obj.server_selected_map_name)
+                                if map_is_current: info(f"Client: Installed '{client_state_obj.server_selected_map_name}' from the map cache."); importlib.invalidate_caches()
+                            elif installed_content_hash and not map_is_current:
+                                info(f"Client: Local copy of '{client_state_obj.server_selected_map_name}' is stale (differs from the server's). Downloading it.")
+                        else: map_is_current = os.path.exists(map_py_file_path) # Server without bundles: same name is all we can check
+                        if map_is_current:
                             client_state_obj.map_download_status = "present"
-                            client_state_obj.client_tcp_socket.sendall(encode_data({"command":"report_map_status", "name":client_state_obj.server_selected_map_name, "status":"present"}))
+                            _send_to_server(client_state_obj, {"command":"report_map_status", "name":client_state_obj.server_selected_map_name, "status":"present"})
                         else:
                             client_state_obj.map_download_status = "missing"
-                            client_state_obj.client_tcp_socket.sendall(encode_data({"command":"report_map_status", "name":client_state_obj.server_selected_map_name, "status":"missing"}))
-                            client_state_obj.client_tcp_socket.sendall(encode_data({"command":"request_map_file", "name":client_state_obj.server_selected_map_name}))
-                            client_state_obj.map_download_status = "downloading"; client_state_obj.map_received_bytes = 0; client_state_obj.map_total_size_bytes = 0; client_state_obj.map_file_buffer = b""
+                            _send_to_server(client_state_obj, {"command":"report_map_status", "name":client_state_obj.server_selected_map_name, "status":"missing"})
+                            _request_map_bundle(client_state_obj, maps_base_dir_abs, msg.get("bundle_hash"), int(msg.get("bundle_size", 0) or 0))
                     else:
-                        error("Client Error: server_selected_map_name is None after set_map command.")
+                        error(f"Client Error: Invalid map name '{client_state_obj.server_selected_map_name}' in set_map command.")
                         client_state_obj.map_download_status = "error"
-                    client_state_obj.map_download_status = "changed_internally"
-                elif cmd == "map_file_info" and client_state_obj.map_download_status=="downloading":
-                    client_state_obj.map_total_size_bytes = msg.get("size",0)
-                    client_state_obj.map_download_status = "changed_internally"
-                elif cmd == "map_data_chunk" and client_state_obj.map_download_status=="downloading":
-                    chunk_data_bytes = msg.get("data","").encode('utf-8')
-                    client_state_obj.map_file_buffer += chunk_data_bytes
-                    client_state_obj.map_received_bytes = len(client_state_obj.map_file_buffer)
-                    if client_state_obj.map_total_size_bytes > 0: client_state_obj.map_download_progress = (client_state_obj.map_received_bytes/client_state_obj.map_total_size_bytes)*100.0
-                    client_state_obj.map_download_status = "changed_internally"
+                    client_state_obj.map_status_ui_dirty = True
+                elif cmd == "udp_channel":
+                    _open_client_udp_channel(client_state_obj, msg.get("port"), msg.get("token", 0))
+                elif cmd == "map_bundle_info" and client_state_obj.map_download_status=="downloading":
+                    bundle_offset = int(msg.get("offset", 0) or 0)
+                    client_state_obj.map_total_size_bytes = int(msg.get("size", 0) or 0)
+                    if is_valid_content_hash(msg.get("content_hash")): client_state_obj.map_content_hash = msg.get("content_hash")
+                    if _open_map_partial_file(client_state_obj, maps_base_dir_abs, str(msg.get("bundle_hash", "")), bundle_offset):
+                        client_state_obj.map_received_bytes = client_state_obj.map_acked_bytes = bundle_offset
+                        client_state_obj.map_download_progress = bundle_offset * 100.0 / client_state_obj.map_total_size_bytes if client_state_obj.map_total_size_bytes else 0.0
+                    elif bundle_offset > 0: _request_map_bundle(client_state_obj, maps_base_dir_abs, None, client_state_obj.map_total_size_bytes) # Start over
+                    else: client_state_obj.map_download_status = "error"
+                    client_state_obj.map_status_ui_dirty = True
+                elif cmd == "map_file_error":
+                    error(f"Client Error: Server could not send map '{msg.get('name')}': {msg.get('reason')}")
+                    _close_map_partial_file(client_state_obj); client_state_obj.map_download_status = "error"
+                    client_state_obj.map_status_ui_dirty = True
                 elif cmd == "map_transfer_end" and client_state_obj.map_download_status=="downloading":
-                    if client_state_obj.map_received_bytes == client_state_obj.map_total_size_bytes and client_state_obj.server_selected_map_name:
-                        map_folder_to_save_in = os.path.join(maps_base_dir_abs, client_state_obj.server_selected_map_name)
-                        map_py_file_to_save = os.path.join(map_folder_to_save_in, f"{client_state_obj.server_selected_map_name}.py")
-                        try:
-                            if not os.path.exists(map_folder_to_save_in): os.makedirs(map_folder_to_save_in); debug(f"Client: Created map folder '{map_folder_to_save_in}' for downloaded map.")
-                            map_specific_init_py = os.path.join(map_folder_to_save_in, "__init__.py")
-                            if not os.path.exists(map_specific_init_py):
-                                with open(map_specific_init_py, "w") as f_init_map: f_init_map.write(f"# Map-specific __init__.py for {client_state_obj.server_selected_map_name} (auto-created by client)\n")
-                                debug(f"Client: Created '{map_specific_init_py}' for downloaded map sub-package.")
-                            with open(map_py_file_to_save, "wb") as f: f.write(client_state_obj.map_file_buffer)
-                            info(f"Client: Map '{client_state_obj.server_selected_map_name}' saved to '{map_py_file_to_save}'.")
-                            client_state_obj.map_download_status = "present"; importlib.invalidate_caches()
-                            client_state_obj.client_tcp_socket.sendall(encode_data({"command":"report_map_status", "name":client_state_obj.server_selected_map_name, "status":"present"}))
-                        except Exception as e_save: error(f"Client Error: Failed to save map: {e_save}"); client_state_obj.map_download_status="error"
-                    else: error("Client Error: Map download mismatch or missing map name."); client_state_obj.map_download_status="error"
-                    client_state_obj.map_download_status = "changed_internally"
+                    _close_map_partial_file(client_state_obj)
+                    downloaded_bundle_path = client_state_obj.map_partial_path
+                    if (downloaded_bundle_path and client_state_obj.map_content_hash
+                            and client_state_obj.map_received_bytes == client_state_obj.map_total_size_bytes
+                            and client_state_obj.map_cache.store_bundle(downloaded_bundle_path, client_state_obj.server_selected_map_name,
+                                                                        str(msg.get("bundle_hash", client_state_obj.map_bundle_hash)), client_state_obj.map_content_hash)
+                            and client_state_obj.map_cache.install(client_state_obj.map_content_hash, client_state_obj.server_selected_map_name)):
+                        try: os.remove(downloaded_bundle_path)
+                        except OSError: pass
+                        info(f"Client: Map '{client_state_obj.server_selected_map_name}' downloaded ({client_state_obj.map_total_size_bytes} bytes) and installed.")
+                        client_state_obj.map_download_status = "present"; importlib.invalidate_caches()
+                        _send_to_server(client_state_obj, {"command":"report_map_status", "name":client_state_obj.server_selected_map_name, "status":"present"})
+                    else:
+                        if downloaded_bundle_path: # Corrupt or mismatched: never resume from it
+                            try: os.remove(downloaded_bundle_path)
+                            except OSError: pass
+                        if client_state_obj.map_download_attempts < 2:
+                            warning("Client: Map download failed verification. Downloading it again from the start.")
+                            _request_map_bundle(client_state_obj, maps_base_dir_abs, None, client_state_obj.map_total_size_bytes)
+                        else: error("Client Error: Map download failed verification again. Giving up."); client_state_obj.map_download_status="error"
+                    client_state_obj.map_status_ui_dirty = True
                 elif cmd == "start_game_now":
                     if client_state_obj.map_download_status == "present": info(f"Client: Received start_game_now. Map present. Proceeding."); map_sync_phase_active = False
                     else: info(f"Client: start_game_now received, but map status is '{client_state_obj.map_download_status}'. Waiting.")
-        except socket.timeout: pass
-        except socket.error as e_sock_map: error(f"Client: Socket error during map sync: {e_sock_map}."); map_sync_phase_active=False; break
         except Exception as e_map_sync: error(f"Client: Error during map sync: {e_map_sync}", exc_info=True); map_sync_phase_active=False; break
-        time.sleep(0.01)
+        if client_state_obj.map_download_status == "downloading": _acknowledge_map_chunks(client_state_obj)
+        if not map_sync_phase_active: break
+        if client_state_obj.server_disconnected: info("Client: Server disconnected during map sync."); break
+        # Wakes as soon as the network loop queues a message; the timeout only bounds Qt event latency
+        client_state_obj.network_activity.wait(float(getattr(C, "NETWORK_UI_WAIT_S", 0.05)))
 
+    _close_map_partial_file(client_state_obj) # An unfinished download stays on disk and resumes next time
     if not client_state_obj.app_running or client_state_obj.map_download_status != "present":
         info(f"Client: Exiting (app closed or map not ready: {client_state_obj.map_download_status}).")
-        if ui_status_update_callback: ui_status_update_callback("Error", f"Map sync failed: {client_state_obj.map_download_status}", -1)
-        if client_state_obj.client_tcp_socket: client_state_obj.client_tcp_socket.close(); client_state_obj.client_tcp_socket=None
+        if ui_status_update_callback:
+            if client_state_obj.map_download_status == "server_full": ui_status_update_callback("Server Full", "The server has no free player slot.", -1)
+            else: ui_status_update_callback("Error", f"Map sync failed: {client_state_obj.map_download_status}", -1)
+        _stop_client_network(client_state_obj)
         return
 
     info(f"Client: Map '{client_state_obj.server_selected_map_name}' present. Initializing game elements...")
@@ -281,7 +634,7 @@ def run_client_mode(client_state_obj: ClientState,
         critical_msg = f"Client CRITICAL: Failed to init game elements with map '{client_state_obj.server_selected_map_name}'."
         critical(critical_msg)
         if ui_status_update_callback: ui_status_update_callback("Error", critical_msg, -1)
-        if client_state_obj.client_tcp_socket: client_state_obj.client_tcp_socket.close(); client_state_obj.client_tcp_socket=None
+        _stop_client_network(client_state_obj)
         return
 
     camera_client = game_elements_ref.get("camera")
@@ -294,40 +647,83 @@ def run_client_mode(client_state_obj: ClientState,
             camera_client.set_level_dimensions( game_elements_ref["level_pixel_width"], game_elements_ref["level_min_x_absolute"], game_elements_ref["level_min_y_absolute"], game_elements_ref["level_max_y_absolute"] )
             game_elements_ref['camera_level_dims_set'] = True
 
-    p2_controlled_by_client = game_elements_ref.get("player2")
-    p1_remote_on_client = game_elements_ref.get("player1")
+    own_player_id = client_state_obj.player_id
+    own_player_key = f"player{own_player_id}"
+    own_player_net_key = f"p{own_player_id}"
+    own_player = game_elements_ref.get(own_player_key)
     client_game_active = True
-    client_state_obj.server_state_buffer = b""
+    # Queued server messages are kept: the first snapshots may have arrived while the level loaded
     client_state_obj.last_received_server_state = None
+    client_state_obj.snapshot_decoder = SnapshotDecoder()
+    client_state_obj.last_sent_snapshot_ack = 0
+    client_state_obj.interpolation_buffer = SnapshotInterpolationBuffer()
+    client_state_obj.player_predictor = ClientPlayerPredictor()
+    player_predictor = client_state_obj.player_predictor
+    frame_dt_sec = 1.0 / max(1, C.FPS) # Same step the server's tick uses, so predicted and server physics agree
+    network_stats_refresh_s = float(getattr(C, "NETWORK_STATS_REFRESH_S", 0.5))
+    network_stats_log_interval_s = float(getattr(C, "NET_STATS_LOG_INTERVAL_S", 10.0))
+    last_network_stats_time = 0.0
+    last_network_stats_log_time = time.monotonic()
 
     while client_game_active and client_state_obj.app_running:
+        frame_start_time = time.monotonic()
         if process_qt_events_callback: process_qt_events_callback()
         if not client_state_obj.app_running: break
-        p2_input_payload_for_server: Dict[str, Any] = {}
-        if get_input_snapshot_callback and p2_controlled_by_client:
-            p2_input_payload_for_server = get_input_snapshot_callback(p2_controlled_by_client)
-        if p2_input_payload_for_server.get("pause_event"):
-            info("Client: P2 local pause action detected. Signaling server and exiting local game loop.")
+        own_player = game_elements_ref.get(own_player_key) # set_network_game_state may have recreated it
+        own_input_payload_for_server: Dict[str, Any] = {}
+        if get_input_snapshot_callback and own_player:
+            own_input_payload_for_server = get_input_snapshot_callback(own_player)
+        if own_input_payload_for_server.get("pause_event"):
+            info(f"Client: P{own_player_id} local pause action detected. Signaling server and exiting local game loop.")
             client_game_active = False
         if not client_state_obj.app_running or not client_game_active: break
-        if client_state_obj.client_tcp_socket and p2_input_payload_for_server:
-            encoded_payload = encode_data({"input": p2_input_payload_for_server})
-            if encoded_payload:
-                try: client_state_obj.client_tcp_socket.sendall(encoded_payload)
-                except socket.error as e_send: error(f"Client: Send to server failed: {e_send}."); client_game_active=False; break
-        if client_state_obj.client_tcp_socket:
+        new_input_command: Optional[Dict[str, Any]] = None
+        if own_input_payload_for_server and getattr(own_player, '_valid_init', False):
+            new_input_command = player_predictor.predict(own_player, game_elements_ref, frame_dt_sec)
+        latest_decoded_snapshot_seq = client_state_obj.snapshot_decoder.latest_seq
+        if client_state_obj.server_stream and (new_input_command or latest_decoded_snapshot_seq > client_state_obj.last_sent_snapshot_ack):
+            client_message: Dict[str, Any] = {"inputs": [new_input_command]} if new_input_command else {}
+            if camera_client: # Server filters snapshots to what's around this rect
+                camera_offset = camera_client.get_offset()
+                client_message["view"] = [int(-camera_offset.x()), int(-camera_offset.y()), int(camera_client.screen_width), int(camera_client.screen_height)]
+            if latest_decoded_snapshot_seq > client_state_obj.last_sent_snapshot_ack:
+                client_message["snapshot_ack"] = latest_decoded_snapshot_seq
+                client_state_obj.last_sent_snapshot_ack = latest_decoded_snapshot_seq
+            sent_over_udp = False
+            if client_state_obj.udp_channel_confirmed and \
+               not (new_input_command and any(action in new_input_command["pressed"] for action in _RELIABLE_INPUT_ACTIONS)):
+                if new_input_command: client_message["inputs"] = player_predictor.commands_to_send() # Redundant copies cover lost datagrams
+                sent_over_udp = _send_udp_datagram(client_state_obj, UDP_KIND_INPUT, json.dumps(client_message).encode('utf-8'))
+            if not sent_over_udp and not _send_to_server(client_state_obj, client_message):
+                error("Client: Send to server failed (connection closed)."); client_game_active=False; break
+        if client_state_obj.server_stream:
             try:
-                server_data_chunk = client_state_obj.client_tcp_socket.recv(client_state_obj.buffer_size * 2)
-                if not server_data_chunk: info("Client: Server disconnected (empty recv)."); client_game_active=False; break
-                client_state_obj.server_state_buffer += server_data_chunk
-                decoded_server_states, client_state_obj.server_state_buffer = decode_data_stream(client_state_obj.server_state_buffer)
-                if decoded_server_states:
-                    client_state_obj.last_received_server_state = decoded_server_states[-1]
-                    set_network_game_state(client_state_obj.last_received_server_state, game_elements_ref, client_player_id=2)
-            except socket.timeout: pass
-            except socket.error as e_recv: error(f"Client: Recv error: {e_recv}."); client_game_active=False; break
+                # Snapshots from both channels, queued by the network loop in arrival order; the decoder drops stale ones
+                snapshot_payloads: List[bytes] = []
+                server_message = _pop_server_message(client_state_obj)
+                while server_message is not None:
+                    if isinstance(server_message, bytes): snapshot_payloads.append(server_message)
+                    server_message = _pop_server_message(client_state_obj)
+                if not snapshot_payloads and client_state_obj.server_disconnected:
+                    info("Client: Server disconnected."); client_game_active=False; break
+                newest_state_this_frame: Optional[Dict[str, Any]] = None
+                for snapshot_payload in snapshot_payloads: # Every snapshot is decoded (each can become a baseline) and buffered
+                    decoded_state = client_state_obj.snapshot_decoder.decode(snapshot_payload)
+                    if decoded_state is not None:
+                        client_state_obj.last_received_server_state = decoded_state
+                        client_state_obj.interpolation_buffer.push(decoded_state)
+                        newest_state_this_frame = decoded_state
+                if newest_state_this_frame is not None and own_player:
+                    # The own player is reconciled against the newest state, not the delayed interpolated one
+                    player_predictor.reconcile(own_player, newest_state_this_frame.get(own_player_net_key), game_elements_ref, frame_dt_sec)
             except Exception as e_proc_serv: error(f"Client: Error processing server data: {e_proc_serv}", exc_info=True); client_game_active=False; break
-        for p_instance in [p1_remote_on_client, p2_controlled_by_client]:
+        render_server_state = client_state_obj.interpolation_buffer.sample() # Every frame, so motion stays smooth between arrivals
+        if render_server_state is not None:
+            set_network_game_state(render_server_state, game_elements_ref, client_player_id=own_player_id,
+                                   predicted_player_id=own_player_id if player_predictor.enabled else None)
+            own_player = game_elements_ref.get(own_player_key)
+        remote_players_on_client = [game_elements_ref.get(f"player{i}") for i in range(1, 5) if i != own_player_id]
+        for p_instance in [own_player] + remote_players_on_client:
              if p_instance and hasattr(p_instance, '_valid_init') and p_instance._valid_init and \
                 hasattr(p_instance, 'alive') and p_instance.alive() and hasattr(p_instance, 'animate'): p_instance.animate()
         for enemy_client in game_elements_ref.get("enemy_list",[]):
@@ -343,30 +739,35 @@ def run_client_mode(client_state_obj: ClientState,
             if hasattr(collectible, 'update'): collectible.update(0.016)
         if camera_client:
             cam_focus_target_client = None
-            if p2_controlled_by_client and hasattr(p2_controlled_by_client, '_valid_init') and p2_controlled_by_client._valid_init and \
-               hasattr(p2_controlled_by_client, 'alive') and p2_controlled_by_client.alive() and \
-               not getattr(p2_controlled_by_client, 'is_dead', True) and not getattr(p2_controlled_by_client,'is_petrified',False):
-                cam_focus_target_client = p2_controlled_by_client
-            elif p1_remote_on_client and hasattr(p1_remote_on_client, '_valid_init') and p1_remote_on_client._valid_init and \
-                 hasattr(p1_remote_on_client, 'alive') and p1_remote_on_client.alive() and \
-                 not getattr(p1_remote_on_client, 'is_dead', True) and not getattr(p1_remote_on_client,'is_petrified',False):
-                cam_focus_target_client = p1_remote_on_client
-            elif p2_controlled_by_client and hasattr(p2_controlled_by_client, '_valid_init') and p2_controlled_by_client._valid_init and \
-                 hasattr(p2_controlled_by_client, 'alive') and p2_controlled_by_client.alive():
-                 cam_focus_target_client = p2_controlled_by_client
-            elif p1_remote_on_client and hasattr(p1_remote_on_client, '_valid_init') and p1_remote_on_client._valid_init and \
-                 hasattr(p1_remote_on_client, 'alive') and p1_remote_on_client.alive():
-                 cam_focus_target_client = p1_remote_on_client
+            cam_candidates_client = [p for p in [own_player] + remote_players_on_client
+                                     if p and hasattr(p, '_valid_init') and p._valid_init and hasattr(p, 'alive') and p.alive()]
+            # Own player first, then the first remote player still in play, then anyone left on screen
+            for cam_candidate in cam_candidates_client:
+                if not getattr(cam_candidate, 'is_dead', True) and not getattr(cam_candidate, 'is_petrified', False):
+                    cam_focus_target_client = cam_candidate; break
+            if cam_focus_target_client is None and cam_candidates_client: cam_focus_target_client = cam_candidates_client[0]
             if cam_focus_target_client: camera_client.update(cam_focus_target_client)
             else: camera_client.static_update()
-        time.sleep(1.0 / C.FPS)
+        if time.monotonic() - last_network_stats_time >= network_stats_refresh_s:
+            last_network_stats_time = time.monotonic()
+            client_network_stats = _refresh_client_network_stats(client_state_obj)
+            game_elements_ref["network_client_stats"] = client_network_stats
+            if last_network_stats_time - last_network_stats_log_time >= network_stats_log_interval_s:
+                last_network_stats_log_time = last_network_stats_time
+                info("Client net: " + " | ".join(format_client_overlay_lines(client_network_stats)))
+        remaining_frame_sec = frame_dt_sec - (time.monotonic() - frame_start_time)
+        if remaining_frame_sec > 0: time.sleep(remaining_frame_sec)
 
+    game_elements_ref.pop("network_client_stats", None)
     info("Client: Exiting active game simulation.")
-    if client_state_obj.client_tcp_socket:
-        info("Client: Closing TCP socket to server.")
-        try: client_state_obj.client_tcp_socket.shutdown(socket.SHUT_RDWR)
-        except: pass
-        try: client_state_obj.client_tcp_socket.close()
-        except: pass
-        client_state_obj.client_tcp_socket = None
+    interp_stats = client_state_obj.interpolation_buffer.get_stats()
+    info(f"Client: Interpolation frames={interp_stats['frames_interpolated']} extrapolated={interp_stats['frames_extrapolated']} "
+         f"held={interp_stats['frames_held']} late_snapshots={interp_stats['snapshots_dropped_late']} avg_buffer_depth={interp_stats['buffer_depth_avg']:.1f}.")
+    prediction_stats = player_predictor.get_stats()
+    info(f"Client: Prediction commands={prediction_stats['commands_predicted']} corrections={prediction_stats['corrections']} "
+         f"replayed={prediction_stats['commands_replayed']} pending={prediction_stats['pending_commands']}.")
+    if client_state_obj.udp_socket:
+        filter_stats = client_state_obj.udp_snapshot_filter
+        info(f"Client: UDP snapshots accepted={filter_stats.accepted} stale={filter_stats.dropped_stale} missing={filter_stats.missing}.")
+    _stop_client_network(client_state_obj)
     info("Client: Client mode finished and returned to caller.")
\ No newline at end of file
@@ -0,0 +1,129 @@
+# client_prediction.py
+# -*- coding: utf-8 -*-
+"""
+Client-side prediction and server reconciliation for the client's own player.
+Each frame the local input becomes a sequenced input command (see
+player_input_handler.build_player_input_command) that is applied to the local
+player right away with the same input and physics code the server runs, and
+kept until a snapshot reports it as applied ('last_input_seq' on the player's
+record). On each newer ack the predicted position for that command is compared
+with the server's; past CLIENT_PREDICTION_CORRECTION_THRESHOLD (or when the
+server changed a status the client can't predict, like a hit or death) the
+player is reset to the server's state and the unacknowledged commands are
+replayed on top of it. With CLIENT_PREDICTION_ENABLED off, commands are still
+produced and sent, but the player is left to the server's snapshots.
+"""
+# version 1.0.0 (Initial client prediction)
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import main_game.constants as C
+from player.player_input_handler import build_player_input_command, apply_player_input_command
+
+try:
+    from main_game.logger import debug
+except ImportError:
+    def debug(msg, *args, **kwargs): print(f"DEBUG_CLIENT_PREDICTION: {msg}")
+
+
+# Server-owned statuses; any mismatch with the predicted player forces a rewind to the server state
+_SERVER_AUTHORITATIVE_FLAGS: Tuple[str, ...] = ('is_dead', 'is_petrified', 'is_stone_smashed', 'is_frozen', 'is_defrosting',
+                                                'is_aflame', 'is_deflaming', 'is_taking_hit')
+
+
+class ClientPlayerPredictor:
+    def __init__(self,
+                 enabled: bool = getattr(C, 'CLIENT_PREDICTION_ENABLED', True),
+                 correction_threshold: float = getattr(C, 'CLIENT_PREDICTION_CORRECTION_THRESHOLD', 2.0),
+                 max_pending: int = getattr(C, 'CLIENT_PREDICTION_MAX_PENDING', 120),
+                 redundancy: int = getattr(C, 'CLIENT_INPUT_REDUNDANCY', 3)):
+        self.enabled = bool(enabled)
+        self.correction_threshold_sq = float(correction_threshold) ** 2
+        self.max_pending = max(1, int(max_pending))
+        self.redundancy = max(1, int(redundancy))
+        self.next_seq = 1
+        self.last_acked_seq = 0
+        # seq -> [command, predicted (x, y) after applying it or None]
+        self.pending: "OrderedDict[int, List[Any]]" = OrderedDict()
+        # Metrics
+        self.commands_predicted = 0
+        self.corrections = 0
+        self.commands_replayed = 0
+        self.last_correction_distance = 0.0
+
+    def reset(self):
+        self.next_seq = 1
+        self.last_acked_seq = 0
+        self.pending.clear()
+
+    def predict(self, player: Any, game_elements: Dict[str, Any], dt_sec: float) -> Dict[str, Any]:
+        """
+        Records the input process_player_input_logic() just handled for `player` as the next
+        command and advances the player one step. Returns the command to send.
+        """
+        command = build_player_input_command(player, self.next_seq)
+        self.next_seq += 1
+        if self.enabled: self._step(player, game_elements, dt_sec)
+        self.pending[command["seq"]] = [command, self._position(player)]
+        while len(self.pending) > self.max_pending: self.pending.popitem(last=False) # Server stopped acking; keep memory bounded
+        self.commands_predicted += 1
+        return command
+
+    def commands_to_send(self) -> List[Dict[str, Any]]:
+        """Newest unacknowledged commands, oldest first, so one lost datagram loses no input."""
+        return [entry[0] for entry in list(self.pending.values())[-self.redundancy:]]
+
+    def reconcile(self, player: Any, server_player_data: Optional[Dict[str, Any]], game_elements: Dict[str, Any], dt_sec: float) -> bool:
+        """Checks the prediction against a newly decoded snapshot. Returns True if the player was corrected."""
+        if not isinstance(server_player_data, dict) or not getattr(player, '_valid_init', False): return False
+        acked_seq = server_player_data.get('last_input_seq')
+        if not isinstance(acked_seq, int) or acked_seq <= self.last_acked_seq: return False
+        self.last_acked_seq = acked_seq
+        acked_entry = self.pending.get(acked_seq)
+        while self.pending and next(iter(self.pending)) <= acked_seq: self.pending.popitem(last=False)
+        if not self.enabled: return False
+
+        server_pos = server_player_data.get('pos')
+        if not server_pos or len(server_pos) != 2: return False
+        predicted_pos = acked_entry[1] if acked_entry else None
+        distance_sq = ((predicted_pos[0] - server_pos[0]) ** 2 + (predicted_pos[1] - server_pos[1]) ** 2) if predicted_pos else float('inf')
+        status_mismatch = any(key in server_player_data and bool(server_player_data[key]) != bool(getattr(player, key, False))
+                              for key in _SERVER_AUTHORITATIVE_FLAGS)
+        if 'current_health' in server_player_data: player.current_health = server_player_data['current_health']
+        if distance_sq <= self.correction_threshold_sq and not status_mismatch: return False
+
+        # Rewind to the server's state for acked_seq, then replay what the server hasn't applied yet
+        player.set_network_data(server_player_data)
+        for entry in self.pending.values():
+            apply_player_input_command(player, entry[0], game_elements.get("platforms_list", []), replay=True)
+            self._step(player, game_elements, dt_sec)
+            entry[1] = self._position(player)
+            self.commands_replayed += 1
+        self.corrections += 1
+        self.last_correction_distance = distance_sq ** 0.5 if predicted_pos else 0.0
+        if self.corrections % 50 == 1:
+            debug(f"ClientPlayerPredictor: Correction #{self.corrections} at seq {acked_seq} "
+                  f"(off by {self.last_correction_distance:.1f}px, status changed: {status_mismatch}, replayed {len(self.pending)}).")
+        return True
+
+    @staticmethod
+    def _step(player: Any, game_elements: Dict[str, Any], dt_sec: float):
+        # Other players and melee targets are server-side concerns; the prediction only moves this player
+        player.update(dt_sec, game_elements.get("platforms_list", []), game_elements.get("ladders_list", []),
+                      game_elements.get("hazards_list", []), [], [])
+
+    @staticmethod
+    def _position(player: Any) -> Optional[Tuple[float, float]]:
+        pos = getattr(player, 'pos', None)
+        return (pos.x(), pos.y()) if pos is not None else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'pending_commands': len(self.pending),
+            'last_acked_seq': self.last_acked_seq,
+            'commands_predicted': self.commands_predicted,
+            'corrections': self.corrections,
+            'commands_replayed': self.commands_replayed,
+            'last_correction_distance': self.last_correction_distance,
+        }
@@ -0,0 +1,298 @@
+# event_loop.py
+# -*- coding: utf-8 -*-
+"""
+Event-driven network core shared by the server and the client.
+NetworkEventLoop runs one thread around a `selectors` selector: sockets are
+registered with a callback, timers replace sleep-based intervals (LAN discovery
+broadcasts, UDP hellos), and other threads hand work to the loop with
+call_soon_threadsafe(), which wakes the selector through a socket pair instead
+of waiting for a poll timeout.
+StreamConnection is a non-blocking TCP connection on such a loop: bytes are
+received straight into a StreamDecoder (recv_into, no buffer concatenation) and
+split into messages there, and queued frames are written as the socket accepts them, so a slow peer never blocks the game loop. Frames
+sent with a replace_key (state snapshots) overwrite an unsent frame with the same
+key, and are dropped instead of queued while the queue is over max_queue_bytes;
+other frames are always queued, and stalled_for() tells the owner how long the
+queue has made no progress.
+Socket I/O only happens on the loop thread; send()/close() may be called from any thread.
+MODIFIED: Reads go through network_comms.StreamDecoder instead of bytes += chunk and
+          decode_data_stream, so large frames arriving in many recvs aren't re-copied.
+MODIFIED: StreamConnection counts messages sent and received (network.net_stats rates).
+"""
+# version 1.2.1 (Message counters)
+
+import heapq
+import itertools
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from network.network_comms import StreamDecoder
+
+try:
+    from main_game.logger import debug, error
+except ImportError:
+    def debug(msg, *args, **kwargs): print(f"DEBUG_NET_LOOP: {msg}")
+    def error(msg, *args, **kwargs): print(f"ERROR_NET_LOOP: {msg}")
+
+
+class NetworkEventLoop:
+    def __init__(self, name: str = "network"):
+        self.name = name
+        self.selector = selectors.DefaultSelector()
+        self._wakeup_recv_socket, self._wakeup_send_socket = socket.socketpair()
+        self._wakeup_recv_socket.setblocking(False)
+        self._wakeup_send_socket.setblocking(False)
+        self.selector.register(self._wakeup_recv_socket, selectors.EVENT_READ, self._drain_wakeups)
+        self._timers: List[Tuple[float, int, Callable, Tuple[Any, ...]]] = [] # Heap of (due time, id, callback, args)
+        self._timer_ids = itertools.count(1)
+        self._pending_calls: Deque[Tuple[Callable, Tuple[Any, ...]]] = deque()
+        self._pending_calls_lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        # Metrics
+        self.select_calls = 0
+        self.io_events_handled = 0
+
+    # --- Thread control ---
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-loop", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """Stops and joins the loop thread. Registered sockets stay open; their owners close them."""
+        self._running = False
+        self._wake()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        try: self.selector.close()
+        except Exception: pass
+        for wakeup_socket in (self._wakeup_recv_socket, self._wakeup_send_socket):
+            try: wakeup_socket.close()
+            except Exception: pass
+
+    def is_running(self) -> bool:
+        return self._running and self._thread is not None and self._thread.is_alive()
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is threading.current_thread()
+
+    # --- Scheduling ---
+    def call_soon_threadsafe(self, callback: Callable, *args: Any):
+        with self._pending_calls_lock: self._pending_calls.append((callback, args))
+        self._wake()
+
+    def call_later(self, delay_sec: float, callback: Callable, *args: Any):
+        """Runs `callback(*args)` on the loop after `delay_sec`. Loop thread (or before start()) only."""
+        timer_id = next(self._timer_ids)
+        heapq.heappush(self._timers, (time.monotonic() + max(0.0, delay_sec), timer_id, callback, args)) # id keeps equal due times ordered
+
+    def call_every(self, interval_sec: float, callback: Callable, *args: Any, run_now: bool = True):
+        """Runs `callback(*args)` every `interval_sec` until it returns False."""
+        def _repeat():
+            if callback(*args) is not False and self._running: self.call_later(interval_sec, _repeat)
+        self.call_later(0.0 if run_now else interval_sec, _repeat)
+
+    # --- Sockets (loop thread, or before start()) ---
+    def register(self, sock: socket.socket, events: int, callback: Callable[[int], None]):
+        """`callback(mask)` runs on the loop thread whenever `sock` is ready for `events`."""
+        self.selector.register(sock, events, callback)
+
+    def modify(self, sock: socket.socket, events: int, callback: Callable[[int], None]):
+        self.selector.modify(sock, events, callback)
+
+    def unregister(self, sock: socket.socket):
+        try: self.selector.unregister(sock)
+        except (KeyError, ValueError, RuntimeError, OSError): pass
+
+    # --- Internals ---
+    def _wake(self):
+        try: self._wakeup_send_socket.send(b"\0")
+        except (BlockingIOError, InterruptedError): pass # A wakeup is already pending
+        except OSError: pass # Loop already stopped
+
+    def _drain_wakeups(self, mask: int):
+        try:
+            while self._wakeup_recv_socket.recv(512): pass
+        except (BlockingIOError, InterruptedError): pass
+
+    def _next_timeout(self) -> Optional[float]:
+        if self._pending_calls: return 0.0
+        if not self._timers: return None # Nothing scheduled: sleep until a socket or call_soon_threadsafe wakes us
+        return max(0.0, self._timers[0][0] - time.monotonic())
+
+    def _run(self):
+        debug(f"NetworkEventLoop ({self.name}): Started.")
+        while self._running:
+            try: ready_events = self.selector.select(self._next_timeout())
+            except (OSError, ValueError) as e_select: # Selector closed under us during shutdown
+                if self._running: error(f"NetworkEventLoop ({self.name}): select failed: {e_select}")
+                break
+            self.select_calls += 1
+            for selector_key, event_mask in ready_events:
+                self.io_events_handled += 1
+                self._invoke(selector_key.data, (event_mask,))
+            now = time.monotonic()
+            while self._timers and self._timers[0][0] <= now:
+                _due, _timer_id, timer_callback, timer_args = heapq.heappop(self._timers)
+                self._invoke(timer_callback, timer_args)
+            with self._pending_calls_lock:
+                calls_to_run = list(self._pending_calls); self._pending_calls.clear()
+            for pending_callback, pending_args in calls_to_run: self._invoke(pending_callback, pending_args)
+        with self._pending_calls_lock: # Work handed over right before stop(), e.g. closing connections
+            calls_to_run = list(self._pending_calls); self._pending_calls.clear()
+        for pending_callback, pending_args in calls_to_run: self._invoke(pending_callback, pending_args)
+        debug(f"NetworkEventLoop ({self.name}): Stopped after {self.select_calls} selects, {self.io_events_handled} I/O events.")
+
+    def _invoke(self, callback: Callable, args: Tuple[Any, ...]):
+        try: callback(*args)
+        except Exception as e_callback: error(f"NetworkEventLoop ({self.name}): Callback {getattr(callback, '__name__', callback)} failed: {e_callback}", exc_info=True)
+
+
+class StreamConnection:
+    def __init__(self, loop: NetworkEventLoop, sock: socket.socket,
+                 on_message: Callable[['StreamConnection', Any], None],
+                 on_close: Optional[Callable[['StreamConnection'], None]] = None,
+                 recv_size: int = 8192,
+                 max_queue_bytes: int = 0):
+        self.loop = loop
+        self.sock = sock
+        self.on_message = on_message # Called on the loop thread with each decoded dict (JSON) or bytes (binary frame)
+        self.on_close = on_close
+        self.recv_size = max(1024, int(recv_size))
+        self.decoder = StreamDecoder(max(65536, self.recv_size * 4))
+        self.max_queue_bytes = max(0, int(max_queue_bytes)) # 0: unbounded
+        self.send_queue: Deque[List[Any]] = deque() # [unsent bytes (memoryview), replace_key or None, being written]
+        self.queued_bytes = 0
+        self.send_lock = threading.Lock()
+        self.closed = False
+        self._registered_events = 0
+        self._last_send_progress_time = time.monotonic()
+        # Metrics
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.messages_sent = 0 # Frames queued (a replacement doesn't add one)
+        self.messages_received = 0
+        self.frames_replaced = 0 # Unsent frames overwritten by a newer one with the same replace_key
+        self.frames_dropped = 0 # Replaceable frames refused because the queue was full
+        self.peak_queued_bytes = 0
+        sock.setblocking(False)
+
+    def start(self):
+        """Begins reading. Safe from any thread."""
+        if self.loop.in_loop_thread() or not self.loop.is_running(): self._update_registration()
+        else: self.loop.call_soon_threadsafe(self._update_registration)
+
+    def send(self, data: Optional[bytes], replace_key: Optional[str] = None) -> bool:
+        """
+        Queues `data` for writing in order. With `replace_key`, an unsent frame with the same key is
+        overwritten in place, and the frame is dropped if the queue is full. Returns False if the connection is closed.
+        """
+        if not data or self.closed: return not self.closed
+        data_view = memoryview(data)
+        with self.send_lock:
+            was_idle = not self.send_queue
+            if replace_key is not None:
+                for queued_entry in self.send_queue:
+                    if queued_entry[1] == replace_key and not queued_entry[2]:
+                        self.queued_bytes += len(data_view) - len(queued_entry[0])
+                        queued_entry[0] = data_view
+                        self.frames_replaced += 1
+                        return True
+                if self.max_queue_bytes and self.queued_bytes + len(data_view) > self.max_queue_bytes:
+                    self.frames_dropped += 1 # Peer isn't keeping up; a later frame supersedes this one anyway
+                    return True
+            if was_idle: self._last_send_progress_time = time.monotonic()
+            self.send_queue.append([data_view, replace_key, False])
+            self.messages_sent += 1
+            self.queued_bytes += len(data_view)
+            if self.queued_bytes > self.peak_queued_bytes: self.peak_queued_bytes = self.queued_bytes
+        if self.loop.in_loop_thread(): self._flush()
+        elif was_idle: self.loop.call_soon_threadsafe(self._flush)
+        return True
+
+    def pending_send_bytes(self) -> int:
+        with self.send_lock: return self.queued_bytes
+
+    def queue_depth(self) -> int:
+        with self.send_lock: return len(self.send_queue)
+
+    def stalled_for(self) -> float:
+        """Seconds the send queue has been waiting without the socket taking any of it (0 when empty)."""
+        with self.send_lock:
+            if not self.send_queue: return 0.0
+            return time.monotonic() - self._last_send_progress_time
+
+    def close(self):
+        """Closes the socket on the loop thread; on_close runs once."""
+        if self.loop.in_loop_thread() or not self.loop.is_running(): self._close_now()
+        else: self.loop.call_soon_threadsafe(self._close_now)
+
+    def _update_registration(self):
+        if self.closed: return
+        with self.send_lock: wanted_events = selectors.EVENT_READ | (selectors.EVENT_WRITE if self.send_queue else 0)
+        if wanted_events == self._registered_events: return
+        try:
+            if self._registered_events: self.loop.modify(self.sock, wanted_events, self._on_ready)
+            else: self.loop.register(self.sock, wanted_events, self._on_ready)
+            self._registered_events = wanted_events
+        except (KeyError, ValueError, OSError) as e_register:
+            debug(f"StreamConnection: Could not register socket: {e_register}"); self._close_now()
+
+    def _on_ready(self, mask: int):
+        if mask & selectors.EVENT_READ: self._read()
+        if mask & selectors.EVENT_WRITE and not self.closed: self._flush()
+
+    def _read(self):
+        while not self.closed:
+            try: received_count = self.decoder.recv_into(self.sock, self.recv_size)
+            except (BlockingIOError, InterruptedError): break
+            except OSError as e_recv:
+                debug(f"StreamConnection: recv failed: {e_recv}"); self._close_now(); return
+            if not received_count: self._close_now(); return # Peer closed
+            self.bytes_received += received_count
+            if self.decoder.free_bytes(): break # Short read: drained what the kernel had
+        try: decoded_messages = self.decoder.decode()
+        except ValueError as e_decode:
+            error(f"StreamConnection: Dropping connection with a corrupt stream: {e_decode}"); self._close_now(); return
+        self.messages_received += len(decoded_messages)
+        for decoded_message in decoded_messages:
+            if self.closed: break
+            self.on_message(self, decoded_message)
+
+    def _flush(self):
+        while not self.closed:
+            with self.send_lock:
+                if not self.send_queue: break
+                pending_entry = self.send_queue[0]
+                pending_entry[2] = True # Being written: a newer frame with its key queues behind it instead
+                pending_view = pending_entry[0]
+            try: sent_count = self.sock.send(pending_view)
+            except (BlockingIOError, InterruptedError): break # Kernel buffer full; EVENT_WRITE resumes it
+            except OSError as e_send:
+                debug(f"StreamConnection: send failed: {e_send}"); self._close_now(); return
+            self.bytes_sent += sent_count
+            with self.send_lock:
+                self.queued_bytes -= sent_count
+                self._last_send_progress_time = time.monotonic()
+                if sent_count >= len(pending_view): self.send_queue.popleft()
+                else: pending_entry[0] = pending_view[sent_count:]
+        self._update_registration()
+
+    def _close_now(self):
+        if self.closed: return
+        self.closed = True
+        self.loop.unregister(self.sock)
+        self._registered_events = 0
+        with self.send_lock: self.send_queue.clear(); self.queued_bytes = 0
+        try: self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError: pass
+        try: self.sock.close()
+        except OSError: pass
+        if self.on_close: self.on_close(self)
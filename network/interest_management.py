@@ -0,0 +1,138 @@
+# interest_management.py
+# -*- coding: utf-8 -*-
+"""
+Per-client relevance filtering for server snapshots.
+Each tick the server indexes the serialized enemies, statues and projectiles of
+get_network_game_state() in a coarse InterestGrid keyed by their 'pos'. Every
+client's ClientInterest then asks the grid for the entities around its camera
+rect (reported by the client as "view") and builds a state holding only those,
+so a client's snapshot size follows what is near it rather than the map size.
+An entity becomes relevant inside the view plus INTEREST_MARGIN_PX and stays
+relevant until it leaves the view plus INTEREST_EXIT_MARGIN_PX, so something
+hovering at the edge doesn't flicker in and out. When an entity drops out of a
+client's state, SnapshotEncoder sends it an explicit OP_REMOVE (despawn) record
+once, and the client removes its copy; it is re-created if it comes back.
+Players and the chest are always sent.
+"""
+# version 1.0.0 (Camera-based interest management)
+
+import math
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import main_game.constants as C
+
+InterestKey = Tuple[str, str] # (state list name, entity id), e.g. ('enemies', '3')
+CellKey = Tuple[int, int]
+
+_FILTERED_COLLECTIONS = ('enemies', 'statues', 'projectiles')
+
+
+class InterestGrid:
+    """Uniform grid of one tick's serialized entities, bucketed by position."""
+    def __init__(self, cell_size: float = getattr(C, 'INTEREST_GRID_CELL_SIZE', 512.0)):
+        self.cell_size = max(1.0, float(cell_size))
+        self._cells: Dict[CellKey, List[Tuple[InterestKey, float, float, Dict[str, Any]]]] = {}
+        self.unpositioned: List[Tuple[InterestKey, Dict[str, Any]]] = [] # No usable 'pos': sent to everyone
+        self.entity_count = 0
+
+    def insert(self, key: InterestKey, entity_data: Dict[str, Any]):
+        self.entity_count += 1
+        pos = entity_data.get('pos')
+        try: x, y = float(pos[0]), float(pos[1])
+        except (TypeError, ValueError, IndexError): self.unpositioned.append((key, entity_data)); return
+        cell_key = (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+        self._cells.setdefault(cell_key, []).append((key, x, y, entity_data))
+
+    def query(self, left: float, top: float, right: float, bottom: float) -> List[Tuple[InterestKey, float, float, Dict[str, Any]]]:
+        """Entities in the cells overlapping the rect (callers test the exact bounds)."""
+        inv_cell = 1.0 / self.cell_size
+        min_cx, max_cx = int(math.floor(left * inv_cell)), int(math.floor(right * inv_cell))
+        min_cy, max_cy = int(math.floor(top * inv_cell)), int(math.floor(bottom * inv_cell))
+        candidates: List[Tuple[InterestKey, float, float, Dict[str, Any]]] = []
+        cells = self._cells
+        if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) > len(cells): # Rect covers more cells than are occupied
+            for (cx, cy), cell_entries in cells.items():
+                if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy: candidates.extend(cell_entries)
+            return candidates
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                cell_entries = cells.get((cx, cy))
+                if cell_entries: candidates.extend(cell_entries)
+        return candidates
+
+
+def build_interest_grid(network_state: Dict[str, Any]) -> InterestGrid:
+    """Indexes the state's enemies, statues and projectiles for this tick's per-client queries."""
+    interest_grid = InterestGrid()
+    enemies_data = network_state.get('enemies') or {}
+    if isinstance(enemies_data, dict):
+        for enemy_key, enemy_data in enemies_data.items():
+            if isinstance(enemy_data, dict): interest_grid.insert(('enemies', str(enemy_key)), enemy_data)
+    for collection_name in ('statues', 'projectiles'):
+        for entity_data in network_state.get(collection_name) or []:
+            if isinstance(entity_data, dict) and 'id' in entity_data: interest_grid.insert((collection_name, str(entity_data['id'])), entity_data)
+    return interest_grid
+
+
+class ClientInterest:
+    """One client's view of the world: its camera rect and the entities currently relevant to it."""
+    def __init__(self):
+        self.enabled = bool(getattr(C, 'INTEREST_MANAGEMENT_ENABLED', True))
+        self.enter_margin = float(getattr(C, 'INTEREST_MARGIN_PX', 320.0))
+        self.exit_margin = max(self.enter_margin, float(getattr(C, 'INTEREST_EXIT_MARGIN_PX', 480.0)))
+        default_view_size = getattr(C, 'INTEREST_DEFAULT_VIEW_SIZE', (1920.0, 1080.0))
+        self.default_view_width, self.default_view_height = float(default_view_size[0]), float(default_view_size[1])
+        self.view_rect: Optional[Tuple[float, float, float, float]] = None # World (x, y, width, height) from the client
+        self.relevant_keys: Set[InterestKey] = set()
+        # Metrics
+        self.last_relevant_count = 0
+        self.last_total_count = 0
+        self.despawns_total = 0
+
+    def set_view(self, view: Any):
+        """Stores the client's reported camera rect [x, y, width, height] in world pixels; ignores anything malformed."""
+        try:
+            x, y, width, height = (float(value) for value in view)
+        except (TypeError, ValueError): return
+        if width > 0 and height > 0 and all(math.isfinite(value) for value in (x, y, width, height)):
+            self.view_rect = (x, y, min(width, 8192.0), min(height, 8192.0))
+
+    def _current_view(self, own_player_data: Any) -> Optional[Tuple[float, float, float, float]]:
+        if self.view_rect: return self.view_rect
+        try: center_x, center_y = float(own_player_data['pos'][0]), float(own_player_data['pos'][1]) # Before the first report
+        except (TypeError, KeyError, IndexError, ValueError): return None
+        return (center_x - self.default_view_width / 2.0, center_y - self.default_view_height / 2.0, self.default_view_width, self.default_view_height)
+
+    def filter_state(self, network_state: Dict[str, Any], interest_grid: InterestGrid, own_player_key: str) -> Dict[str, Any]:
+        """
+        Returns a shallow copy of `network_state` whose enemies, statues and projectiles are only
+        the ones relevant to this client. Unfiltered (the same dict) if disabled or no view is known.
+        """
+        self.last_total_count = interest_grid.entity_count
+        view = self._current_view(network_state.get(own_player_key)) if self.enabled else None
+        if view is None:
+            self.relevant_keys.clear(); self.last_relevant_count = interest_grid.entity_count
+            return network_state
+        view_x, view_y, view_width, view_height = view
+        enter_left, enter_top = view_x - self.enter_margin, view_y - self.enter_margin
+        enter_right, enter_bottom = view_x + view_width + self.enter_margin, view_y + view_height + self.enter_margin
+        previously_relevant = self.relevant_keys
+        now_relevant: Set[InterestKey] = set()
+        filtered_collections: Dict[str, Any] = {'enemies': {}, 'statues': [], 'projectiles': []}
+        for key, x, y, entity_data in interest_grid.query(view_x - self.exit_margin, view_y - self.exit_margin,
+                                                           view_x + view_width + self.exit_margin, view_y + view_height + self.exit_margin):
+            if not (enter_left <= x <= enter_right and enter_top <= y <= enter_bottom) and key not in previously_relevant:
+                continue # Between the enter and exit margins: only kept if it was already relevant
+            now_relevant.add(key)
+            if key[0] == 'enemies': filtered_collections['enemies'][key[1]] = entity_data
+            else: filtered_collections[key[0]].append(entity_data)
+        for key, entity_data in interest_grid.unpositioned:
+            now_relevant.add(key)
+            if key[0] == 'enemies': filtered_collections['enemies'][key[1]] = entity_data
+            else: filtered_collections[key[0]].append(entity_data)
+        self.despawns_total += len(previously_relevant - now_relevant)
+        self.relevant_keys = now_relevant
+        self.last_relevant_count = len(now_relevant)
+        client_state = dict(network_state)
+        for collection_name in _FILTERED_COLLECTIONS: client_state[collection_name] = filtered_collections[collection_name]
+        return client_state
@@ -0,0 +1,182 @@
+# map_bundle.py
+# -*- coding: utf-8 -*-
+"""
+Map bundles for client map downloads.
+A bundle is a map's whole folder (maps/<name>/: the .py loader, the .json level
+data and Custom/ images) packed into a deflate-compressed zip with fixed
+timestamps, so the same files always produce the same bytes.
+content_hash covers the map files themselves: a client whose local folder hashes
+the same already has the map and skips the download. bundle_hash covers the
+compressed bytes and is checked before anything is extracted.
+Chunks travel as binary frames (MAP_CHUNK_MAGIC + uint32 offset + data). The client
+appends them to a .part file under maps/.downloads/, named after the bundle hash,
+and a later connection resumes from that file's length.
+MODIFIED: install_map_bundle became extract_map_bundle(bundle_path, destination_folder, hash);
+          clients extract into their map cache (network.map_cache) and install from there.
+MODIFIED: Hashes received from the server are checked with is_valid_content_hash() before they
+          become part of a path; partial_bundle_path returns None for anything else.
+"""
+# version 1.1.1 (Validate network hashes before using them in paths)
+
+import hashlib
+import io
+import os
+import re
+import shutil
+import struct
+import zipfile
+from typing import List, Optional, Tuple
+
+try:
+    from main_game.logger import debug, error
+except ImportError:
+    def debug(msg, *args, **kwargs): print(f"DEBUG_MAP_BUNDLE: {msg}")
+    def error(msg, *args, **kwargs): print(f"ERROR_MAP_BUNDLE: {msg}")
+
+
+MAP_CHUNK_MAGIC = b'MC' # Snapshot payloads start with their protocol version byte, never 'M'
+_MAP_CHUNK_HEADER = struct.Struct('<2sI')
+DOWNLOADS_FOLDER_NAME = ".downloads"
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0) # Fixed so the bundle bytes only depend on the files
+_HASH_READ_SIZE = 65536
+_SHA256_HEX_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+class MapBundle:
+    def __init__(self, name: str, data: bytes, bundle_hash: str, content_hash: str, file_count: int, uncompressed_size: int):
+        self.name = name
+        self.data = data
+        self.bundle_hash = bundle_hash
+        self.content_hash = content_hash
+        self.file_count = file_count
+        self.uncompressed_size = uncompressed_size
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+def is_safe_map_name(map_name: Optional[str]) -> bool:
+    """Map names come from the network and become folder names; reject anything that isn't a plain folder name."""
+    if not map_name or not isinstance(map_name, str): return False
+    if map_name in (".", "..") or map_name.startswith("."): return False
+    return not any(separator in map_name for separator in ("/", "\\", "\0", ":"))
+
+
+def is_valid_content_hash(hash_value: Optional[str]) -> bool:
+    """Content and bundle hashes come from the network and name cache folders and .part files; only a lowercase sha256 hex digest is accepted."""
+    return isinstance(hash_value, str) and _SHA256_HEX_PATTERN.fullmatch(hash_value) is not None
+
+
+def list_map_files(map_folder: str) -> List[Tuple[str, str]]:
+    """(relative posix path, absolute path) of every file that belongs in the bundle, sorted."""
+    map_files: List[Tuple[str, str]] = []
+    for dir_path, dir_names, file_names in os.walk(map_folder):
+        dir_names[:] = sorted(d for d in dir_names if d != "__pycache__" and not d.startswith("."))
+        for file_name in sorted(file_names):
+            if file_name.startswith(".") or file_name.endswith((".pyc", ".pyo")): continue
+            abs_path = os.path.join(dir_path, file_name)
+            map_files.append((os.path.relpath(abs_path, map_folder).replace(os.sep, "/"), abs_path))
+    map_files.sort()
+    return map_files
+
+
+def _update_content_hash(content_hasher, relative_path: str, file_bytes: bytes):
+    content_hasher.update(relative_path.encode("utf-8") + b"\0")
+    content_hasher.update(struct.pack('<Q', len(file_bytes)))
+    content_hasher.update(file_bytes)
+
+
+def compute_map_content_hash(map_folder: str) -> Optional[str]:
+    """Hash of the map folder's files (paths and contents). None if the folder is missing or empty."""
+    if not os.path.isdir(map_folder): return None
+    map_files = list_map_files(map_folder)
+    if not map_files: return None
+    content_hasher = hashlib.sha256()
+    try:
+        for relative_path, abs_path in map_files:
+            with open(abs_path, "rb") as f_map_file: _update_content_hash(content_hasher, relative_path, f_map_file.read())
+    except OSError as e_read:
+        error(f"MapBundle: Could not read '{map_folder}' for hashing: {e_read}"); return None
+    return content_hasher.hexdigest()
+
+
+def build_map_bundle(maps_base_dir: str, map_name: str, compress_level: int = 6) -> Optional[MapBundle]:
+    """Packs maps_base_dir/map_name/ into a MapBundle, or returns None if it doesn't exist."""
+    if not is_safe_map_name(map_name): error(f"MapBundle: Refusing unsafe map name '{map_name}'."); return None
+    map_folder = os.path.join(maps_base_dir, map_name)
+    map_files = list_map_files(map_folder) if os.path.isdir(map_folder) else []
+    if not map_files: error(f"MapBundle: Map folder '{map_folder}' is missing or empty."); return None
+    content_hasher = hashlib.sha256()
+    uncompressed_size = 0
+    zip_buffer = io.BytesIO()
+    try:
+        with zipfile.ZipFile(zip_buffer, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compress_level) as bundle_zip:
+            for relative_path, abs_path in map_files:
+                with open(abs_path, "rb") as f_map_file: file_bytes = f_map_file.read()
+                _update_content_hash(content_hasher, relative_path, file_bytes)
+                uncompressed_size += len(file_bytes)
+                zip_entry = zipfile.ZipInfo(relative_path, date_time=_ZIP_DATE_TIME)
+                zip_entry.compress_type = zipfile.ZIP_DEFLATED
+                zip_entry.external_attr = 0o644 << 16
+                bundle_zip.writestr(zip_entry, file_bytes)
+    except (OSError, zipfile.BadZipFile) as e_pack:
+        error(f"MapBundle: Could not pack '{map_folder}': {e_pack}"); return None
+    bundle_bytes = zip_buffer.getvalue()
+    debug(f"MapBundle: Packed '{map_name}': {len(map_files)} files, {uncompressed_size} -> {len(bundle_bytes)} bytes.")
+    return MapBundle(map_name, bundle_bytes, hashlib.sha256(bundle_bytes).hexdigest(), content_hasher.hexdigest(),
+                     len(map_files), uncompressed_size)
+
+
+def encode_map_chunk(offset: int, chunk_bytes: bytes) -> bytes:
+    return _MAP_CHUNK_HEADER.pack(MAP_CHUNK_MAGIC, offset) + chunk_bytes
+
+
+def decode_map_chunk(payload: bytes) -> Optional[Tuple[int, bytes]]:
+    """(offset, chunk bytes), or None if the payload isn't a map chunk."""
+    if len(payload) < _MAP_CHUNK_HEADER.size or payload[:2] != MAP_CHUNK_MAGIC: return None
+    _magic, offset = _MAP_CHUNK_HEADER.unpack_from(payload, 0)
+    return offset, payload[_MAP_CHUNK_HEADER.size:]
+
+
+def partial_bundle_path(maps_base_dir: str, map_name: str, bundle_hash: str) -> Optional[str]:
+    """Where an unfinished download of this exact bundle is kept between connections; None for an unusable name or hash."""
+    if not is_safe_map_name(map_name) or not is_valid_content_hash(bundle_hash): return None
+    return os.path.join(maps_base_dir, DOWNLOADS_FOLDER_NAME, f"{map_name}-{bundle_hash[:16]}.part")
+
+
+def _file_sha256(file_path: str) -> str:
+    file_hasher = hashlib.sha256()
+    with open(file_path, "rb") as f_bundle:
+        for block in iter(lambda: f_bundle.read(_HASH_READ_SIZE), b""): file_hasher.update(block)
+    return file_hasher.hexdigest()
+
+
+def extract_map_bundle(bundle_path: str, destination_folder: str, expected_bundle_hash: str) -> bool:
+    """
+    Verifies a downloaded bundle against its hash and replaces `destination_folder` with its
+    contents. Nothing is touched if the hash doesn't match or the zip is invalid.
+    """
+    try: actual_bundle_hash = _file_sha256(bundle_path)
+    except OSError as e_read: error(f"MapBundle: Could not read bundle '{bundle_path}': {e_read}"); return False
+    if actual_bundle_hash != expected_bundle_hash:
+        error(f"MapBundle: Bundle '{bundle_path}' failed its checksum ({actual_bundle_hash[:12]} != {expected_bundle_hash[:12]})."); return False
+    staging_folder = destination_folder.rstrip("/\\") + ".extracting"
+    try:
+        if os.path.isdir(staging_folder): shutil.rmtree(staging_folder)
+        staging_root = os.path.realpath(staging_folder)
+        with zipfile.ZipFile(bundle_path, "r") as bundle_zip:
+            for zip_entry in bundle_zip.infolist():
+                target_path = os.path.realpath(os.path.join(staging_folder, zip_entry.filename))
+                if not target_path.startswith(staging_root + os.sep):
+                    error(f"MapBundle: Bundle entry '{zip_entry.filename}' escapes the map folder."); return False
+                if zip_entry.is_dir(): os.makedirs(target_path, exist_ok=True); continue
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                with bundle_zip.open(zip_entry) as f_entry, open(target_path, "wb") as f_out: shutil.copyfileobj(f_entry, f_out)
+        if os.path.isdir(destination_folder): shutil.rmtree(destination_folder)
+        os.replace(staging_folder, destination_folder)
+    except (OSError, zipfile.BadZipFile) as e_extract:
+        error(f"MapBundle: Could not extract bundle '{bundle_path}': {e_extract}")
+        shutil.rmtree(staging_folder, ignore_errors=True); return False
+    debug(f"MapBundle: Extracted '{bundle_path}' into '{destination_folder}'.")
+    return True
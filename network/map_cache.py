@@ -0,0 +1,155 @@
+# map_cache.py
+# -*- coding: utf-8 -*-
+"""
+Client-side content-addressed map cache.
+Every map bundle the client has downloaded is kept extracted under
+maps/.cache/<content hash>/, and maps/.cache/index.json records those entries
+plus, for each installed map folder (maps/<name>/), the content hash it was
+installed with and a stat fingerprint (paths, sizes, mtimes) of its files.
+installed_hash() trusts the recorded hash while the fingerprint still matches, so
+checking a map costs a few stat() calls instead of reading it; an edited or
+replaced folder no longer matches and is re-hashed. A host whose map version was
+seen before is installed straight from the cache without a download.
+MODIFIED: Content hashes name cache folders that get rmtree'd, so anything that isn't a sha256
+          hex digest (from the server or a hand-edited index) is rejected before it reaches a path.
+"""
+# version 1.0.1 (Reject malformed content hashes)
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+
+from network.map_bundle import list_map_files, compute_map_content_hash, extract_map_bundle, is_safe_map_name, is_valid_content_hash
+
+try:
+    from main_game.logger import debug, warning, error
+except ImportError:
+    def debug(msg, *args, **kwargs): print(f"DEBUG_MAP_CACHE: {msg}")
+    def warning(msg, *args, **kwargs): print(f"WARNING_MAP_CACHE: {msg}")
+    def error(msg, *args, **kwargs): print(f"ERROR_MAP_CACHE: {msg}")
+
+
+CACHE_FOLDER_NAME = ".cache"
+_INDEX_FILE_NAME = "index.json"
+
+
+def _folder_fingerprint(map_folder: str) -> Optional[str]:
+    """Cheap identity of a folder's files from stat() alone; changes when any file is added, removed or rewritten."""
+    if not os.path.isdir(map_folder): return None
+    fingerprint_hasher = hashlib.sha1()
+    try:
+        for relative_path, abs_path in list_map_files(map_folder):
+            file_stat = os.stat(abs_path)
+            fingerprint_hasher.update(f"{relative_path}\0{file_stat.st_size}\0{file_stat.st_mtime_ns}\n".encode("utf-8"))
+    except OSError: return None
+    return fingerprint_hasher.hexdigest()
+
+
+class MapCache:
+    def __init__(self, maps_base_dir: str, max_entries: int = 16):
+        self.maps_base_dir = maps_base_dir
+        self.cache_dir = os.path.join(maps_base_dir, CACHE_FOLDER_NAME)
+        self.index_path = os.path.join(self.cache_dir, _INDEX_FILE_NAME)
+        self.max_entries = max(1, int(max_entries))
+        self.entries: Dict[str, Dict[str, Any]] = {} # content hash -> {"name", "bundle_hash", "last_used"}
+        self.installed: Dict[str, Dict[str, Any]] = {} # map name -> {"content_hash", "fingerprint"}
+        self._load_index()
+
+    # --- Index ---
+    def _load_index(self):
+        if not os.path.exists(self.index_path): return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f_index: index_data = json.load(f_index)
+            self.entries = {h: e for h, e in index_data.get("entries", {}).items() if is_valid_content_hash(h) and os.path.isdir(self._entry_dir(h))}
+            self.installed = {name: record for name, record in index_data.get("installed", {}).items()
+                              if is_safe_map_name(name) and is_valid_content_hash(record.get("content_hash"))}
+        except (OSError, ValueError, AttributeError) as e_index:
+            warning(f"MapCache: Ignoring unreadable index '{self.index_path}': {e_index}")
+            self.entries, self.installed = {}, {}
+
+    def _save_index(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_index_path = self.index_path + ".tmp"
+            with open(temp_index_path, "w", encoding="utf-8") as f_index:
+                json.dump({"entries": self.entries, "installed": self.installed}, f_index, indent=1, sort_keys=True)
+            os.replace(temp_index_path, self.index_path)
+        except OSError as e_save: error(f"MapCache: Could not save index: {e_save}")
+
+    def _entry_dir(self, content_hash: str) -> str:
+        if not is_valid_content_hash(content_hash): raise ValueError(f"Not a content hash: {content_hash!r}") # Callers check first; never join anything else
+        return os.path.join(self.cache_dir, content_hash)
+
+    # --- Lookups ---
+    def installed_hash(self, map_name: str) -> Optional[str]:
+        """Content hash of maps/<map_name>/ as it is on disk now; None if it doesn't exist."""
+        if not is_safe_map_name(map_name): return None
+        map_folder = os.path.join(self.maps_base_dir, map_name)
+        current_fingerprint = _folder_fingerprint(map_folder)
+        if current_fingerprint is None: self.installed.pop(map_name, None); return None
+        installed_record = self.installed.get(map_name)
+        if installed_record and installed_record.get("fingerprint") == current_fingerprint:
+            return installed_record.get("content_hash")
+        content_hash = compute_map_content_hash(map_folder) # First sight of this folder, or it changed since
+        if content_hash:
+            debug(f"MapCache: Hashed local map '{map_name}': {content_hash[:12]}.")
+            self.installed[map_name] = {"content_hash": content_hash, "fingerprint": current_fingerprint}
+            self._save_index()
+        return content_hash
+
+    def has(self, content_hash: Optional[str]) -> bool:
+        return is_valid_content_hash(content_hash) and content_hash in self.entries
+
+    def get_manifest(self) -> Dict[str, Any]:
+        """What this client holds, sent to the server when joining: installed map versions and cached ones."""
+        return {"installed": {name: record.get("content_hash") for name, record in self.installed.items()},
+                "cached": sorted(self.entries.keys())}
+
+    # --- Updates ---
+    def store_bundle(self, bundle_path: str, map_name: str, bundle_hash: str, content_hash: str) -> bool:
+        """Verifies and extracts a downloaded bundle into the cache under its content hash."""
+        if not is_valid_content_hash(content_hash) or not is_valid_content_hash(bundle_hash):
+            warning(f"MapCache: Refusing bundle for '{map_name}' with malformed hashes ({str(content_hash)[:16]!r}, {str(bundle_hash)[:16]!r})."); return False
+        entry_dir = self._entry_dir(content_hash)
+        if not extract_map_bundle(bundle_path, entry_dir, bundle_hash): return False
+        extracted_content_hash = compute_map_content_hash(entry_dir)
+        if extracted_content_hash != content_hash: # Bundle is intact but isn't the map version the server announced
+            error(f"MapCache: Bundle for '{map_name}' holds {str(extracted_content_hash)[:12]}, expected {content_hash[:12]}.")
+            shutil.rmtree(entry_dir, ignore_errors=True); return False
+        self.entries[content_hash] = {"name": map_name, "bundle_hash": bundle_hash, "last_used": time.time()}
+        self._evict_old_entries(keep=content_hash)
+        self._save_index()
+        return True
+
+    def install(self, content_hash: str, map_name: str) -> bool:
+        """Replaces maps/<map_name>/ with the cached map version `content_hash`."""
+        if not self.has(content_hash) or not is_safe_map_name(map_name): return False
+        map_folder = os.path.join(self.maps_base_dir, map_name)
+        staging_folder = map_folder + ".installing"
+        try:
+            if os.path.isdir(staging_folder): shutil.rmtree(staging_folder)
+            shutil.copytree(self._entry_dir(content_hash), staging_folder)
+            staged_init_py = os.path.join(staging_folder, "__init__.py")
+            if not os.path.exists(staged_init_py): # Map folders are imported as maps.<name>.<name>
+                with open(staged_init_py, "w") as f_init_map: f_init_map.write(f"# Map-specific __init__.py for {map_name} (auto-created by client)\n")
+            if os.path.isdir(map_folder): shutil.rmtree(map_folder)
+            os.replace(staging_folder, map_folder)
+        except OSError as e_install:
+            error(f"MapCache: Could not install '{map_name}' ({content_hash[:12]}): {e_install}")
+            shutil.rmtree(staging_folder, ignore_errors=True); return False
+        self.entries[content_hash]["last_used"] = time.time()
+        self.installed[map_name] = {"content_hash": content_hash, "fingerprint": _folder_fingerprint(map_folder)}
+        self._save_index()
+        debug(f"MapCache: Installed '{map_name}' version {content_hash[:12]} from the cache.")
+        return True
+
+    def _evict_old_entries(self, keep: str):
+        removable_hashes: List[str] = sorted((h for h in self.entries if h != keep), key=lambda h: self.entries[h].get("last_used", 0.0))
+        while len(self.entries) > self.max_entries and removable_hashes:
+            evicted_hash = removable_hashes.pop(0)
+            shutil.rmtree(self._entry_dir(evicted_hash), ignore_errors=True)
+            self.entries.pop(evicted_hash, None)
+            debug(f"MapCache: Evicted cached map version {evicted_hash[:12]}.")
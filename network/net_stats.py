@@ -0,0 +1,127 @@
+# net_stats.py
+# -*- coding: utf-8 -*-
+"""
+Network statistics for one connection, kept by both the server (per client) and
+the client. Either side sends {"command": "ping", "t": ms} on a timer; the peer
+echoes it straight back from its network loop as "pong" (the server adds its
+recent tick time), and RttEstimator turns the round trips into a smoothed RTT
+(EWMA, 1/8 gain) and jitter (mean deviation, 1/16 gain, as in RFC 3550).
+Bytes and messages per direction are cumulative counters owned by the
+transport (StreamConnection, UDP send/recv); RateMeter samples them into
+per-second rates. The client also counts snapshots applied, skipped (stale,
+undecodable or superseded) and frames extrapolated, so a bad session can be
+told apart: high RTT/jitter or loss is the network, a high server tick time is
+server CPU, and a slow local frame (tick profiler) is client CPU.
+"""
+# version 1.0.0 (RTT/jitter estimators and per-direction rates)
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+import main_game.constants as C
+
+
+def monotonic_ms() -> float:
+    return time.monotonic() * 1000.0
+
+
+class RttEstimator:
+    def __init__(self):
+        self.samples = 0
+        self.last_ms: Optional[float] = None
+        self.smoothed_ms: Optional[float] = None
+        self.jitter_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms: Optional[float] = None
+
+    def add_sample(self, rtt_ms: float):
+        rtt_ms = max(0.0, float(rtt_ms))
+        if self.last_ms is not None: self.jitter_ms += (abs(rtt_ms - self.last_ms) - self.jitter_ms) / 16.0
+        self.smoothed_ms = rtt_ms if self.smoothed_ms is None else self.smoothed_ms + (rtt_ms - self.smoothed_ms) / 8.0
+        self.min_ms = rtt_ms if self.min_ms is None else min(self.min_ms, rtt_ms)
+        self.max_ms = rtt_ms if self.max_ms is None else max(self.max_ms, rtt_ms)
+        self.last_ms = rtt_ms
+        self.samples += 1
+
+
+class RateMeter:
+    """Per-second rates of cumulative counters, refreshed at most every `interval_s`."""
+    def __init__(self, interval_s: float = 1.0):
+        self.interval_s = max(0.1, float(interval_s))
+        self._last_time: Optional[float] = None
+        self._last_totals: Dict[str, float] = {}
+        self.rates: Dict[str, float] = {}
+
+    def update(self, totals: Dict[str, float], now: Optional[float] = None) -> Dict[str, float]:
+        now = time.monotonic() if now is None else now
+        if self._last_time is None: self._last_time, self._last_totals = now, dict(totals)
+        elif now - self._last_time >= self.interval_s:
+            elapsed = now - self._last_time
+            self.rates = {name: (total - self._last_totals.get(name, 0.0)) / elapsed for name, total in totals.items()}
+            self._last_time, self._last_totals = now, dict(totals)
+        return self.rates
+
+
+class ConnectionStats:
+    """RTT, the peer's reported tick time and per-direction rates for one connection."""
+    def __init__(self):
+        self.rtt = RttEstimator()
+        self.rate_meter = RateMeter(getattr(C, 'NETWORK_STATS_REFRESH_S', 0.5))
+        self.ping_interval_s = float(getattr(C, 'NET_PING_INTERVAL_S', 0.5))
+        self.pings_sent = 0
+        self.pongs_received = 0
+        self.peer_tick_ms: Optional[float] = None # Server's average tick processing time (client side only)
+        self.snapshots_applied = 0
+        self.snapshots_skipped = 0
+        self.frames_extrapolated = 0
+        self.udp_datagrams_lost = 0
+
+    def make_ping(self) -> Dict[str, float]:
+        self.pings_sent += 1
+        return {"command": "ping", "t": monotonic_ms()}
+
+    def on_pong(self, message: Dict[str, object]) -> bool:
+        """Records the round trip of one of our pings. False if the pong is malformed."""
+        try: sent_ms = float(message.get("t")) # type: ignore[arg-type]
+        except (TypeError, ValueError): return False
+        self.pongs_received += 1
+        self.rtt.add_sample(monotonic_ms() - sent_ms)
+        peer_tick_ms = message.get("tick_ms")
+        if isinstance(peer_tick_ms, (int, float)): self.peer_tick_ms = float(peer_tick_ms)
+        return True
+
+    def update_rates(self, bytes_up: int, bytes_down: int, messages_up: int, messages_down: int) -> Dict[str, float]:
+        """Feeds the transport's cumulative counters ("up" is towards the server) and returns per-second rates."""
+        return self.rate_meter.update({"bytes_up": bytes_up, "bytes_down": bytes_down, "messages_up": messages_up, "messages_down": messages_down})
+
+    def summary(self) -> Dict[str, object]:
+        rates = self.rate_meter.rates
+        return {
+            'rtt_ms': self.rtt.smoothed_ms, 'rtt_min_ms': self.rtt.min_ms, 'rtt_max_ms': self.rtt.max_ms, 'jitter_ms': self.rtt.jitter_ms,
+            'pings_sent': self.pings_sent, 'pongs_received': self.pongs_received, 'server_tick_ms': self.peer_tick_ms,
+            'bytes_up_per_sec': rates.get("bytes_up", 0.0), 'bytes_down_per_sec': rates.get("bytes_down", 0.0),
+            'messages_up_per_sec': rates.get("messages_up", 0.0), 'messages_down_per_sec': rates.get("messages_down", 0.0),
+            'snapshots_applied': self.snapshots_applied, 'snapshots_skipped': self.snapshots_skipped,
+            'frames_extrapolated': self.frames_extrapolated, 'udp_datagrams_lost': self.udp_datagrams_lost,
+        }
+
+
+def format_rtt(stats: Dict[str, object]) -> str:
+    rtt_ms = stats.get('rtt_ms')
+    if not isinstance(rtt_ms, (int, float)): return "rtt --"
+    return f"rtt {rtt_ms:.1f}ms ±{float(stats.get('jitter_ms') or 0.0):.1f}"
+
+
+def format_rates(stats: Dict[str, object]) -> str:
+    return (f"up {float(stats.get('bytes_up_per_sec') or 0.0) / 1024.0:.1f}KB/s {float(stats.get('messages_up_per_sec') or 0.0):.0f}msg/s "
+            f"down {float(stats.get('bytes_down_per_sec') or 0.0) / 1024.0:.1f}KB/s {float(stats.get('messages_down_per_sec') or 0.0):.0f}msg/s")
+
+
+def format_client_overlay_lines(stats: Dict[str, object]) -> List[str]:
+    """Lines for the client's F3 overlay."""
+    server_tick_ms = stats.get('server_tick_ms')
+    server_tick_text = f" srv tick {server_tick_ms:.1f}ms" if isinstance(server_tick_ms, (int, float)) else ""
+    return [f"net {format_rtt(stats)}{server_tick_text}",
+            f"net {format_rates(stats)}",
+            f"snap applied={stats.get('snapshots_applied', 0)} skipped={stats.get('snapshots_skipped', 0)} "
+            f"extrap={stats.get('frames_extrapolated', 0)} udp lost={stats.get('udp_datagrams_lost', 0)}"]
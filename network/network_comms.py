@@ -1,11 +1,42 @@
 # network_comms.py
 # -*- coding: utf-8 -*-
-# version 1.0000000.1
+# version 1.4.0 (StreamDecoder: incremental recv_into decoding without buffer re-copies)
 """
 Networking utilities for data encoding/decoding and IP retrieval.
+Control messages are newline-delimited JSON. Game state snapshots are binary
+frames (BINARY_FRAME_MAGIC + uint32 length + payload) on the same stream, so
+StreamDecoder (and decode_data_stream for one-off buffers) returns dicts for JSON
+lines and bytes for binary frames.
+
+Snapshot protocol (SNAPSHOT_PROTOCOL_VERSION):
+    header  <BBIIH  version, msg type, seq, baseline seq (0 = full), record count
+    record  <BB     entity kind, op (update/remove), then key (u16 len + utf-8),
+                    and for updates a <Q dirty mask followed by the dirty fields
+Each entity kind has a fixed field schema; fields not in the schema travel in a
+trailing JSON 'extras' field. The server deltas against the newest snapshot the
+client has acknowledged, so only entities/fields that changed since then are sent.
+
+UDP game channel: per-frame snapshots (server -> client) and input (client -> server)
+can also travel as datagrams, <2sBII magic, kind, session token, seq, followed by the
+payload. Datagrams are unreliable and unordered; SequenceFilter drops anything older
+than the newest one already accepted, so a lost packet never delays later ones.
 """
 import socket
 import json
+import struct
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import main_game.constants as C
+
+try:
+    from main_game.logger import warning
+except ImportError:
+    def warning(msg, *args, **kwargs): print(f"WARNING_NETWORK_COMMS: {msg}")
+
+
+BINARY_FRAME_MAGIC = b'\x00' # JSON lines always start with '{', so a NUL byte marks a binary frame
+_FRAME_HEADER = struct.Struct('<cI')
 
 def get_local_ip():
     """Gets the local IP address of the machine."""
@@ -33,23 +64,462 @@ def encode_data(data):
         print(f"Unexpected Encoding Error: {e}")
         return None
 
+def encode_binary_frame(payload: bytes) -> bytes:
+    """Wraps a binary payload so it can share the stream with newline-delimited JSON."""
+    return _FRAME_HEADER.pack(BINARY_FRAME_MAGIC, len(payload)) + payload
+
+class StreamDecoder:
+    """
+    Incremental decoder for one TCP stream of newline-delimited JSON messages and
+    length-prefixed binary frames. Received bytes land directly in a reusable
+    bytearray (recv_into) between a read and a write cursor, so a message that
+    arrives in many small recvs is never re-copied or re-scanned as the buffer grows:
+    the newline search resumes where it stopped, and a partial binary frame reserves
+    room for its full length so the rest arrives in place. Unread bytes are moved to
+    the front only when the free space runs out. Each decoded message is copied out
+    once (a dict for JSON, bytes for a frame payload), since the buffer is reused.
+    """
+    def __init__(self, initial_capacity: int = 65536, max_message_bytes: int = 0):
+        self._buffer = bytearray(max(1024, int(initial_capacity)))
+        self._view = memoryview(self._buffer)
+        self._read_pos = 0
+        self._write_pos = 0
+        self._newline_scan_pos = 0 # Bytes before this (from _read_pos) hold no newline
+        self._needed_bytes = 0 # Total size of the partial frame at _read_pos, if known
+        self.max_message_bytes = int(max_message_bytes or getattr(C, "STREAM_DECODER_MAX_MESSAGE_BYTES", 64 * 1024 * 1024))
+        # Metrics
+        self.compactions = 0
+        self.reallocations = 0
+
+    def pending_bytes(self) -> int:
+        return self._write_pos - self._read_pos
+
+    def pending_data(self) -> bytes:
+        return bytes(self._view[self._read_pos:self._write_pos])
+
+    def recv_into(self, sock: socket.socket, min_free_bytes: int = 8192) -> int:
+        """Receives into the free space (at least min_free_bytes). Returns the count; 0 means the peer closed."""
+        self._reserve(max(int(min_free_bytes), self._needed_bytes - self.pending_bytes()))
+        received_count = sock.recv_into(self._view[self._write_pos:])
+        self._write_pos += received_count
+        return received_count
+
+    def free_bytes(self) -> int:
+        return len(self._buffer) - self._write_pos
+
+    def feed(self, data: bytes):
+        """Appends bytes that were received elsewhere (datagrams, tests)."""
+        if not data: return
+        self._reserve(len(data))
+        self._view[self._write_pos:self._write_pos + len(data)] = data
+        self._write_pos += len(data)
+
+    def decode(self) -> List[Any]:
+        """
+        Returns every complete message in the buffer. Malformed JSON lines are skipped; a message
+        longer than max_message_bytes raises ValueError (the stream is corrupt or hostile).
+        """
+        decoded_objects: List[Any] = []
+        buffer, view = self._buffer, self._view
+        while self._read_pos < self._write_pos:
+            if buffer[self._read_pos] == BINARY_FRAME_MAGIC[0]:
+                if self.pending_bytes() < _FRAME_HEADER.size: break
+                _magic, payload_length = _FRAME_HEADER.unpack_from(buffer, self._read_pos)
+                if payload_length > self.max_message_bytes: raise ValueError(f"Binary frame of {payload_length} bytes exceeds the limit")
+                frame_end = self._read_pos + _FRAME_HEADER.size + payload_length
+                if frame_end > self._write_pos: self._needed_bytes = frame_end - self._read_pos; break
+                decoded_objects.append(bytes(view[self._read_pos + _FRAME_HEADER.size:frame_end]))
+                self._read_pos = frame_end
+                self._needed_bytes = 0
+                continue
+            newline_index = buffer.find(b'\n', max(self._read_pos, self._newline_scan_pos), self._write_pos)
+            if newline_index < 0:
+                if self.pending_bytes() > self.max_message_bytes: raise ValueError(f"JSON line exceeds {self.max_message_bytes} bytes without a newline")
+                self._newline_scan_pos = self._write_pos
+                break
+            message_start, self._read_pos = self._read_pos, newline_index + 1
+            if newline_index == message_start: continue # Skip empty messages (e.g. if multiple newlines)
+            try:
+                decoded_objects.append(json.loads(view[message_start:newline_index].tobytes()))
+            except (ValueError, UnicodeDecodeError):
+                continue # Skip malformed JSON
+        if self._read_pos == self._write_pos: # Everything consumed: start over at the front for free
+            self._read_pos = self._write_pos = self._newline_scan_pos = 0
+        return decoded_objects
+
+    def _reserve(self, free_bytes_needed: int):
+        if self.free_bytes() >= free_bytes_needed: return
+        unread_count = self.pending_bytes()
+        scan_offset = max(0, self._newline_scan_pos - self._read_pos)
+        if unread_count + free_bytes_needed <= len(self._buffer): # Compact: move the unread tail to the front
+            if unread_count: self._buffer[:unread_count] = self._view[self._read_pos:self._write_pos].tobytes()
+            self.compactions += 1
+        else: # Grow; the old buffer can't be resized while memoryviews of it exist
+            new_buffer = bytearray(max(len(self._buffer) * 2, unread_count + free_bytes_needed))
+            new_buffer[:unread_count] = self._view[self._read_pos:self._write_pos]
+            self._view.release()
+            self._buffer, self._view = new_buffer, memoryview(new_buffer)
+            self.reallocations += 1
+        self._read_pos, self._write_pos = 0, unread_count
+        self._newline_scan_pos = scan_offset
+
+
 def decode_data_stream(byte_buffer):
     """
-    Decodes a stream of newline-delimited JSON byte data.
-    Returns a list of decoded objects and the remaining unparsed buffer.
+    Decodes a stream of newline-delimited JSON messages and length-prefixed binary frames.
+    Returns a list of decoded objects (dict for JSON, bytes for binary frame payloads)
+    and the remaining unparsed buffer. For one-off buffers such as datagrams; streams use StreamDecoder.
     """
-    decoded_objects = []
-    remaining_buffer = byte_buffer
-    while b'\n' in remaining_buffer:
-        message, remaining_buffer = remaining_buffer.split(b'\n', 1)
-        if not message:  # Skip empty messages (e.g. if multiple newlines)
-            continue
+    if not byte_buffer: return [], b""
+    stream_decoder = StreamDecoder(len(byte_buffer))
+    stream_decoder.feed(byte_buffer)
+    try: decoded_objects = stream_decoder.decode()
+    except ValueError: return [], b"" # Oversized message: nothing usable in this buffer
+    return decoded_objects, stream_decoder.pending_data()
+
+
+# --- Snapshot protocol ---
+SNAPSHOT_PROTOCOL_VERSION = 3 # 2: globals carry server_time_ms, 3: players carry last_input_seq
+MSG_TYPE_SNAPSHOT = 1
+OP_UPDATE = 0
+OP_REMOVE = 1
+
+_SNAPSHOT_HEADER = struct.Struct('<BBIIH')
+_RECORD_HEADER = struct.Struct('<BB')
+_U8 = struct.Struct('<B')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+_I32 = struct.Struct('<i')
+_I64 = struct.Struct('<q')
+_F32 = struct.Struct('<f')
+_F64 = struct.Struct('<d')
+_VEC2 = struct.Struct('<ff')
+
+# Field types: '?' bool, 'n' number (int/float/None, tagged), 'f' float32,
+# 'v' (x, y) float32 pair, 's' str, 'j' any JSON value
+def _pack_bool(out: bytearray, value: Any): out += _U8.pack(1 if value else 0)
+def _unpack_bool(buf: memoryview, offset: int) -> Tuple[Any, int]: return buf[offset] != 0, offset + 1
+
+def _pack_float32(out: bytearray, value: Any): out += _F32.pack(float(value))
+def _unpack_float32(buf: memoryview, offset: int) -> Tuple[Any, int]: return _F32.unpack_from(buf, offset)[0], offset + 4
+
+def _pack_vec2(out: bytearray, value: Any): out += _VEC2.pack(float(value[0]), float(value[1]))
+def _unpack_vec2(buf: memoryview, offset: int) -> Tuple[Any, int]: return _VEC2.unpack_from(buf, offset), offset + 8
+
+def _pack_str(out: bytearray, value: Any):
+    encoded = str(value).encode('utf-8')
+    out += _U16.pack(len(encoded)); out += encoded
+def _unpack_str(buf: memoryview, offset: int) -> Tuple[Any, int]:
+    length = _U16.unpack_from(buf, offset)[0]; offset += 2
+    return bytes(buf[offset:offset + length]).decode('utf-8'), offset + length
+
+def _pack_json(out: bytearray, value: Any):
+    encoded = json.dumps(value, separators=(',', ':')).encode('utf-8')
+    out += _U32.pack(len(encoded)); out += encoded
+def _unpack_json(buf: memoryview, offset: int) -> Tuple[Any, int]:
+    length = _U32.unpack_from(buf, offset)[0]; offset += 4
+    return json.loads(bytes(buf[offset:offset + length]).decode('utf-8')), offset + length
+
+_NUM_I32, _NUM_I64, _NUM_F64, _NUM_NONE, _NUM_BOOL, _NUM_JSON = range(6)
+def _pack_number(out: bytearray, value: Any):
+    if value is None: out += _U8.pack(_NUM_NONE)
+    elif isinstance(value, bool): out += _U8.pack(_NUM_BOOL); out += _U8.pack(1 if value else 0)
+    elif isinstance(value, int):
+        if -2147483648 <= value <= 2147483647: out += _U8.pack(_NUM_I32); out += _I32.pack(value)
+        elif -9223372036854775808 <= value <= 9223372036854775807: out += _U8.pack(_NUM_I64); out += _I64.pack(value)
+        else: out += _U8.pack(_NUM_JSON); _pack_json(out, value)
+    elif isinstance(value, float): out += _U8.pack(_NUM_F64); out += _F64.pack(value)
+    else: out += _U8.pack(_NUM_JSON); _pack_json(out, value)
+def _unpack_number(buf: memoryview, offset: int) -> Tuple[Any, int]:
+    tag = buf[offset]; offset += 1
+    if tag == _NUM_I32: return _I32.unpack_from(buf, offset)[0], offset + 4
+    if tag == _NUM_F64: return _F64.unpack_from(buf, offset)[0], offset + 8
+    if tag == _NUM_NONE: return None, offset
+    if tag == _NUM_BOOL: return buf[offset] != 0, offset + 1
+    if tag == _NUM_I64: return _I64.unpack_from(buf, offset)[0], offset + 8
+    return _unpack_json(buf, offset)
+
+_FIELD_CODECS: Dict[str, Tuple[Callable[[bytearray, Any], None], Callable[[memoryview, int], Tuple[Any, int]]]] = {
+    '?': (_pack_bool, _unpack_bool), 'n': (_pack_number, _unpack_number),
+    'f': (_pack_float32, _unpack_float32), 'v': (_pack_vec2, _unpack_vec2),
+    's': (_pack_str, _unpack_str), 'j': (_pack_json, _unpack_json),
+}
+
+# Entity kinds and their field schemas, mirroring the get_network_data() dicts.
+KIND_GLOBALS, KIND_PLAYER, KIND_ENEMY, KIND_STATUE, KIND_CHEST, KIND_PROJECTILE = range(6)
+
+_SNAPSHOT_SCHEMAS: Dict[int, Tuple[Tuple[str, str], ...]] = {
+    KIND_GLOBALS: (('map_name', 'j'), ('game_over', '?'), ('server_time_ms', 'n')),
+    KIND_PLAYER: (
+        ('player_id', 'n'), ('_valid_init', '?'), ('pos', 'v'), ('vel', 'v'),
+        ('facing_right', '?'), ('state', 's'), ('current_frame', 'n'), ('last_anim_update', 'n'),
+        ('current_health', 'n'), ('is_dead', '?'), ('death_animation_finished', '?'),
+        ('is_attacking', '?'), ('attack_type', 'j'), ('is_crouching', '?'), ('is_dashing', '?'),
+        ('is_rolling', '?'), ('is_sliding', '?'), ('on_ladder', '?'), ('is_taking_hit', '?'),
+        ('hit_timer', 'n'), ('fireball_aim_x', 'f'), ('fireball_aim_y', 'f'),
+        ('is_aflame', '?'), ('aflame_timer_start', 'n'), ('is_deflaming', '?'), ('deflame_timer_start', 'n'),
+        ('is_frozen', '?'), ('is_defrosting', '?'), ('frozen_effect_timer', 'n'),
+        ('is_petrified', '?'), ('is_stone_smashed', '?'), ('stone_smashed_timer_start', 'n'),
+        ('facing_at_petrification', '?'), ('was_crouching_when_petrified', '?'),
+        ('last_input_seq', 'n'), # Newest client input command the server applied to this player (None if local)
+    ),
+    KIND_ENEMY: (
+        ('enemy_id', 'j'), ('_valid_init', '?'), ('pos', 'v'), ('vel', 'v'),
+        ('facing_right', '?'), ('state', 's'), ('ai_state', 'j'), ('current_frame', 'n'), ('last_anim_update', 'n'),
+        ('current_health', 'n'), ('max_health', 'n'), ('is_dead', '?'), ('death_animation_finished', '?'),
+        ('is_attacking', '?'), ('attack_type', 'j'), ('attack_timer', 'n'), ('attack_cooldown_timer', 'n'),
+        ('is_taking_hit', '?'), ('hit_timer', 'n'), ('post_attack_pause_timer', 'n'), ('color_name', 'j'),
+        ('is_stomp_dying', '?'), ('stomp_death_start_time', 'n'), ('original_stomp_facing_right', '?'),
+        ('is_frozen', '?'), ('is_defrosting', '?'), ('frozen_effect_timer', 'n'),
+        ('is_aflame', '?'), ('aflame_timer_start', 'n'), ('is_deflaming', '?'), ('deflame_timer_start', 'n'),
+        ('overall_fire_effect_start_time', 'n'), ('has_ignited_another_enemy_this_cycle', '?'),
+        ('is_petrified', '?'), ('is_stone_smashed', '?'), ('stone_smashed_timer_start', 'n'),
+        ('facing_at_petrification', '?'), ('is_zapped', '?'), ('zapped_timer_start', 'n'),
+        ('zapped_damage_last_tick', 'n'), ('class_type', 's'), ('on_ground', '?'), ('patrol_target_x', 'n'),
+        ('properties', 'j'),
+    ),
+    KIND_STATUE: (
+        ('id', 'j'), ('type', 's'), ('pos', 'v'), ('vel_y', 'n'), ('on_ground', '?'), ('is_smashed', '?'),
+        ('smashed_timer_start', 'n'), ('current_frame_index', 'n'), ('_valid_init', '?'), ('_alive', '?'),
+        ('is_dead', '?'), ('death_animation_finished', '?'), ('properties', 'j'),
+    ),
+    KIND_CHEST: (
+        ('pos_midbottom', 'v'), ('vel_x', 'n'), ('vel_y', 'n'), ('on_ground', '?'), ('is_collected_internal', '?'),
+        ('chest_state', 's'), ('animation_timer', 'n'), ('opened_visible_start_time', 'n'), ('fading_start_time', 'n'),
+        ('current_frame_index', 'n'), ('alpha', 'n'), ('_alive', '?'), ('_valid_init', '?'),
+    ),
+    KIND_PROJECTILE: (
+        ('id', 'j'), ('type', 's'), ('pos', 'v'), ('vel', 'v'), ('owner_id', 'j'), ('frame', 'n'),
+        ('spawn_time', 'n'), ('image_flipped', '?'), ('effect_type', 'j'),
+    ),
+}
+
+class _KindCodec:
+    """Precomputed per-kind field names, packers and unpackers. The last mask bit is the JSON extras field."""
+    __slots__ = ("names", "name_set", "packers", "unpackers", "nullable", "extras_bit")
+    def __init__(self, schema: Tuple[Tuple[str, str], ...]):
+        if len(schema) >= 64: raise ValueError("Snapshot schema has too many fields for a 64-bit dirty mask.")
+        self.names = tuple(name for name, _ in schema)
+        self.name_set = frozenset(self.names)
+        self.packers = tuple(_FIELD_CODECS[field_type][0] for _, field_type in schema)
+        self.unpackers = tuple(_FIELD_CODECS[field_type][1] for _, field_type in schema)
+        self.nullable = tuple(field_type in ('n', 'j') for _, field_type in schema) + (True,)
+        self.extras_bit = len(schema)
+
+    def to_values(self, data: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Flattens an entity dict to (schema values..., extras dict or None) for cheap comparison."""
+        extras = {key: value for key, value in data.items() if key not in self.name_set}
+        return tuple(data.get(name) for name in self.names) + (extras or None,)
+
+_KIND_CODECS: Dict[int, _KindCodec] = {kind: _KindCodec(schema) for kind, schema in _SNAPSHOT_SCHEMAS.items()}
+
+SnapshotKey = Tuple[int, str]
+
+def _flatten_network_state(network_state: Dict[str, Any]) -> Dict[SnapshotKey, Tuple[Any, ...]]:
+    """Turns a get_network_game_state() dict into {(kind, key): values} for delta comparison."""
+    table: Dict[SnapshotKey, Tuple[Any, ...]] = {}
+    table[(KIND_GLOBALS, "")] = _KIND_CODECS[KIND_GLOBALS].to_values(
+        {'map_name': network_state.get('map_name'), 'game_over': bool(network_state.get('game_over', False)),
+         'server_time_ms': network_state.get('server_time_ms')})
+    player_codec = _KIND_CODECS[KIND_PLAYER]
+    for i in range(1, 5):
+        player_data = network_state.get(f"p{i}")
+        if isinstance(player_data, dict): table[(KIND_PLAYER, f"p{i}")] = player_codec.to_values(player_data)
+    enemy_codec = _KIND_CODECS[KIND_ENEMY]
+    enemies_data = network_state.get('enemies') or {}
+    if isinstance(enemies_data, dict):
+        for enemy_key, enemy_data in enemies_data.items():
+            if isinstance(enemy_data, dict): table[(KIND_ENEMY, str(enemy_key))] = enemy_codec.to_values(enemy_data)
+    statue_codec = _KIND_CODECS[KIND_STATUE]
+    for statue_data in network_state.get('statues') or []:
+        if isinstance(statue_data, dict) and 'id' in statue_data: table[(KIND_STATUE, str(statue_data['id']))] = statue_codec.to_values(statue_data)
+    chest_data = network_state.get('chest')
+    if isinstance(chest_data, dict): table[(KIND_CHEST, "")] = _KIND_CODECS[KIND_CHEST].to_values(chest_data)
+    projectile_codec = _KIND_CODECS[KIND_PROJECTILE]
+    for projectile_data in network_state.get('projectiles') or []:
+        if isinstance(projectile_data, dict) and 'id' in projectile_data: table[(KIND_PROJECTILE, str(projectile_data['id']))] = projectile_codec.to_values(projectile_data)
+    return table
+
+
+class SnapshotEncoder:
+    """
+    Server side, one per connection. encode() turns a get_network_game_state() dict into a
+    framed binary snapshot that only carries what changed since the last acknowledged one.
+    """
+    def __init__(self, history_size: int = getattr(C, 'SNAPSHOT_HISTORY_SIZE', 64)):
+        self.history_size = max(1, int(history_size))
+        self._history: "OrderedDict[int, Dict[SnapshotKey, Tuple[Any, ...]]]" = OrderedDict()
+        self._next_seq = 1
+        self.acked_seq = 0
+        self.full_snapshots_sent = 0
+        self.delta_snapshots_sent = 0
+        self.bytes_sent_total = 0
+        self.last_snapshot_bytes = 0
+
+    def acknowledge(self, seq: int):
+        """Client confirmed it decoded `seq`; later snapshots use it as their baseline."""
+        if seq <= self.acked_seq or seq not in self._history: return
+        self.acked_seq = seq
+        while self._history and next(iter(self._history)) < seq:
+            self._history.popitem(last=False)
+
+    def encode(self, network_state: Dict[str, Any]) -> bytes:
+        """Snapshot as a stream frame for the TCP connection (see encode_binary_frame)."""
+        return encode_binary_frame(self.encode_payload(network_state))
+
+    def encode_payload(self, network_state: Dict[str, Any]) -> bytes:
+        """Unframed snapshot payload, e.g. for a UDP datagram."""
+        table = _flatten_network_state(network_state)
+        baseline_seq = self.acked_seq if self.acked_seq in self._history else 0
+        baseline = self._history.get(baseline_seq, {}) if baseline_seq else {}
+        seq = self._next_seq; self._next_seq += 1
+
+        body = bytearray()
+        record_count = 0
+        for entity_key, values in table.items():
+            base_values = baseline.get(entity_key)
+            if base_values == values: continue
+            kind, key = entity_key
+            codec = _KIND_CODECS[kind]
+            dirty_mask = 0
+            nullable = codec.nullable
+            if base_values is None:
+                for bit, value in enumerate(values):
+                    if value is not None or (nullable[bit] and bit != codec.extras_bit): dirty_mask |= 1 << bit
+            else:
+                for bit, (value, base_value) in enumerate(zip(values, base_values)):
+                    if value != base_value and (value is not None or nullable[bit]): dirty_mask |= 1 << bit
+            body += _RECORD_HEADER.pack(kind, OP_UPDATE); _pack_str(body, key); body += _U64.pack(dirty_mask)
+            packers = codec.packers
+            for bit in range(codec.extras_bit):
+                if dirty_mask >> bit & 1: packers[bit](body, values[bit])
+            if dirty_mask >> codec.extras_bit & 1: _pack_json(body, values[codec.extras_bit] or {})
+            record_count += 1
+        for entity_key in baseline:
+            if entity_key not in table:
+                body += _RECORD_HEADER.pack(entity_key[0], OP_REMOVE); _pack_str(body, entity_key[1])
+                record_count += 1
+
+        self._history[seq] = table
+        while len(self._history) > self.history_size:
+            dropped_seq, _ = self._history.popitem(last=False)
+            if dropped_seq == self.acked_seq: self.acked_seq = 0 # Client stopped acking; next snapshot is full
+        payload = _SNAPSHOT_HEADER.pack(SNAPSHOT_PROTOCOL_VERSION, MSG_TYPE_SNAPSHOT, seq, baseline_seq, record_count) + bytes(body)
+        if baseline_seq: self.delta_snapshots_sent += 1
+        else: self.full_snapshots_sent += 1
+        self.last_snapshot_bytes = len(payload)
+        self.bytes_sent_total += len(payload)
+        return payload
+
+
+class SnapshotDecoder:
+    """
+    Client side. decode() applies a snapshot payload (from decode_data_stream) on top of its
+    baseline and returns the full state in get_network_game_state() form, or None if the
+    snapshot is stale, for another protocol version, or its baseline is unknown.
+    """
+    def __init__(self, history_size: int = getattr(C, 'SNAPSHOT_HISTORY_SIZE', 64)):
+        self.history_size = max(1, int(history_size))
+        self._tables: "OrderedDict[int, Dict[SnapshotKey, Dict[str, Any]]]" = OrderedDict()
+        self.latest_seq = 0
+        self.snapshots_decoded = 0
+        self.snapshots_rejected = 0
+
+    def decode(self, payload: bytes) -> Optional[Dict[str, Any]]:
+        buf = memoryview(payload)
+        if len(buf) < _SNAPSHOT_HEADER.size:
+            self.snapshots_rejected += 1; return None
+        version, msg_type, seq, baseline_seq, record_count = _SNAPSHOT_HEADER.unpack_from(buf, 0)
+        if version != SNAPSHOT_PROTOCOL_VERSION or msg_type != MSG_TYPE_SNAPSHOT:
+            warning(f"SnapshotDecoder: Unsupported snapshot (version {version}, type {msg_type}); expected version {SNAPSHOT_PROTOCOL_VERSION}.")
+            self.snapshots_rejected += 1; return None
+        if seq <= self.latest_seq:
+            self.snapshots_rejected += 1; return None # Stale or duplicate
+        if baseline_seq and baseline_seq not in self._tables:
+            warning(f"SnapshotDecoder: Baseline {baseline_seq} for snapshot {seq} is not available. Waiting for a full snapshot.")
+            self.snapshots_rejected += 1; return None
+        table = dict(self._tables[baseline_seq]) if baseline_seq else {}
+
+        offset = _SNAPSHOT_HEADER.size
         try:
-            decoded_objects.append(json.loads(message.decode('utf-8')))
-        except json.JSONDecodeError as e:
-            # print(f"JSON Decode Error: {e}. Malformed message: {message[:100]}") # Optional: log malformed
-            continue # Skip malformed JSON
-        except Exception as e:
-            # print(f"Unexpected Decode Error: {e}. Message: {message[:100]}") # Optional: log other errors
-            continue
-    return decoded_objects, remaining_buffer
\ No newline at end of file
+            for _ in range(record_count):
+                kind, op = _RECORD_HEADER.unpack_from(buf, offset); offset += _RECORD_HEADER.size
+                key, offset = _unpack_str(buf, offset)
+                entity_key = (kind, key)
+                if op == OP_REMOVE:
+                    table.pop(entity_key, None); continue
+                codec = _KIND_CODECS[kind]
+                dirty_mask = _U64.unpack_from(buf, offset)[0]; offset += 8
+                entity_data = dict(table.get(entity_key) or {}) # Copy: older tables in history share the baseline dict
+                unpackers = codec.unpackers
+                for bit in range(codec.extras_bit):
+                    if dirty_mask >> bit & 1:
+                        entity_data[codec.names[bit]], offset = unpackers[bit](buf, offset)
+                if dirty_mask >> codec.extras_bit & 1:
+                    extras, offset = _unpack_json(buf, offset)
+                    for stale_key in [k for k in entity_data if k not in codec.name_set]: del entity_data[stale_key]
+                    entity_data.update(extras)
+                table[entity_key] = entity_data
+        except (struct.error, KeyError, UnicodeDecodeError, ValueError) as e_decode:
+            warning(f"SnapshotDecoder: Malformed snapshot {seq}: {e_decode}")
+            self.snapshots_rejected += 1; return None
+
+        self._tables[seq] = table
+        for old_seq in [s for s in self._tables if s < baseline_seq]: del self._tables[old_seq] # Server never goes back past its acked baseline
+        while len(self._tables) > self.history_size: self._tables.popitem(last=False)
+        self.latest_seq = seq
+        self.snapshots_decoded += 1
+        return _expand_snapshot_table(table)
+
+
+def _expand_snapshot_table(table: Dict[SnapshotKey, Dict[str, Any]]) -> Dict[str, Any]:
+    state: Dict[str, Any] = {'p1': None, 'p2': None, 'p3': None, 'p4': None, 'enemies': {}, 'chest': None,
+                             'statues': [], 'projectiles': [], 'game_over': False, 'map_name': None, 'server_time_ms': None}
+    for (kind, key), entity_data in table.items():
+        if kind == KIND_PLAYER: state[key] = entity_data
+        elif kind == KIND_ENEMY: state['enemies'][key] = entity_data
+        elif kind == KIND_STATUE: state['statues'].append(entity_data)
+        elif kind == KIND_PROJECTILE: state['projectiles'].append(entity_data)
+        elif kind == KIND_CHEST: state['chest'] = entity_data
+        elif kind == KIND_GLOBALS:
+            state['map_name'] = entity_data.get('map_name'); state['game_over'] = bool(entity_data.get('game_over', False))
+            state['server_time_ms'] = entity_data.get('server_time_ms')
+    return state
+
+
+# --- UDP game channel ---
+UDP_DATAGRAM_MAGIC = b'PU'
+UDP_KIND_HELLO = 0     # client -> server: registers the client's UDP address (empty payload)
+UDP_KIND_SNAPSHOT = 1  # server -> client: snapshot payload (SnapshotEncoder.encode_payload)
+UDP_KIND_INPUT = 2     # client -> server: UTF-8 JSON {"inputs": [commands], "snapshot_ack": N}
+
+_UDP_HEADER = struct.Struct('<2sBII')
+UDP_HEADER_SIZE = _UDP_HEADER.size
+
+def encode_udp_datagram(kind: int, token: int, seq: int, payload: bytes = b"") -> bytes:
+    return _UDP_HEADER.pack(UDP_DATAGRAM_MAGIC, kind, token & 0xFFFFFFFF, seq & 0xFFFFFFFF) + payload
+
+def decode_udp_datagram(datagram: bytes) -> Optional[Tuple[int, int, int, bytes]]:
+    """Returns (kind, token, seq, payload), or None if the datagram isn't one of ours."""
+    if len(datagram) < _UDP_HEADER.size: return None
+    magic, kind, token, seq = _UDP_HEADER.unpack_from(datagram, 0)
+    if magic != UDP_DATAGRAM_MAGIC: return None
+    return kind, token, seq, datagram[_UDP_HEADER.size:]
+
+
+class SequenceFilter:
+    """Accepts only sequence numbers newer than the newest seen; counts stale drops and gaps (lost datagrams)."""
+    def __init__(self):
+        self.latest_seq = 0
+        self.accepted = 0
+        self.dropped_stale = 0
+        self.missing = 0
+
+    def accept(self, seq: int) -> bool:
+        if seq <= self.latest_seq:
+            self.dropped_stale += 1; return False
+        if self.latest_seq: self.missing += seq - self.latest_seq - 1
+        self.latest_seq = seq
+        self.accepted += 1
+        return True
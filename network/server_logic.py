@@ -6,21 +6,66 @@ UI updates are handled by emitting signals or using callbacks.
 Map paths now use map_name_folder/map_name_file.py structure.
 MODIFIED: Statue physics and lifecycle management in game loop.
 MODIFIED: Ensures statues are included in hittable targets for player attacks.
+MODIFIED: Game state goes out as binary delta snapshots (network_comms.SnapshotEncoder) against
+          the last snapshot the client acknowledged via "snapshot_ack", instead of full JSON.
+MODIFIED: Per-frame snapshots and client input use a sequenced UDP channel (SERVER_PORT_UDP_GAME)
+          once the client has registered its address; TCP keeps control commands, map transfer
+          and snapshots too large for one datagram.
+MODIFIED: Client input arrives as sequenced input commands ("inputs"), queued and applied one per
+          tick through apply_player_input_command; snapshots carry the last applied seq for P2
+          so the client can reconcile its predicted player.
+MODIFIED: Up to MAX_REMOTE_PLAYERS (3) clients, each a ClientConnection in ServerState.clients mapped
+          to player slots 2-4, with its own input queue, snapshot baseline, UDP session and send queue
+          (written by a per-client sender thread). Players may join mid-game; a disconnect frees the slot.
+MODIFIED: Networking runs on one event-driven loop (network.event_loop, `selectors`) instead of
+          handler/sender threads per client and a broadcast thread: it accepts connections, reads and
+          writes client streams, receives UDP input and sends discovery broadcasts on a timer. The map
+          sync wait blocks on ServerState.network_activity instead of sleeping.
+MODIFIED: Each client's send queue is bounded (SERVER_SEND_QUEUE_MAX_BYTES): a newer TCP snapshot
+          replaces an unsent one, snapshots are dropped while the queue is full, and a client whose
+          queue makes no progress for SERVER_SEND_STALL_TIMEOUT_S is disconnected. Queue depth, dropped
+          snapshots and bytes/sec per client go to game_elements["network_send_stats"] for the host UI.
+MODIFIED: Maps are sent as a compressed, checksummed bundle of the whole map folder (network.map_bundle)
+          in binary chunks instead of the .py as JSON text. set_map carries the content hash so a client
+          that already has the map skips the download; chunks are paced by the client's acknowledged
+          offset (MAP_TRANSFER_WINDOW_BYTES) and a request may resume from any offset.
+MODIFIED: Clients send their map cache manifest ("map_manifest") on connect; the server compares it with
+          the current map's content hash and shows whether each client's copy is current, cached, stale
+          or missing during map sync.
+MODIFIED: Interest management: each tick's state is indexed in a coarse InterestGrid and every client
+          only receives the enemies, statues and projectiles around the camera rect it reports ("view"),
+          with hysteresis margins. Entities leaving a client's relevance go out as OP_REMOVE despawns.
+MODIFIED: Network statistics (network.net_stats): the server pings each client (and answers client pings
+          with its average tick time), tracking RTT/jitter and bytes/messages per second per direction.
+          They're added to network_send_stats for the host overlay and logged every NET_STATS_LOG_INTERVAL_S.
+MODIFIED: The host simulation collides players, enemies, statues, projectiles and the chest against the
+          'platforms_grid' spatial index, and removes smashed/killed statues from it, as couch play does.
 """
-# version 2.0.8 (Statue targeting for player attacks)
+# version 2.10.1 (Platform spatial grid in the host simulation)
 
 import os
+import json
+import random
+import selectors
 import socket
 import threading
 import time
 import traceback
-from typing import Optional, Dict, Any, List
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple, Deque
 
 from PySide6.QtCore import QRectF, QPointF # For type checking
 
 # Game imports
 import main_game.constants as C
-from network.network_comms import get_local_ip, encode_data, decode_data_stream
+from network.network_comms import (get_local_ip, encode_data, decode_data_stream, encode_binary_frame,
+                                   SnapshotEncoder, SNAPSHOT_PROTOCOL_VERSION,
+                                   encode_udp_datagram, decode_udp_datagram, SequenceFilter,
+                                   UDP_KIND_SNAPSHOT, UDP_KIND_INPUT, UDP_HEADER_SIZE)
+from network.event_loop import NetworkEventLoop, StreamConnection
+from network.interest_management import ClientInterest, build_interest_grid
+from network.net_stats import ConnectionStats, format_rates, format_rtt
+from network.map_bundle import MapBundle, build_map_bundle, encode_map_chunk, is_safe_map_name
 from main_game.game_state_manager import get_network_game_state, reset_game_state
 from enemy.enemy import Enemy
 from main_game.items import Chest
@@ -28,6 +73,8 @@ from player.statue import Statue
 from main_game.tiles import Platform, Ladder, Lava, BackgroundTile
 import main_game.config as game_config # For accessing player properties if needed
 from player.player import Player # For type hinting and checks
+from player.player_input_handler import apply_player_input_command
+from main_game.spatial_grid import query_platforms
 
 try:
     from main_game.logger import info, debug, warning, error, critical
@@ -45,177 +92,455 @@ def get_current_ticks_monotonic() -> int:
 
 client_lock = threading.Lock()
 
+
+class ClientConnection:
+    """One remote player: its TCP connection, player slot, queued input, snapshot baseline and UDP session."""
+    def __init__(self, conn: socket.socket, address: Any, player_id: int):
+        self.conn = conn
+        self.address = address
+        self.player_id = player_id # Player slot 2..4 ("player{id}" in game_elements, "p{id}" in snapshots)
+        self.stream: Optional[StreamConnection] = None # Reads/writes conn on the server's network loop
+        self.disconnected = False # Set on the network loop when the stream closes; the main loop frees the slot
+
+        self.map_status: str = "waiting_client_report" # e.g. "waiting_client_report", "present", "missing", "downloading"
+        self.download_progress: float = 0.0
+        self.map_bundle: Optional[MapBundle] = None # Bundle being sent, if any
+        self.map_sent_offset: int = 0 # Bundle bytes queued so far
+        self.map_acked_offset: int = 0 # Bundle bytes the client has written; sending stays within a window of this
+        self.map_cache_state: str = "unknown" # From the client's manifest: "current", "cached", "stale" or "missing"
+        self.game_start_signaled: bool = False
+        self.ready: bool = False # Has the map and was told to start
+        self.in_game: bool = False # Its player is being simulated and sent
+
+        self.input_commands: Deque[Dict[str, Any]] = deque() # Input commands not yet applied, in seq order
+        self.last_received_input_seq: int = 0
+        self.last_processed_input_seq: int = 0 # Sent back in snapshots as this player's 'last_input_seq'
+        self.input_queue_max = max(1, int(getattr(C, "SERVER_INPUT_QUEUE_MAX", 6)))
+
+        self.acked_snapshot_seq: int = 0 # Newest snapshot the client has decoded (delta baseline)
+        self.snapshot_encoder: SnapshotEncoder = SnapshotEncoder() # Per client: each has its own baseline
+        self.interest: ClientInterest = ClientInterest() # Camera rect and the entities relevant to it
+        self.net_stats: ConnectionStats = ConnectionStats() # RTT from our pings, per-direction rates
+        self.udp_snapshots_sent: int = 0
+        self.udp_bytes_received: int = 0
+        self.udp_datagrams_received: int = 0
+        self.udp_snapshot_seq: int = 0
+        self.udp_token: int = random.getrandbits(32) # Sent to the client over TCP; datagrams without it are ignored
+        self.udp_address: Optional[Tuple[str, int]] = None # Learned from the client's first valid datagram
+        self.udp_input_filter: SequenceFilter = SequenceFilter()
+        self.udp_bytes_sent: int = 0
+        self.udp_snapshots_dropped: int = 0 # Socket buffer full
+
+        self._rate_sample_time = time.monotonic()
+        self._rate_sample_bytes = 0
+        self.bytes_per_sec: float = 0.0 # TCP + UDP, refreshed by get_send_stats()
+
+    def queue_send(self, data: Optional[bytes], replace_key: Optional[str] = None):
+        """
+        Queues data for the network loop to write; never blocks the caller. Frames with a
+        replace_key (snapshots) overwrite an unsent one and are dropped while the queue is full.
+        """
+        if not data or self.disconnected or not self.stream: return
+        self.stream.send(data, replace_key)
+
+    def get_send_stats(self) -> Dict[str, Any]:
+        stream = self.stream
+        self.net_stats.update_rates(self.udp_bytes_received + (stream.bytes_received if stream else 0),
+                                    self.udp_bytes_sent + (stream.bytes_sent if stream else 0),
+                                    self.udp_datagrams_received + (stream.messages_received if stream else 0),
+                                    self.udp_snapshots_sent + (stream.messages_sent if stream else 0))
+        total_bytes_sent = self.udp_bytes_sent + (stream.bytes_sent if stream else 0)
+        now = time.monotonic()
+        if now - self._rate_sample_time >= 1.0:
+            self.bytes_per_sec = (total_bytes_sent - self._rate_sample_bytes) / (now - self._rate_sample_time)
+            self._rate_sample_time, self._rate_sample_bytes = now, total_bytes_sent
+        return {
+            'queue_depth': stream.queue_depth() if stream else 0,
+            'queued_bytes': stream.pending_send_bytes() if stream else 0,
+            'peak_queued_bytes': stream.peak_queued_bytes if stream else 0,
+            'snapshots_replaced': stream.frames_replaced if stream else 0,
+            'snapshots_dropped': (stream.frames_dropped if stream else 0) + self.udp_snapshots_dropped,
+            'bytes_sent': total_bytes_sent,
+            'bytes_per_sec': self.bytes_per_sec,
+            'relevant_entities': self.interest.last_relevant_count,
+            'total_entities': self.interest.last_total_count,
+            'despawns': self.interest.despawns_total,
+            **self.net_stats.summary(),
+        }
+
+
 class ServerState:
     def __init__(self):
-        self.client_connection: Optional[socket.socket] = None
-        self.client_address: Optional[Any] = None
-        self.client_input_buffer: Dict[str, Any] = {}
+        self.clients: Dict[int, ClientConnection] = {} # Player slot -> connection
+        self.max_remote_players = max(1, min(3, int(getattr(C, "MAX_REMOTE_PLAYERS", 3))))
         self.app_running = True
         self.server_tcp_socket: Optional[socket.socket] = None
-        self.server_udp_socket: Optional[socket.socket] = None
-        self.broadcast_thread: Optional[threading.Thread] = None
-        self.client_handler_thread: Optional[threading.Thread] = None
+        self.server_udp_socket: Optional[socket.socket] = None # LAN discovery broadcasts
+        self.network_loop: Optional[NetworkEventLoop] = None # Accept, client I/O, UDP input and discovery
+        self.network_activity = threading.Event() # Set by the network loop when a client connects, reports map status or leaves
         
         self.service_name = getattr(C, "SERVICE_NAME", "platformer_adventure_lan_v1")
         self.discovery_port_udp = getattr(C, "DISCOVERY_PORT_UDP", 5556)
         self.server_port_tcp = getattr(C, "SERVER_PORT_TCP", 5555)
         self.buffer_size = int(getattr(C, "BUFFER_SIZE", 8192))
         self.broadcast_interval_s = float(getattr(C, "BROADCAST_INTERVAL_S", 1.0))
+        self.send_queue_max_bytes = int(getattr(C, "SERVER_SEND_QUEUE_MAX_BYTES", 262144))
+        self.send_stall_timeout_s = float(getattr(C, "SERVER_SEND_STALL_TIMEOUT_S", 5.0))
         
         self.current_map_name: Optional[str] = None # This should be folder_name/stem
-        self.client_map_status: str = "unknown" # e.g. "unknown", "present", "missing", "downloading"
-        self.client_download_progress: float = 0.0
-        self.game_start_signaled_to_client: bool = False
-        self.client_ready: bool = False # True when client has map and server has signaled game start
-
-
-def broadcast_presence_thread(server_state_obj: ServerState):
-    current_lan_ip = get_local_ip()
-    broadcast_message_dict = {
-        "service": server_state_obj.service_name,
-        "tcp_ip": current_lan_ip,
-        "tcp_port": server_state_obj.server_port_tcp,
-        "map_name": server_state_obj.current_map_name or "Unknown Map" # map_name is folder/stem
-    }
-    broadcast_message_bytes = encode_data(broadcast_message_dict)
-    if not broadcast_message_bytes:
-        error("Server Error: Could not encode broadcast message for LAN discovery."); return
-
+        self.map_bundles: Dict[str, MapBundle] = {} # Built on first use; map name -> bundle
+        self.map_chunk_size = max(1024, int(getattr(C, "MAP_DOWNLOAD_CHUNK_SIZE", 16384)))
+        self.map_transfer_window_bytes = max(self.map_chunk_size, int(getattr(C, "MAP_TRANSFER_WINDOW_BYTES", 262144)))
+        self.client_ready: bool = False # True once any client has the map and was signaled to start
+
+        self.tick_ms_avg: Optional[float] = None # Smoothed game loop work per tick, reported to clients in pongs
+        self.server_port_udp_game = int(getattr(C, "SERVER_PORT_UDP_GAME", 5557))
+        self.game_udp_socket: Optional[socket.socket] = None
+
+    def free_player_slot(self) -> Optional[int]:
+        """Lowest player slot (2..) without a client, or None when full. Caller holds client_lock."""
+        for player_id in range(2, 2 + self.max_remote_players):
+            if player_id not in self.clients: return player_id
+        return None
+
+
+def _apply_client_game_message(client: ClientConnection, msg: Dict[str, Any]):
+    """Applies "snapshot_ack"/"inputs"/"view" from the client (TCP or UDP). Caller holds client_lock."""
+    if "view" in msg: client.interest.set_view(msg["view"])
+    if "snapshot_ack" in msg:
+        try: client.acked_snapshot_seq = max(client.acked_snapshot_seq, int(msg["snapshot_ack"]))
+        except (TypeError, ValueError): pass
+    new_commands = msg.get("inputs")
+    if not isinstance(new_commands, list): return
+    # Datagrams repeat the last few unacknowledged commands, so only seqs newer than any seen are queued
+    for command in sorted((c for c in new_commands if isinstance(c, dict) and isinstance(c.get("seq"), int)), key=lambda c: c["seq"]):
+        if command["seq"] <= client.last_received_input_seq: continue
+        client.input_commands.append(command)
+        client.last_received_input_seq = command["seq"]
+    commands = client.input_commands
+    while len(commands) > client.input_queue_max:
+        # Client is running ahead; drop the oldest held state but carry its presses into the next command
+        dropped_command = commands.popleft()
+        next_command = commands[0]
+        next_command["pressed"] = list(dict.fromkeys(list(dropped_command.get("pressed") or []) + list(next_command.get("pressed") or [])))
+
+
+def _open_udp_game_socket(server_state_obj: ServerState):
+    if server_state_obj.game_udp_socket or not getattr(C, "UDP_GAME_CHANNEL_ENABLED", True): return
+    try:
+        udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        udp_socket.bind((str(C.SERVER_IP_BIND), server_state_obj.server_port_udp_game))
+        udp_socket.setblocking(False)
+        server_state_obj.game_udp_socket = udp_socket
+        debug(f"ServerLogic: UDP game channel bound on {C.SERVER_IP_BIND}:{server_state_obj.server_port_udp_game}")
+    except socket.error as e_udp:
+        warning(f"ServerLogic: Could not open UDP game channel on port {server_state_obj.server_port_udp_game}: {e_udp}. Using TCP only.")
+        server_state_obj.game_udp_socket = None
+
+
+def _close_udp_game_socket(server_state_obj: ServerState):
+    if server_state_obj.game_udp_socket:
+        try: server_state_obj.game_udp_socket.close()
+        except: pass
+        server_state_obj.game_udp_socket = None
+    with client_lock:
+        for client in server_state_obj.clients.values(): client.udp_address = None
+
+
+def _on_udp_game_readable(server_state_obj: ServerState, mask: int):
+    """Network loop: drains pending datagrams. Stale or out-of-order input is dropped instead of applied late."""
+    udp_socket = server_state_obj.game_udp_socket
+    if not udp_socket: return
+    while True:
+        try: datagram, sender_address = udp_socket.recvfrom(65535)
+        except (BlockingIOError, InterruptedError): return
+        except socket.error as e_udp_recv: # e.g. ICMP port unreachable surfaced on Windows
+            debug(f"ServerLogic: UDP game channel recv error: {e_udp_recv}"); return
+        decoded_datagram = decode_udp_datagram(datagram)
+        if decoded_datagram is None: continue
+        kind, token, seq, payload = decoded_datagram
+        with client_lock:
+            client = next((c for c in server_state_obj.clients.values() if c.udp_token == token and not c.disconnected), None)
+            if client is None: continue
+            client.udp_datagrams_received += 1; client.udp_bytes_received += len(datagram)
+            if not client.udp_input_filter.accept(seq): continue
+            if client.udp_address != sender_address:
+                info(f"ServerLogic: P{client.player_id} UDP game channel at {sender_address}.")
+                client.udp_address = sender_address
+            if kind == UDP_KIND_INPUT:
+                try: msg = json.loads(payload.decode('utf-8'))
+                except (UnicodeDecodeError, ValueError): continue
+                if isinstance(msg, dict): _apply_client_game_message(client, msg)
+
+
+def _open_broadcast_socket(server_state_obj: ServerState):
     try:
         server_state_obj.server_udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         server_state_obj.server_udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         server_state_obj.server_udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        server_state_obj.server_udp_socket.settimeout(0.5) # Non-blocking send
+        server_state_obj.server_udp_socket.setblocking(False) # Sent from the network loop; a full buffer skips one broadcast
     except socket.error as e:
-        error(f"Server Error: Failed to create UDP broadcast socket: {e}"); server_state_obj.server_udp_socket = None; return
-
-    broadcast_address = ('<broadcast>', server_state_obj.discovery_port_udp)
-    debug(f"Server (broadcast): Broadcasting {broadcast_message_dict} to {broadcast_address}")
-
-    while server_state_obj.app_running:
-        # Update map_name in broadcast if it changed
-        if server_state_obj.current_map_name != broadcast_message_dict.get("map_name"):
-            broadcast_message_dict["map_name"] = server_state_obj.current_map_name or "Unknown Map"
-            new_broadcast_bytes = encode_data(broadcast_message_dict)
-            if not new_broadcast_bytes:
-                error("Server Error: Could not re-encode broadcast message with updated map name.")
-            else:
-                broadcast_message_bytes = new_broadcast_bytes
-                debug(f"Server (broadcast): Updated broadcast message with map: {server_state_obj.current_map_name}")
-
-        try:
-            if server_state_obj.server_udp_socket:
-                server_state_obj.server_udp_socket.sendto(broadcast_message_bytes, broadcast_address)
-        except socket.error as se:
-            warning(f"Server Warning: Broadcast send socket error: {se}")
-        except Exception as e: # Catch any other potential errors during send
-            warning(f"Server Warning: Unexpected broadcast send error: {e}")
-        
-        # Wait for the interval, checking app_running periodically for graceful shutdown
-        sleep_chunk = 0.1
-        num_chunks = int(server_state_obj.broadcast_interval_s / sleep_chunk)
-        for _ in range(max(1, num_chunks)): # Ensure at least one sleep if interval is short
-            if not server_state_obj.app_running: break
-            time.sleep(sleep_chunk)
-            
-    if server_state_obj.server_udp_socket:
-        server_state_obj.server_udp_socket.close(); server_state_obj.server_udp_socket = None
-    debug("Server (broadcast): Broadcast thread stopped.")
+        error(f"Server Error: Failed to create UDP broadcast socket: {e}"); server_state_obj.server_udp_socket = None
+
 
+def _broadcast_presence(server_state_obj: ServerState) -> bool:
+    """Network loop timer (every BROADCAST_INTERVAL_S): announces the server for LAN discovery."""
+    if not server_state_obj.server_udp_socket: return False # Stop the timer
+    broadcast_message_bytes = encode_data({
+        "service": server_state_obj.service_name,
+        "tcp_ip": get_local_ip(),
+        "tcp_port": server_state_obj.server_port_tcp,
+        "map_name": server_state_obj.current_map_name or "Unknown Map" # map_name is folder/stem
+    })
+    if not broadcast_message_bytes:
+        error("Server Error: Could not encode broadcast message for LAN discovery."); return False
+    try: server_state_obj.server_udp_socket.sendto(broadcast_message_bytes, ('<broadcast>', server_state_obj.discovery_port_udp))
+    except (BlockingIOError, InterruptedError): pass
+    except socket.error as se: warning(f"Server Warning: Broadcast send socket error: {se}")
+    return True
 
-def handle_client_connection_thread(conn: socket.socket, addr: Any, server_state_obj: ServerState, client_fully_synced_callback: Optional[callable]):
-    debug(f"Server (client_handler): Client {addr} connected. Thread started.")
-    conn.settimeout(1.0) # Set a timeout for recv operations
-    partial_data_from_client = b""
 
-    # Determine absolute path to the base "maps" directory
+def _maps_base_dir_abs() -> str:
     maps_base_dir_abs = str(getattr(C, "MAPS_DIR", "maps"))
     if not os.path.isabs(maps_base_dir_abs):
         project_root_from_constants = getattr(C, 'PROJECT_ROOT', os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         maps_base_dir_abs = os.path.join(project_root_from_constants, maps_base_dir_abs)
+    return maps_base_dir_abs
+
+
+def _get_map_bundle(server_state_obj: ServerState, map_name: Optional[str]) -> Optional[MapBundle]:
+    """Packs the map folder on first request and keeps the bundle for later clients."""
+    if not is_safe_map_name(map_name): return None
+    map_bundle = server_state_obj.map_bundles.get(map_name)
+    if map_bundle is None:
+        map_bundle = build_map_bundle(_maps_base_dir_abs(), map_name, int(getattr(C, "MAP_BUNDLE_COMPRESS_LEVEL", 6)))
+        if map_bundle: server_state_obj.map_bundles[map_name] = map_bundle
+    return map_bundle
+
+
+def _pump_map_transfer(server_state_obj: ServerState, client: ClientConnection):
+    """Network loop: queues bundle chunks until the unacknowledged bytes fill the transfer window."""
+    map_bundle = client.map_bundle
+    if map_bundle is None or client.disconnected: return
+    while client.map_sent_offset < map_bundle.size and client.map_sent_offset - client.map_acked_offset < server_state_obj.map_transfer_window_bytes:
+        chunk_bytes = map_bundle.data[client.map_sent_offset : client.map_sent_offset + server_state_obj.map_chunk_size]
+        client.queue_send(encode_binary_frame(encode_map_chunk(client.map_sent_offset, chunk_bytes)))
+        client.map_sent_offset += len(chunk_bytes)
+        if client.map_sent_offset >= map_bundle.size:
+            client.queue_send(encode_data({"command": "map_transfer_end", "name": map_bundle.name, "bundle_hash": map_bundle.bundle_hash}))
+            debug(f"Server Handler ({client.address}): Map bundle '{map_bundle.name}' fully queued for P{client.player_id}.")
+
+
+def _on_client_message(server_state_obj: ServerState, client: ClientConnection, msg: Any, client_fully_synced_callback: Optional[callable]):
+    """Network loop: handles one decoded message from a client's TCP stream."""
+    addr = client.address
+    if not isinstance(msg, dict): return # Clients only send JSON
+    if "snapshot_ack" in msg or "inputs" in msg or "view" in msg: # Game input from client (TCP until its UDP channel is up)
+        with client_lock: _apply_client_game_message(client, msg)
+    command = msg.get("command")
+    if command == "ping": # Answered from the network loop so the RTT doesn't include the game tick
+        client.queue_send(encode_data({"command": "pong", "t": msg.get("t"), "tick_ms": server_state_obj.tick_ms_avg}))
+    elif command == "pong": client.net_stats.on_pong(msg)
+    elif command == "map_manifest":
+        current_map_bundle = _get_map_bundle(server_state_obj, server_state_obj.current_map_name)
+        installed_hashes = msg.get("installed") if isinstance(msg.get("installed"), dict) else {}
+        cached_hashes = set(msg.get("cached") or [])
+        if current_map_bundle is None: map_cache_state = "unknown"
+        elif installed_hashes.get(current_map_bundle.name) == current_map_bundle.content_hash: map_cache_state = "current"
+        elif current_map_bundle.content_hash in cached_hashes: map_cache_state = "cached"
+        elif current_map_bundle.name in installed_hashes: map_cache_state = "stale"
+        else: map_cache_state = "missing"
+        with client_lock: client.map_cache_state = map_cache_state
+        debug(f"Server Handler ({addr}): Client manifest: {len(installed_hashes)} installed, {len(cached_hashes)} cached maps; "
+              f"'{server_state_obj.current_map_name}' is {map_cache_state}.")
+        server_state_obj.network_activity.set()
+    elif command == "report_map_status":
+        map_name_client_folder_stem = msg.get("name") # This is folder/stem
+        status_client = msg.get("status")
+        debug(f"Server Handler ({addr}): Client map '{map_name_client_folder_stem}': {status_client}")
+        first_client_ready = False
+        with client_lock: # Lock access to shared server_state
+            client.map_status = status_client
+            if status_client == "present":
+                client.download_progress = 100.0
+                client.map_bundle = None # Transfer (if any) is finished; drop the reference
+                if not client.game_start_signaled: # Signal start only once
+                    client.queue_send(encode_data({"command": "start_game_now"}))
+                    client.game_start_signaled = True
+                    client.ready = True # Mark client as fully ready
+                    first_client_ready = not server_state_obj.client_ready
+                    server_state_obj.client_ready = True
+                    debug(f"Server Handler ({addr}): Client has map. Sent start_game_now. P{client.player_id} marked as ready.")
+        server_state_obj.network_activity.set()
+        if first_client_ready and client_fully_synced_callback: client_fully_synced_callback()
+    elif command == "request_map_bundle":
+        map_name_req_folder_stem = msg.get("name") # This is folder/stem
+        map_bundle = _get_map_bundle(server_state_obj, map_name_req_folder_stem)
+        if map_bundle is None:
+            error(f"Server: Client map request '{map_name_req_folder_stem}' could not be bundled from '{_maps_base_dir_abs()}'.")
+            client.queue_send(encode_data({"command": "map_file_error", "name": map_name_req_folder_stem, "reason": "not_found_on_server"}))
+            return
+        try: resume_offset = max(0, min(int(msg.get("offset", 0)), map_bundle.size))
+        except (TypeError, ValueError): resume_offset = 0
+        debug(f"Server Handler ({addr}): Client requested map bundle '{map_bundle.name}' from offset {resume_offset}/{map_bundle.size}.")
+        with client_lock:
+            client.map_bundle = map_bundle
+            client.map_sent_offset = client.map_acked_offset = resume_offset
+            client.map_status = "downloading"
+            client.download_progress = resume_offset * 100.0 / map_bundle.size if map_bundle.size else 0.0
+        client.queue_send(encode_data({"command": "map_bundle_info", "name": map_bundle.name, "size": map_bundle.size, "offset": resume_offset,
+                                       "bundle_hash": map_bundle.bundle_hash, "content_hash": map_bundle.content_hash}))
+        _pump_map_transfer(server_state_obj, client)
+        server_state_obj.network_activity.set()
+    elif command == "map_bundle_ack": # Client wrote the bundle up to this offset
+        map_bundle = client.map_bundle
+        if map_bundle is None: return
+        try: acked_offset = min(int(msg.get("offset", 0)), map_bundle.size)
+        except (TypeError, ValueError): return
+        with client_lock:
+            if acked_offset > client.map_acked_offset:
+                client.map_acked_offset = acked_offset
+                client.download_progress = acked_offset * 100.0 / map_bundle.size if map_bundle.size else 100.0
+        _pump_map_transfer(server_state_obj, client)
+        server_state_obj.network_activity.set()
+    elif command == "report_download_progress": # Client sending its download progress
+        with client_lock: client.download_progress = msg.get("progress", 0.0)
+        server_state_obj.network_activity.set()
+
+
+def _on_client_stream_closed(server_state_obj: ServerState, client: ClientConnection):
+    """Network loop: the client's connection closed (either side). The main loop frees the slot."""
+    with client_lock:
+        client.disconnected = True
+        client.ready = False
+        client.map_status = "disconnected"
+        client.udp_address = None
+    server_state_obj.network_activity.set()
+    debug(f"Server: Connection to {client.address} (P{client.player_id}) closed.")
+
+
+def _on_listen_socket_readable(server_state_obj: ServerState, client_fully_synced_callback: Optional[callable], mask: int):
+    """Network loop: accepts pending connections and gives each a free player slot (2..4)."""
+    listen_socket = server_state_obj.server_tcp_socket
+    network_loop = server_state_obj.network_loop
+    if not listen_socket or not network_loop: return
+    while True:
+        try: temp_conn, temp_addr = listen_socket.accept()
+        except (BlockingIOError, InterruptedError): return
+        except Exception as e_accept:
+            error(f"ServerLogic: Error accepting client connection: {e_accept}", exc_info=True); return
+        with client_lock:
+            player_id = server_state_obj.free_player_slot()
+            if player_id is not None:
+                client = ClientConnection(temp_conn, temp_addr, player_id)
+                server_state_obj.clients[player_id] = client
+        if player_id is None:
+            info(f"ServerLogic: Rejected {temp_addr}: all {server_state_obj.max_remote_players} remote player slots taken.")
+            try:
+                temp_conn.sendall(encode_data({"command": "server_full"}))
+                temp_conn.close()
+            except socket.error: pass
+            continue
+        info(f"ServerLogic: Accepted client connection from {temp_addr} as Player {player_id}.")
+        try: temp_conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) # Snapshots and acks are small and latency-bound
+        except (OSError, AttributeError): pass
+        client.stream = StreamConnection(network_loop, temp_conn,
+                                         on_message=lambda _stream, msg, c=client: _on_client_message(server_state_obj, c, msg, client_fully_synced_callback),
+                                         on_close=lambda _stream, c=client: _on_client_stream_closed(server_state_obj, c),
+                                         recv_size=server_state_obj.buffer_size,
+                                         max_queue_bytes=server_state_obj.send_queue_max_bytes)
+        client.stream.start()
+        # Initial player slot and map info send
+        client.queue_send(encode_data({"command": "assign_player", "player_id": client.player_id}))
+        if server_state_obj.current_map_name: # current_map_name is folder/stem
+            set_map_message = {"command": "set_map", "name": server_state_obj.current_map_name, "snapshot_protocol": SNAPSHOT_PROTOCOL_VERSION}
+            current_map_bundle = _get_map_bundle(server_state_obj, server_state_obj.current_map_name)
+            if current_map_bundle: # Lets the client check its own copy before asking for a download
+                set_map_message.update({"content_hash": current_map_bundle.content_hash, "bundle_hash": current_map_bundle.bundle_hash,
+                                        "bundle_size": current_map_bundle.size})
+            client.queue_send(encode_data(set_map_message))
+            debug(f"Server Handler ({temp_addr}): Sent initial map info (folder/stem): {server_state_obj.current_map_name}")
+            if server_state_obj.game_udp_socket:
+                client.queue_send(encode_data({"command": "udp_channel", "port": server_state_obj.server_port_udp_game, "token": client.udp_token}))
+        else: critical(f"Server Handler ({temp_addr}): CRITICAL - current_map_name is None. Cannot send map info.")
+        server_state_obj.network_activity.set()
+
+
+def _remove_disconnected_clients(server_state_obj: ServerState) -> List[ClientConnection]:
+    """Frees the slots of clients whose connection closed. Returns the removed clients."""
+    with client_lock:
+        removed_clients = [c for c in server_state_obj.clients.values() if c.disconnected]
+        for client in removed_clients: del server_state_obj.clients[client.player_id]
+        server_state_obj.client_ready = any(c.ready for c in server_state_obj.clients.values())
+    return removed_clients
 
-    # Initial map info send
-    if server_state_obj.current_map_name: # current_map_name is folder/stem
-        try:
-            conn.sendall(encode_data({"command": "set_map", "name": server_state_obj.current_map_name}))
-            debug(f"Server Handler ({addr}): Sent initial map info (folder/stem): {server_state_obj.current_map_name}")
-        except socket.error as e: debug(f"Server Handler ({addr}): Error sending map info: {e}.")
-    else: critical(f"Server Handler ({addr}): CRITICAL - current_map_name is None. Cannot send map info.")
-
-    while server_state_obj.app_running:
-        with client_lock: # Ensure thread-safe access to client_connection
-            if server_state_obj.client_connection is not conn:
-                debug(f"Server Handler ({addr}): Stale connection for this thread. Exiting."); break
-        try:
-            chunk = conn.recv(server_state_obj.buffer_size)
-            if not chunk: debug(f"Server Handler ({addr}): Client disconnected (empty data)."); break # Connection closed by client
-            
-            partial_data_from_client += chunk
-            decoded_inputs, partial_data_from_client = decode_data_stream(partial_data_from_client)
-            
-            for msg in decoded_inputs:
-                command = msg.get("command")
-                if command == "report_map_status":
-                    map_name_client_folder_stem = msg.get("name") # This is folder/stem
-                    status_client = msg.get("status")
-                    debug(f"Server Handler ({addr}): Client map '{map_name_client_folder_stem}': {status_client}")
-                    with client_lock: # Lock access to shared server_state
-                        server_state_obj.client_map_status = status_client
-                        if status_client == "present":
-                            server_state_obj.client_download_progress = 100.0
-                            if not server_state_obj.game_start_signaled_to_client: # Signal start only once
-                                conn.sendall(encode_data({"command": "start_game_now"}))
-                                server_state_obj.game_start_signaled_to_client = True
-                                server_state_obj.client_ready = True # Mark client as fully ready
-                                if client_fully_synced_callback: client_fully_synced_callback()
-                                debug(f"Server Handler ({addr}): Client has map. Sent start_game_now. Client marked as ready.")
-                elif command == "request_map_file":
-                    map_name_req_folder_stem = msg.get("name") # This is folder/stem
-                    debug(f"Server Handler ({addr}): Client requested map: '{map_name_req_folder_stem}'")
-                    map_py_file_path_to_send = os.path.join(maps_base_dir_abs, 
-                                                            map_name_req_folder_stem, # Subfolder
-                                                            f"{map_name_req_folder_stem}.py") # Actual .py file
-                    if os.path.exists(map_py_file_path_to_send):
-                        with open(map_py_file_path_to_send, "r", encoding="utf-8") as f_map: map_content_str = f_map.read()
-                        map_bytes_utf8 = map_content_str.encode('utf-8') # Ensure bytes for len calculation
-                        conn.sendall(encode_data({"command": "map_file_info", "name": map_name_req_folder_stem, "size": len(map_bytes_utf8)}))
-                        offset = 0
-                        while offset < len(map_bytes_utf8):
-                            chunk_to_send_bytes = map_bytes_utf8[offset : offset + C.MAP_DOWNLOAD_CHUNK_SIZE]
-                            conn.sendall(encode_data({"command": "map_data_chunk", "data": chunk_to_send_bytes.decode('utf-8', 'replace'), "seq": offset}))
-                            offset += len(chunk_to_send_bytes)
-                        conn.sendall(encode_data({"command": "map_transfer_end", "name": map_name_req_folder_stem}))
-                        debug(f"Server Handler ({addr}): Map '{map_name_req_folder_stem}' transfer complete from '{map_py_file_path_to_send}'.")
-                    else:
-                        error(f"Server: Client map request '{map_name_req_folder_stem}' not found at '{map_py_file_path_to_send}'.")
-                        conn.sendall(encode_data({"command": "map_file_error", "name": map_name_req_folder_stem, "reason": "not_found_on_server"}))
-                elif command == "report_download_progress": # Client sending its download progress
-                    with client_lock: server_state_obj.client_download_progress = msg.get("progress", 0.0)
-                elif "input" in msg: # Game input from client
-                    with client_lock:
-                        if server_state_obj.client_connection is conn: # Ensure this is still the active connection
-                            server_state_obj.client_input_buffer = msg["input"]
-        
-        except socket.timeout: continue # Normal if no data received within timeout
-        except socket.error as e_sock:
-            if server_state_obj.app_running: debug(f"Server Handler ({addr}): Socket error: {e_sock}. Client likely disconnected."); break
-        except Exception as e_unexp:
-            if server_state_obj.app_running: error(f"Server Handler ({addr}): Unexpected error: {e_unexp}", exc_info=True); break
 
-    # Cleanup when loop exits
+def _close_all_clients(server_state_obj: ServerState):
     with client_lock:
-        if server_state_obj.client_connection is conn: # If this thread was managing the active connection
-            server_state_obj.client_connection = None
-            server_state_obj.client_input_buffer = {"disconnect": True} # Signal main loop about disconnect
-            server_state_obj.client_map_status = "disconnected"
-            server_state_obj.game_start_signaled_to_client = False
-            server_state_obj.client_ready = False 
-            debug(f"Server: Client {addr} handler set client_connection to None and client_ready to False.")
-    try: conn.shutdown(socket.SHUT_RDWR)
-    except: pass # Ignore errors if already closed
-    try: conn.close()
-    except: pass
-    debug(f"Server: Client handler thread for {addr} finished and connection closed.")
+        clients_to_close = list(server_state_obj.clients.values())
+        server_state_obj.clients.clear()
+        server_state_obj.client_ready = False
+    for client in clients_to_close:
+        client.disconnected = True
+        if client.stream: client.stream.close() # Runs on the network loop, or right here once it stopped
+        else:
+            try: client.conn.close()
+            except: pass
+    if clients_to_close: debug(f"ServerLogic: Closed {len(clients_to_close)} client connection(s).")
+
+
+def _ping_clients(server_state_obj: ServerState):
+    """Network loop timer: one ping per connected client."""
+    with client_lock: connected_clients = [c for c in server_state_obj.clients.values() if not c.disconnected]
+    for client in connected_clients: client.queue_send(encode_data(client.net_stats.make_ping()))
+
+
+def _start_server_network(server_state_obj: ServerState, client_fully_synced_callback: Optional[callable]):
+    """One network loop thread for accept, client streams, UDP game input and LAN discovery."""
+    network_loop = NetworkEventLoop("server")
+    server_state_obj.network_loop = network_loop
+    server_state_obj.network_activity.clear()
+    network_loop.register(server_state_obj.server_tcp_socket, selectors.EVENT_READ,
+                          lambda mask: _on_listen_socket_readable(server_state_obj, client_fully_synced_callback, mask))
+    if server_state_obj.game_udp_socket:
+        network_loop.register(server_state_obj.game_udp_socket, selectors.EVENT_READ, lambda mask: _on_udp_game_readable(server_state_obj, mask))
+    if server_state_obj.server_udp_socket:
+        debug(f"Server (broadcast): Broadcasting presence to port {server_state_obj.discovery_port_udp} every {server_state_obj.broadcast_interval_s}s.")
+        network_loop.call_every(server_state_obj.broadcast_interval_s, _broadcast_presence, server_state_obj)
+    network_loop.call_every(float(getattr(C, "NET_PING_INTERVAL_S", 0.5)), _ping_clients, server_state_obj, run_now=False)
+    network_loop.start()
+
+
+def _stop_server_network(server_state_obj: ServerState):
+    """Closes every client, stops the network loop and closes the server's sockets."""
+    _close_all_clients(server_state_obj)
+    if server_state_obj.network_loop:
+        server_state_obj.network_loop.stop()
+        server_state_obj.network_loop = None
+    if server_state_obj.server_tcp_socket:
+        try: server_state_obj.server_tcp_socket.close()
+        except: pass
+        server_state_obj.server_tcp_socket = None
+    _close_udp_game_socket(server_state_obj)
+    if server_state_obj.server_udp_socket:
+        try: server_state_obj.server_udp_socket.close()
+        except: pass
+        server_state_obj.server_udp_socket = None
+
+
+def _respawn_remote_player(game_elements_ref: Dict[str, Any], player_id: int) -> Optional[Player]:
+    """Fresh player at its slot's spawn point for a client that just joined (slots may be reused)."""
+    old_player = game_elements_ref.get(f"player{player_id}")
+    if not old_player or not getattr(old_player, '_valid_init', False):
+        warning(f"ServerLogic: No player{player_id} in this game (num_active_players_for_mode too low?). P{player_id} can't play.")
+        return None
+    new_player = Player(old_player.initial_spawn_pos.x(), old_player.initial_spawn_pos.y(), player_id=player_id,
+                        initial_properties=old_player.properties)
+    if not new_player._valid_init: return None
+    if hasattr(new_player, 'reset_for_new_game_or_round'): new_player.reset_for_new_game_or_round()
+    if old_player.alive(): old_player.kill()
+    game_elements_ref[f"player{player_id}"] = new_player
+    return new_player
 
 
 def run_server_mode(server_state_obj: ServerState,
@@ -237,12 +562,6 @@ def run_server_mode(server_state_obj: ServerState,
         else:
             critical("CRITICAL SERVER: current_map_name is None and not found in game_elements. Cannot host."); return
 
-    # Start broadcast thread if not already running
-    if not (server_state_obj.broadcast_thread and server_state_obj.broadcast_thread.is_alive()):
-        debug("ServerLogic: Starting broadcast presence thread.")
-        server_state_obj.broadcast_thread = threading.Thread(target=broadcast_presence_thread, args=(server_state_obj,), daemon=True)
-        server_state_obj.broadcast_thread.start()
-
     # Setup TCP listening socket
     if server_state_obj.server_tcp_socket: # Close existing if any (e.g., from previous attempt)
         try: server_state_obj.server_tcp_socket.close()
@@ -252,99 +571,77 @@ def run_server_mode(server_state_obj: ServerState,
     try:
         # Use C.SERVER_IP_BIND for binding to allow connections from any interface
         server_state_obj.server_tcp_socket.bind((str(C.SERVER_IP_BIND), server_state_obj.server_port_tcp)) 
-        server_state_obj.server_tcp_socket.listen(1) # Listen for one connection
-        server_state_obj.server_tcp_socket.settimeout(1.0) # Non-blocking accept
+        server_state_obj.server_tcp_socket.listen(server_state_obj.max_remote_players) # One pending connection per remote slot
+        server_state_obj.server_tcp_socket.setblocking(False) # accept() runs on the network loop when a connection is pending
         debug(f"ServerLogic: TCP socket listening on {C.SERVER_IP_BIND}:{server_state_obj.server_port_tcp}")
     except socket.error as e_bind:
         critical(f"FATAL SERVER ERROR: Failed to bind/listen TCP socket: {e_bind}")
-        # Ensure graceful shutdown of broadcast if TCP fails
-        _temp_app_running_state = server_state_obj.app_running
-        server_state_obj.app_running = False
-        if server_state_obj.broadcast_thread and server_state_obj.broadcast_thread.is_alive():
-            server_state_obj.broadcast_thread.join(timeout=0.5)
-        server_state_obj.app_running = _temp_app_running_state # Restore for main app loop if needed
+        server_state_obj.server_tcp_socket.close(); server_state_obj.server_tcp_socket = None
         return
+    _open_udp_game_socket(server_state_obj)
+    _open_broadcast_socket(server_state_obj)
+    _get_map_bundle(server_state_obj, server_state_obj.current_map_name) # Packed once up front, not on the first client's connect
 
-    debug("ServerLogic: Waiting for Player 2 connection and map synchronization...")
+    debug("ServerLogic: Waiting for remote players to connect and synchronize the map...")
     with client_lock: # Initialize/reset client state tracking
-        server_state_obj.client_map_status = "unknown"
-        server_state_obj.client_download_progress = 0.0
-        server_state_obj.game_start_signaled_to_client = False
-        server_state_obj.client_connection = None # No client connected yet
+        server_state_obj.clients.clear() # No client connected yet
         server_state_obj.client_ready = False # Client not ready yet
+    _start_server_network(server_state_obj, client_fully_synced_callback)
 
     client_sync_wait_active = True
     last_ui_cb_time = 0.0 
+    sync_wait_s = float(getattr(C, "NETWORK_UI_WAIT_S", 0.05))
     while client_sync_wait_active and server_state_obj.app_running:
         if process_qt_events_callback: process_qt_events_callback() # Process Qt events
         if not server_state_obj.app_running: break
 
-        # Accept new connection if no client is currently connected
-        if server_state_obj.client_connection is None:
-            try:
-                temp_conn, temp_addr = server_state_obj.server_tcp_socket.accept()
-                with client_lock: # Set new client connection details
-                    server_state_obj.client_connection = temp_conn
-                    server_state_obj.client_address = temp_addr
-                    server_state_obj.client_input_buffer = {} # Clear buffer for new client
-                    server_state_obj.client_map_status = "waiting_client_report"
-                    server_state_obj.game_start_signaled_to_client = False # Reset for new client
-                    server_state_obj.client_ready = False # Reset for new client
-                debug(f"ServerLogic: Accepted client connection from {temp_addr}")
-                # Start a new thread to handle this client
-                if server_state_obj.client_handler_thread and server_state_obj.client_handler_thread.is_alive():
-                    debug("ServerLogic: Joining previous client handler thread...")
-                    server_state_obj.client_handler_thread.join(timeout=0.1) # Brief wait for old thread
-                server_state_obj.client_handler_thread = threading.Thread(
-                    target=handle_client_connection_thread,
-                    args=(temp_conn, temp_addr, server_state_obj, client_fully_synced_callback), 
-                    daemon=True
-                )
-                server_state_obj.client_handler_thread.start()
-            except socket.timeout: pass # Normal if no connection attempt within timeout
-            except Exception as e_accept:
-                error(f"ServerLogic: Error accepting client connection: {e_accept}", exc_info=True)
+        network_activity_seen = server_state_obj.network_activity.is_set()
+        server_state_obj.network_activity.clear()
+        for removed_client in _remove_disconnected_clients(server_state_obj):
+            info(f"ServerLogic: Player {removed_client.player_id} ({removed_client.address}) disconnected before the game started.")
+        if server_state_obj.client_ready: client_sync_wait_active = False # First ready client starts the game; others can join later
         
         # Update UI status (e.g., for a "waiting for client" dialog)
-        if ui_status_update_callback and (time.monotonic() - last_ui_cb_time > 0.2):
-            title, msg, prog = "Server Hosting", "Waiting for Player 2...", -1.0
+        if ui_status_update_callback and (network_activity_seen or time.monotonic() - last_ui_cb_time > 0.2):
+            title, msg, prog = "Server Hosting", "Waiting for players...", -1.0
             with client_lock: # Read shared state safely
-                if server_state_obj.client_connection:
-                    client_ip_str = str(server_state_obj.client_address[0]) if server_state_obj.client_address else 'Connecting...'
-                    current_status = server_state_obj.client_map_status
-                    current_map_folder_stem = server_state_obj.current_map_name or "selected map"
-                    current_progress = server_state_obj.client_download_progress
-                    if current_status == "waiting_client_report": msg = f"Player 2 ({client_ip_str}) connected. Syncing map info..."
-                    elif current_status == "missing": msg = f"Player 2 needs '{current_map_folder_stem}'. Sending file..."; prog = max(0.0, current_progress)
-                    elif current_status == "downloading_ack" or current_status == "downloading": msg = f"Player 2 downloading '{current_map_folder_stem}' ({current_progress:.0f}%)..."; prog = max(0.0, current_progress)
-                    elif current_status == "present": msg = f"Player 2 has '{current_map_folder_stem}'. Ready for game start."; prog = 100.0
-                    if server_state_obj.client_ready: # If client_handler_thread marked client as ready
-                        client_sync_wait_active = False # Exit this loop
-                    elif current_status == "disconnected": # If client_handler_thread detected disconnect
-                        msg = "Player 2 disconnected. Waiting for a new connection..."
-                        server_state_obj.client_connection = None # Allow accepting new connection
-                        server_state_obj.client_ready = False
-                        prog = -1.0
+                current_map_folder_stem = server_state_obj.current_map_name or "selected map"
+                client_status_lines: List[str] = []
+                for player_id, client in sorted(server_state_obj.clients.items()):
+                    client_ip_str = str(client.address[0]) if client.address else 'Connecting...'
+                    current_status, current_progress = client.map_status, client.download_progress
+                    if current_status == "waiting_client_report": client_status_lines.append(f"Player {player_id} ({client_ip_str}) connected. Syncing map info...")
+                    elif current_status == "missing":
+                        if client.map_cache_state == "stale": client_status_lines.append(f"Player {player_id} has an outdated '{current_map_folder_stem}'. Sending update...")
+                        else: client_status_lines.append(f"Player {player_id} needs '{current_map_folder_stem}'. Sending file...")
+                        prog = max(prog, current_progress)
+                    elif current_status in ("downloading_ack", "downloading"): client_status_lines.append(f"Player {player_id} downloading '{current_map_folder_stem}' ({current_progress:.0f}%)..."); prog = max(prog, current_progress)
+                    elif current_status == "present": client_status_lines.append(f"Player {player_id} has '{current_map_folder_stem}'. Ready for game start."); prog = 100.0
+                if client_status_lines: msg = "\n".join(client_status_lines)
             ui_status_update_callback(title, msg, prog)
             last_ui_cb_time = time.monotonic()
         
-        time.sleep(0.01) # Small sleep to prevent busy-waiting
+        # Wakes as soon as the network loop reports a connection or map status; the timeout only bounds Qt event latency
+        server_state_obj.network_activity.wait(sync_wait_s)
 
     # Check why the sync wait loop exited
     if not server_state_obj.app_running or not server_state_obj.client_ready:
         debug(f"ServerLogic: Exiting client sync wait phase. AppRunning: {server_state_obj.app_running}, ClientReady: {server_state_obj.client_ready}")
         # Cleanup if exiting due to app stop or client not becoming ready
         server_state_obj.app_running = False # Signal threads to stop
-        if server_state_obj.broadcast_thread and server_state_obj.broadcast_thread.is_alive(): server_state_obj.broadcast_thread.join(timeout=0.5)
-        if server_state_obj.client_handler_thread and server_state_obj.client_handler_thread.is_alive(): server_state_obj.client_handler_thread.join(timeout=0.5)
-        if server_state_obj.server_tcp_socket: server_state_obj.server_tcp_socket.close(); server_state_obj.server_tcp_socket = None
+        _stop_server_network(server_state_obj)
         return # End server mode
 
-    # --- Main Game Loop (Client is synced and ready) ---
+    # --- Main Game Loop (at least one client is synced and ready) ---
     debug(f"ServerLogic: Client synced successfully. Starting main game loop for map '{server_state_obj.current_map_name}'...")
     p1: Optional[Player] = game_elements_ref.get("player1")
-    p2: Optional[Player] = game_elements_ref.get("player2")
     server_game_active = True
+    snapshots_sent_full = snapshots_sent_delta = snapshot_bytes_sent = 0 # Totals over clients that already left
+    udp_max_datagram_bytes = int(getattr(C, "UDP_MAX_DATAGRAM_BYTES", 1400))
+    network_stats_refresh_s = float(getattr(C, "NETWORK_STATS_REFRESH_S", 0.5))
+    last_network_stats_time = 0.0
+    network_stats_log_interval_s = float(getattr(C, "NET_STATS_LOG_INTERVAL_S", 10.0))
+    last_network_stats_log_time = time.monotonic()
     
     frame_duration = 1.0 / C.FPS # Target frame duration
     
@@ -356,8 +653,30 @@ def run_server_mode(server_state_obj: ServerState,
 
         dt_sec = frame_duration # Use fixed dt for server logic consistency
 
+        # Connections (accepted on the network loop): players can join mid-game; a disconnect frees its slot
+        for removed_client in _remove_disconnected_clients(server_state_obj):
+            info(f"Server: Player {removed_client.player_id} ({removed_client.address}) disconnected. Slot freed.")
+            snapshots_sent_full += removed_client.snapshot_encoder.full_snapshots_sent
+            snapshots_sent_delta += removed_client.snapshot_encoder.delta_snapshots_sent
+            snapshot_bytes_sent += removed_client.snapshot_encoder.bytes_sent_total
+        with client_lock: active_clients: List[ClientConnection] = [c for _, c in sorted(server_state_obj.clients.items()) if c.ready]
+        for client in active_clients:
+            if client.stream and client.stream.stalled_for() > server_state_obj.send_stall_timeout_s:
+                warning(f"Server: P{client.player_id} hasn't read from its connection for {server_state_obj.send_stall_timeout_s:.0f}s "
+                        f"({client.stream.pending_send_bytes()} bytes queued). Disconnecting it.")
+                client.stream.close() # Freed next tick like any disconnect
+        if not active_clients:
+            info("Server: All remote players disconnected. Ending game mode."); server_game_active = False; break
+        for client in active_clients:
+            if not client.in_game: # Joined (or finished map sync) since the last tick
+                client.in_game = True
+                _respawn_remote_player(game_elements_ref, client.player_id)
+                info(f"Server: Player {client.player_id} joined the game.")
+
         # Fetch game element lists (these might be modified by statue removal logic)
         platforms_list_this_frame: List[Any] = game_elements_ref.get("platforms_list", [])
+        platforms_grid: Optional[Any] = game_elements_ref.get("platforms_grid")
+        platform_collidables: Any = platforms_grid if platforms_grid is not None else platforms_list_this_frame
         ladders_list_this_frame: List[Ladder] = game_elements_ref.get("ladders_list", [])
         hazards_list_this_frame: List[Lava] = game_elements_ref.get("hazards_list", [])
         current_enemies_list_ref: List[Enemy] = game_elements_ref.get("enemy_list", [])
@@ -375,46 +694,58 @@ def run_server_mode(server_state_obj: ServerState,
                  info("Server: P1 (host) requested Reset action."); 
                  reset_game_state(game_elements_ref) # Full map and entity reload
                  # Re-fetch player instances and lists as they might have been recreated
-                 p1 = game_elements_ref.get("player1"); p2 = game_elements_ref.get("player2")
+                 p1 = game_elements_ref.get("player1") # Remote players are re-fetched below
                  platforms_list_this_frame = game_elements_ref.get("platforms_list", []) # Re-fetch after reset
+                 platforms_grid = game_elements_ref.get("platforms_grid")
+                 platform_collidables = platforms_grid if platforms_grid is not None else platforms_list_this_frame
                  current_enemies_list_ref = game_elements_ref.get("enemy_list", []) 
                  statue_objects_list_ref = game_elements_ref.get("statue_objects", [])
                  projectiles_list_ref = game_elements_ref.get("projectiles_list", [])
                  collectible_items_list_ref = game_elements_ref.get("collectible_list", [])
         if not server_game_active: break # Exit loop if pause/reset changed active state
 
-        # Player 2 (Client) Input
-        p2_network_input_data: Optional[Dict[str, Any]] = None
+        # Remote Players' Input (one queued command per client per tick, like each client's frame)
+        remote_input_commands: Dict[int, Dict[str, Any]] = {}
         with client_lock: # Fetch client input safely
-            if server_state_obj.client_input_buffer:
-                p2_network_input_data = server_state_obj.client_input_buffer.copy()
-                server_state_obj.client_input_buffer.clear() # Consume input
-                if p2_network_input_data.get("disconnect"): # Check for disconnect signal
-                    server_game_active = False; server_state_obj.client_connection = None # Mark for no more sends
-                    info("Server: Client P2 disconnected via input buffer."); break
-                if p2_network_input_data.get("pause", False) or p2_network_input_data.get("pause_event", False): # Client pause
-                    server_game_active = False; info("Server: Client P2 requested Pause.")
-                if p2_network_input_data.get("reset", False) or p2_network_input_data.get("action_reset_global", False):
-                    is_p1_truly_dead_server = (p1 and p1._valid_init and p1.is_dead and (not p1.alive() or p1.death_animation_finished)) or (not p1 or not p1._valid_init)
-                    if is_p1_truly_dead_server: # Allow client reset only if P1 is game over
-                        info("Server: Client P2 reset action received and P1 is game over. Resetting state.")
-                        reset_game_state(game_elements_ref)
-                        p1 = game_elements_ref.get("player1"); p2 = game_elements_ref.get("player2")
-                        platforms_list_this_frame = game_elements_ref.get("platforms_list", [])
-                        current_enemies_list_ref = game_elements_ref.get("enemy_list", []) 
-                        statue_objects_list_ref = game_elements_ref.get("statue_objects", [])
-                        projectiles_list_ref = game_elements_ref.get("projectiles_list", [])
-                        collectible_items_list_ref = game_elements_ref.get("collectible_list", [])
+            for client in active_clients:
+                if client.input_commands:
+                    remote_input_commands[client.player_id] = client.input_commands.popleft()
+                    client.last_processed_input_seq = remote_input_commands[client.player_id]["seq"]
+        for remote_player_id, remote_command in remote_input_commands.items():
+            remote_pressed_actions = set(remote_command.get("pressed") or [])
+            if "pause" in remote_pressed_actions: # Client pause
+                server_game_active = False; info(f"Server: Client P{remote_player_id} requested Pause.")
+            if "reset" in remote_pressed_actions:
+                p1 = game_elements_ref.get("player1")
+                is_p1_truly_dead_server = (p1 and p1._valid_init and p1.is_dead and (not p1.alive() or p1.death_animation_finished)) or (not p1 or not p1._valid_init)
+                if is_p1_truly_dead_server: # Allow client reset only if P1 is game over
+                    info(f"Server: Client P{remote_player_id} reset action received and P1 is game over. Resetting state.")
+                    reset_game_state(game_elements_ref)
+                    p1 = game_elements_ref.get("player1")
+                    platforms_list_this_frame = game_elements_ref.get("platforms_list", [])
+                    platforms_grid = game_elements_ref.get("platforms_grid")
+                    platform_collidables = platforms_grid if platforms_grid is not None else platforms_list_this_frame
+                    current_enemies_list_ref = game_elements_ref.get("enemy_list", []) 
+                    statue_objects_list_ref = game_elements_ref.get("statue_objects", [])
+                    projectiles_list_ref = game_elements_ref.get("projectiles_list", [])
+                    collectible_items_list_ref = game_elements_ref.get("collectible_list", [])
         if not server_game_active: break # Exit loop if client action changed state
 
-        # Apply P2's input if available
-        if p2 and hasattr(p2, '_valid_init') and p2._valid_init and p2_network_input_data and hasattr(p2, 'handle_network_input'):
-            p2.handle_network_input(p2_network_input_data)
+        # Apply each remote player's input command (same input path the client used to predict it)
+        remote_players: Dict[int, Optional[Player]] = {client.player_id: game_elements_ref.get(f"player{client.player_id}") for client in active_clients}
+        for unused_player_id in range(2, 5): # Free slots (never joined, or left) stay out of the host's view and HUD
+            unused_player = game_elements_ref.get(f"player{unused_player_id}")
+            if unused_player_id not in remote_players and unused_player and hasattr(unused_player, 'alive') and unused_player.alive(): unused_player.kill()
+        remote_action_events_current_frame: Dict[int, Dict[str, bool]] = {}
+        for remote_player_id, remote_command in remote_input_commands.items():
+            remote_player = remote_players.get(remote_player_id)
+            if remote_player and hasattr(remote_player, '_valid_init') and remote_player._valid_init:
+                remote_action_events_current_frame[remote_player_id] = apply_player_input_command(remote_player, remote_command, platform_collidables)
         
         current_game_ticks_val = get_current_ticks_monotonic() # For state timers
 
         # Update Players
-        player_instances_to_update_server = [p for p in [p1, p2] if p and hasattr(p, '_valid_init') and p._valid_init]
+        player_instances_to_update_server = [p for p in [p1] + list(remote_players.values()) if p and hasattr(p, '_valid_init') and p._valid_init]
 
         for p_instance_server in player_instances_to_update_server:
             all_others_for_this_player_server = [other_p for other_p in player_instances_to_update_server if other_p is not p_instance_server and hasattr(other_p, 'alive') and other_p.alive()]
@@ -435,7 +766,7 @@ def run_server_mode(server_state_obj: ServerState,
             # --- END MODIFICATION ---
 
             p_instance_server.update(dt_sec, 
-                                     platforms_list_this_frame, 
+                                     platform_collidables, 
                                      ladders_list_this_frame, 
                                      hazards_list_this_frame, 
                                      all_others_for_this_player_server, 
@@ -447,7 +778,7 @@ def run_server_mode(server_state_obj: ServerState,
         enemies_to_keep_server = []
         for enemy_instance_server in list(current_enemies_list_ref): # Iterate a copy
             if hasattr(enemy_instance_server, '_valid_init') and enemy_instance_server._valid_init:
-                enemy_instance_server.update(dt_sec, active_players_for_ai_server, platforms_list_this_frame, hazards_list_this_frame, current_enemies_list_ref) 
+                enemy_instance_server.update(dt_sec, active_players_for_ai_server, platform_collidables, hazards_list_this_frame, current_enemies_list_ref) 
                 if hasattr(enemy_instance_server, 'alive') and enemy_instance_server.alive():
                     enemies_to_keep_server.append(enemy_instance_server)
         game_elements_ref["enemy_list"] = enemies_to_keep_server
@@ -458,10 +789,13 @@ def run_server_mode(server_state_obj: ServerState,
         for statue_obj_server_loop in list(statue_objects_list_ref): # Iterate a copy
             if hasattr(statue_obj_server_loop, 'alive') and statue_obj_server_loop.alive():
                 if hasattr(statue_obj_server_loop, 'apply_physics_step') and not statue_obj_server_loop.is_smashed:
-                    statue_obj_server_loop.apply_physics_step(dt_sec, platforms_list_this_frame)
+                    statue_obj_server_loop.apply_physics_step(dt_sec, platform_collidables)
                 
                 if hasattr(statue_obj_server_loop, 'update'):
                     statue_obj_server_loop.update(dt_sec) # Handles smashed animation timing
+
+                if platforms_grid is not None and statue_obj_server_loop.is_smashed and statue_obj_server_loop in platforms_grid:
+                    platforms_grid.remove(statue_obj_server_loop) # Smashed statues are no longer solid
                 
                 if statue_obj_server_loop.alive(): # Re-check after update
                     statues_to_keep_server.append(statue_obj_server_loop)
@@ -481,7 +815,10 @@ def run_server_mode(server_state_obj: ServerState,
             if len(new_platforms_list_server) != len(current_platforms_server):
                 game_elements_ref["platforms_list"] = new_platforms_list_server
                 platforms_list_this_frame = new_platforms_list_server # Update local ref for this frame
+                if platforms_grid is None: platform_collidables = platforms_list_this_frame
                 debug(f"ServerLogic: Updated platforms_list after statue removal. Count: {len(new_platforms_list_server)}")
+            if platforms_grid is not None:
+                for killed_statue_server in statues_killed_this_frame_server: platforms_grid.remove(killed_statue_server)
         # --- END Statue Logic ---
             
         # Update Projectiles (Target list includes players, enemies, and statues)
@@ -499,7 +836,7 @@ def run_server_mode(server_state_obj: ServerState,
         projectiles_to_keep_server = []
         for proj_obj_server in list(projectiles_list_ref): # Iterate a copy
             if hasattr(proj_obj_server, 'update'):
-                proj_obj_server.update(dt_sec, platforms_list_this_frame, hittable_targets_on_server_proj)
+                proj_obj_server.update(dt_sec, platform_collidables, hittable_targets_on_server_proj)
             if hasattr(proj_obj_server, 'alive') and proj_obj_server.alive():
                 projectiles_to_keep_server.append(proj_obj_server)
         game_elements_ref["projectiles_list"] = projectiles_to_keep_server
@@ -515,7 +852,7 @@ def run_server_mode(server_state_obj: ServerState,
             current_chest_server_loop.on_ground = False # Reset before check
             if hasattr(current_chest_server_loop, 'rect') and isinstance(current_chest_server_loop.rect, QRectF):
                 old_chest_bottom_s = current_chest_server_loop.rect.bottom() - (current_chest_server_loop.vel_y * dt_sec * C.FPS if current_chest_server_loop.vel_y > 0 else 0)
-                for platform_coll_s in platforms_list_this_frame: 
+                for platform_coll_s in query_platforms(platform_collidables, current_chest_server_loop.rect): 
                     if isinstance(platform_coll_s, Statue) and platform_coll_s.is_smashed: continue # Ignore smashed statues
                     if hasattr(platform_coll_s, 'rect') and isinstance(platform_coll_s.rect, QRectF) and \
                        current_chest_server_loop.rect.intersects(platform_coll_s.rect):
@@ -552,10 +889,12 @@ def run_server_mode(server_state_obj: ServerState,
             if p1 and p1.alive() and p1._valid_init and not p1.is_dead and not getattr(p1,'is_petrified',False) and \
                hasattr(p1, 'rect') and p1.rect.intersects(current_chest_for_interact.rect) and p1_action_events_current_frame.get("interact", False):
                 interacting_player_server_chest = p1
-            elif p2 and p2.alive() and p2._valid_init and not p2.is_dead and not getattr(p2,'is_petrified',False) and \
-                 hasattr(p2, 'rect') and p2.rect.intersects(current_chest_for_interact.rect) and \
-                 p2_network_input_data and p2_network_input_data.get("interact_pressed_event", False): # Check for "event" for P2
-                interacting_player_server_chest = p2
+            else:
+                for remote_player_id, remote_player in remote_players.items():
+                    if remote_player and remote_player.alive() and remote_player._valid_init and not remote_player.is_dead and not getattr(remote_player,'is_petrified',False) and \
+                       hasattr(remote_player, 'rect') and remote_player.rect.intersects(current_chest_for_interact.rect) and \
+                       remote_action_events_current_frame.get(remote_player_id, {}).get("interact", False):
+                        interacting_player_server_chest = remote_player; break
             if interacting_player_server_chest:
                 current_chest_for_interact.collect(interacting_player_server_chest)
         
@@ -602,44 +941,68 @@ def run_server_mode(server_state_obj: ServerState,
         else: warning("ServerLogic: get_layer_order_key not found. Render order might be incorrect.")
         game_elements_ref["all_renderable_objects"] = new_all_renderables_server_loop
 
-        # Send Game State to Client
-        if server_state_obj.client_connection: # Only if client is still connected
-            network_game_state_to_send = get_network_game_state(game_elements_ref)
-            encoded_state = encode_data(network_game_state_to_send)
-            if encoded_state:
+        # Send Game State to each Client
+        network_game_state_to_send = get_network_game_state(game_elements_ref)
+        network_game_state_to_send['server_time_ms'] = get_current_ticks_monotonic() # Client interpolation timeline
+        for unused_player_id in range(2, 5):
+            if unused_player_id not in remote_players: network_game_state_to_send[f"p{unused_player_id}"] = None # Free slot: not in the game
+        interest_grid = build_interest_grid(network_game_state_to_send)
+        for client in active_clients:
+            own_player_key = f"p{client.player_id}"
+            client_game_state = client.interest.filter_state(network_game_state_to_send, interest_grid, own_player_key)
+            if isinstance(network_game_state_to_send.get(own_player_key), dict):
+                if client_game_state is network_game_state_to_send: client_game_state = dict(network_game_state_to_send) # Only this client's own player carries its ack
+                client_game_state[own_player_key] = dict(network_game_state_to_send[own_player_key], last_input_seq=client.last_processed_input_seq) # Reconciliation point
+            with client_lock:
+                client.snapshot_encoder.acknowledge(client.acked_snapshot_seq)
+                client_udp_address = client.udp_address
+            snapshot_payload = client.snapshot_encoder.encode_payload(client_game_state)
+            sent_over_udp = False
+            if client_udp_address and server_state_obj.game_udp_socket and UDP_HEADER_SIZE + len(snapshot_payload) <= udp_max_datagram_bytes:
+                client.udp_snapshot_seq += 1
                 try:
-                    server_state_obj.client_connection.sendall(encoded_state)
-                except socket.error as e_send:
-                    debug(f"Server: Send game state failed: {e_send}. Client likely disconnected.");
-                    server_game_active = False; server_state_obj.client_connection = None; break # Mark client as disconnected and exit
+                    server_state_obj.game_udp_socket.sendto(encode_udp_datagram(UDP_KIND_SNAPSHOT, client.udp_token, client.udp_snapshot_seq, snapshot_payload), client_udp_address)
+                    sent_over_udp = True
+                    client.udp_bytes_sent += UDP_HEADER_SIZE + len(snapshot_payload); client.udp_snapshots_sent += 1
+                except (BlockingIOError, InterruptedError): # Send buffer full: drop this frame's snapshot, the next delta covers it
+                    sent_over_udp = True; client.udp_snapshots_dropped += 1
+                except socket.error as e_udp_send: debug(f"Server: UDP snapshot send to P{client.player_id} failed: {e_udp_send}. Falling back to TCP.")
+            if not sent_over_udp: # Replaces this client's unsent snapshot, if any; a send failure marks it disconnected
+                client.queue_send(encode_binary_frame(snapshot_payload), replace_key="snapshot")
+
+        # Per-client send queue and network stats for the host's overlay, and periodically the log
+        if time.monotonic() - last_network_stats_time >= network_stats_refresh_s:
+            game_elements_ref["network_send_stats"] = {client.player_id: client.get_send_stats() for client in active_clients}
+            last_network_stats_time = time.monotonic()
+            if last_network_stats_time - last_network_stats_log_time >= network_stats_log_interval_s:
+                last_network_stats_log_time = last_network_stats_time
+                for remote_player_id, client_stats in sorted(game_elements_ref["network_send_stats"].items()):
+                    info(f"Server net P{remote_player_id}: {format_rtt(client_stats)} {format_rates(client_stats)} "
+                         f"tick {server_state_obj.tick_ms_avg or 0.0:.1f}ms queue {client_stats['queued_bytes']}B "
+                         f"dropped {client_stats['snapshots_dropped']} entities {client_stats['relevant_entities']}/{client_stats['total_entities']}")
         
         # Frame rate limiting
         time_spent_this_frame = time.monotonic() - frame_start_time
+        tick_ms = time_spent_this_frame * 1000.0
+        server_state_obj.tick_ms_avg = tick_ms if server_state_obj.tick_ms_avg is None else server_state_obj.tick_ms_avg + (tick_ms - server_state_obj.tick_ms_avg) * 0.1
         sleep_duration = frame_duration - time_spent_this_frame
         if sleep_duration > 0:
             time.sleep(sleep_duration)
 
     # --- End of Main Game Loop ---
-    debug("ServerLogic: Exiting server game active loop.")
-    
-    # Cleanup connection if game loop ended but connection was still active
-    active_conn_to_close: Optional[socket.socket] = None
     with client_lock:
-        if server_state_obj.client_connection:
-            active_conn_to_close = server_state_obj.client_connection
-            server_state_obj.client_connection = None # Ensure no more sends
-    if active_conn_to_close:
-        try: active_conn_to_close.shutdown(socket.SHUT_RDWR)
-        except: pass
-        try: active_conn_to_close.close()
-        except: pass
-        debug("ServerLogic: Active client connection closed after game loop.")
-
-    # Stop broadcast thread and close server socket when run_server_mode finishes
-    # This is typically done by the caller (app_core) which manages ServerState.app_running
-    # However, if server_game_active loop breaks internally, ensure sockets are closed here too.
-    if server_state_obj.server_tcp_socket: 
-        server_state_obj.server_tcp_socket.close()
-        server_state_obj.server_tcp_socket = None
+        for client in server_state_obj.clients.values():
+            client_send_stats = client.get_send_stats()
+            debug(f"ServerLogic: P{client.player_id} send queue: peak {client_send_stats['peak_queued_bytes']} bytes, "
+                  f"{client_send_stats['snapshots_replaced']} snapshots replaced, {client_send_stats['snapshots_dropped']} dropped.")
+            snapshots_sent_full += client.snapshot_encoder.full_snapshots_sent
+            snapshots_sent_delta += client.snapshot_encoder.delta_snapshots_sent
+            snapshot_bytes_sent += client.snapshot_encoder.bytes_sent_total
+    debug(f"ServerLogic: Exiting server game active loop. Snapshots sent: {snapshots_sent_full} full, "
+          f"{snapshots_sent_delta} delta, {snapshot_bytes_sent / 1024.0:.1f}KB total.")
+    
+    # Close client connections, the network loop (accept, discovery) and the server sockets
+    game_elements_ref.pop("network_send_stats", None)
+    _stop_server_network(server_state_obj)
     
     debug("ServerLogic: Server mode (run_server_mode) finished.")
\ No newline at end of file
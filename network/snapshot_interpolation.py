@@ -0,0 +1,168 @@
+# snapshot_interpolation.py
+# -*- coding: utf-8 -*-
+"""
+Client-side snapshot buffer that renders the world slightly in the past.
+Decoded server snapshots are pushed with their server_time_ms; sample() returns
+a state in get_network_game_state() form for "now - CLIENT_INTERPOLATION_DELAY_MS"
+on the server's clock, with player, enemy, statue and projectile positions
+interpolated between the two snapshots around that time. When the next snapshot
+is late, positions are extrapolated from the last two snapshots for at most
+CLIENT_EXTRAPOLATION_MAX_MS, then held.
+"""
+# version 1.0.0 (Initial interpolation buffer)
+
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import main_game.constants as C
+
+try:
+    from main_game.logger import debug
+except ImportError:
+    def debug(msg, *args, **kwargs): print(f"DEBUG_SNAPSHOT_INTERP: {msg}")
+
+
+EntityRef = Tuple[str, str] # (collection, key), e.g. ("players", "p1"), ("enemies", "3"), ("projectiles", "17")
+
+
+def _entity_positions(state: Dict[str, Any]) -> Dict[EntityRef, Tuple[float, float]]:
+    positions: Dict[EntityRef, Tuple[float, float]] = {}
+    for i in range(1, 5):
+        player_data = state.get(f"p{i}")
+        if isinstance(player_data, dict) and player_data.get('pos') is not None: positions[("players", f"p{i}")] = player_data['pos']
+    for enemy_key, enemy_data in (state.get('enemies') or {}).items():
+        if isinstance(enemy_data, dict) and enemy_data.get('pos') is not None: positions[("enemies", str(enemy_key))] = enemy_data['pos']
+    for collection in ("statues", "projectiles"):
+        for entity_data in state.get(collection) or []:
+            if isinstance(entity_data, dict) and entity_data.get('pos') is not None and 'id' in entity_data:
+                positions[(collection, str(entity_data['id']))] = entity_data['pos']
+    return positions
+
+
+def _with_positions(state: Dict[str, Any], new_positions: Dict[EntityRef, Tuple[float, float]]) -> Dict[str, Any]:
+    """Shallow copy of `state` where only the entities in `new_positions` are copied and moved."""
+    if not new_positions: return state
+    result = dict(state)
+    for i in range(1, 5):
+        player_pos = new_positions.get(("players", f"p{i}"))
+        if player_pos is not None and isinstance(result.get(f"p{i}"), dict):
+            result[f"p{i}"] = dict(result[f"p{i}"], pos=player_pos)
+    enemies = result.get('enemies')
+    if isinstance(enemies, dict):
+        result['enemies'] = {key: (dict(data, pos=new_positions[("enemies", str(key))]) if ("enemies", str(key)) in new_positions else data)
+                             for key, data in enemies.items()}
+    for collection in ("statues", "projectiles"):
+        entities = result.get(collection)
+        if isinstance(entities, list):
+            result[collection] = [(dict(data, pos=new_positions[(collection, str(data.get('id')))])
+                                   if isinstance(data, dict) and (collection, str(data.get('id'))) in new_positions else data)
+                                  for data in entities]
+    return result
+
+
+class SnapshotInterpolationBuffer:
+    def __init__(self,
+                 delay_ms: float = getattr(C, 'CLIENT_INTERPOLATION_DELAY_MS', 100.0),
+                 max_extrapolation_ms: float = getattr(C, 'CLIENT_EXTRAPOLATION_MAX_MS', 50.0),
+                 capacity: int = getattr(C, 'CLIENT_SNAPSHOT_BUFFER_SIZE', 32),
+                 snap_distance: float = getattr(C, 'CLIENT_INTERPOLATION_SNAP_DISTANCE', 160.0)):
+        self.delay_ms = float(delay_ms)
+        self.max_extrapolation_ms = float(max_extrapolation_ms)
+        self.snap_distance_sq = float(snap_distance) ** 2 # Moves larger than this (respawn, teleport) aren't smoothed
+        self.snapshots: Deque[Tuple[float, Dict[str, Any]]] = deque(maxlen=max(2, int(capacity)))
+        self.clock_offset_ms: Optional[float] = None # server_time - local_time, tracked from the fastest arrivals
+        # Metrics
+        self.snapshots_pushed = 0
+        self.snapshots_dropped_late = 0
+        self.frames_interpolated = 0
+        self.frames_extrapolated = 0
+        self.frames_held = 0 # Render time outside the buffer beyond what may be extrapolated
+        self.last_buffer_ahead_ms = 0.0 # Newest snapshot time minus render time (negative while extrapolating)
+        self._buffer_depth_sum = 0
+        self._buffer_depth_samples = 0
+
+    @staticmethod
+    def _local_ms() -> float:
+        return time.monotonic() * 1000.0
+
+    def reset(self):
+        self.snapshots.clear()
+        self.clock_offset_ms = None
+
+    def push(self, state: Dict[str, Any], local_time_ms: Optional[float] = None):
+        local_now = self._local_ms() if local_time_ms is None else local_time_ms
+        server_time = state.get('server_time_ms')
+        server_time = float(server_time) if isinstance(server_time, (int, float)) else local_now # Old server: use arrival time
+        if self.snapshots and server_time <= self.snapshots[-1][0]:
+            if self.snapshots[-1][0] - server_time > 1000.0:
+                debug("SnapshotInterpolationBuffer: Server clock went backwards (restart/reset). Clearing buffer.")
+                self.reset()
+            else:
+                self.snapshots_dropped_late += 1; return
+        offset_sample = server_time - local_now
+        if self.clock_offset_ms is None or offset_sample > self.clock_offset_ms:
+            self.clock_offset_ms = offset_sample # Least-delayed packet seen so far
+        else:
+            self.clock_offset_ms += (offset_sample - self.clock_offset_ms) * 0.01 # Slowly follow drift and rising latency
+        self.snapshots.append((server_time, state))
+        self.snapshots_pushed += 1
+
+    def sample(self, local_time_ms: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """State to show this frame, or None before the first snapshot."""
+        if not self.snapshots or self.clock_offset_ms is None: return None
+        local_now = self._local_ms() if local_time_ms is None else local_time_ms
+        render_time = local_now + self.clock_offset_ms - self.delay_ms
+        newest_time, newest_state = self.snapshots[-1]
+        self.last_buffer_ahead_ms = newest_time - render_time
+
+        while len(self.snapshots) > 2 and self.snapshots[1][0] <= render_time: # Keep one snapshot at or before render time
+            self.snapshots.popleft()
+        oldest_time, oldest_state = self.snapshots[0]
+        self._buffer_depth_sum += len(self.snapshots); self._buffer_depth_samples += 1
+
+        if render_time <= oldest_time:
+            self.frames_held += 1
+            return oldest_state
+        if render_time < newest_time:
+            for (from_time, from_state), (to_time, to_state) in zip(self.snapshots, list(self.snapshots)[1:]):
+                if from_time <= render_time < to_time:
+                    self.frames_interpolated += 1
+                    return self._blend(from_state, from_state, to_state, (render_time - from_time) / (to_time - from_time))
+        if len(self.snapshots) < 2:
+            self.frames_held += 1
+            return newest_state
+        previous_time, previous_state = self.snapshots[-2]
+        late_ms = render_time - newest_time
+        overshoot_ms = min(late_ms, self.max_extrapolation_ms)
+        if overshoot_ms <= 0.0 or newest_time <= previous_time:
+            self.frames_held += 1
+            return newest_state
+        if late_ms > self.max_extrapolation_ms: self.frames_held += 1 # Held at the extrapolation limit
+        else: self.frames_extrapolated += 1
+        return self._blend(newest_state, previous_state, newest_state, 1.0 + overshoot_ms / (newest_time - previous_time))
+
+    def _blend(self, base_state: Dict[str, Any], from_state: Dict[str, Any], to_state: Dict[str, Any], fraction: float) -> Dict[str, Any]:
+        """`base_state` with positions at `fraction` along from->to (fraction > 1 extrapolates)."""
+        from_positions = _entity_positions(from_state)
+        blended_positions: Dict[EntityRef, Tuple[float, float]] = {}
+        for entity_ref, to_pos in _entity_positions(to_state).items():
+            from_pos = from_positions.get(entity_ref)
+            if from_pos is None: continue
+            dx = to_pos[0] - from_pos[0]; dy = to_pos[1] - from_pos[1]
+            if dx == 0.0 and dy == 0.0: continue # Already at this position in base_state
+            if dx * dx + dy * dy > self.snap_distance_sq: blended_positions[entity_ref] = to_pos; continue
+            blended_positions[entity_ref] = (from_pos[0] + dx * fraction, from_pos[1] + dy * fraction)
+        return _with_positions(base_state, blended_positions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'buffer_depth': len(self.snapshots),
+            'buffer_depth_avg': (self._buffer_depth_sum / self._buffer_depth_samples) if self._buffer_depth_samples else 0.0,
+            'buffer_ahead_ms': self.last_buffer_ahead_ms,
+            'snapshots_pushed': self.snapshots_pushed,
+            'snapshots_dropped_late': self.snapshots_dropped_late,
+            'frames_interpolated': self.frames_interpolated,
+            'frames_extrapolated': self.frames_extrapolated,
+            'frames_held': self.frames_held,
+        }
@@ -4,7 +4,7 @@
 """
 
 """
-# version 2.1.19 (Robust animation dict access)
+# version 2.1.22 (can_stand_up queries the platform spatial grid)
 
 import os
 import sys
@@ -29,6 +29,8 @@ try:
     import main_game.constants as C
     import main_game.config as game_config
     from main_game.logger import info, debug, warning, error, critical
+    from main_game.render_registry import register_renderable
+    from main_game.spatial_grid import query_platforms
 except ImportError as e_main_imports:
     print(f"CRITICAL PLAYER.PY: Failed to import from main_game: {e_main_imports}. Fallbacks will be used.")
     # Define minimal fallbacks if main_game imports fail
@@ -41,12 +43,14 @@ except ImportError as e_main_imports:
     def warning(msg, *args, **kwargs): print(f"WARNING_P: {msg}")
     def error(msg, *args, **kwargs): print(f"ERROR_P: {msg}")
     def critical(msg, *args, **kwargs): print(f"CRITICAL_P: {msg}")
-    def load_all_player_animations(relative_asset_folder: str) -> Optional[Dict[str, List[QPixmap]]]: return None
-    def load_gif_frames(full_absolute_path_to_gif_file: str) -> List[QPixmap]: return []
+    def load_all_player_animations(relative_asset_folder: str, owner: Optional[Any] = None) -> Optional[Dict[str, List[QPixmap]]]: return None
+    def load_gif_frames(full_absolute_path_to_gif_file: str, owner: Optional[Any] = None) -> List[QPixmap]: return []
     def resource_path(relative_path_from_project_root: str) -> str: return relative_path_from_project_root
     class PrintLimiter:
         def __init__(self, *args, **kwargs): pass
         def can_log(self, *args, **kwargs) -> bool: return True
+    def register_renderable(game_elements: Dict[str, Any], kind: str, obj: Any): game_elements["all_renderable_objects"].append(obj)
+    def query_platforms(platforms: Any, rect: QRectF, margin: float = 0.0) -> Any: return platforms
 
 # Handler modules (use relative imports from within the 'player' package)
 _HANDLERS_FULLY_LOADED = True
@@ -145,7 +149,7 @@ class Player:
         self.animations: Optional[Dict[str, List[QPixmap]]] = None
         if _HANDLERS_FULLY_LOADED : # Only load animations if all handlers are there
             try:
-                self.animations = load_all_player_animations(relative_asset_folder=player_asset_folder_relative_to_project_root)
+                self.animations = load_all_player_animations(relative_asset_folder=player_asset_folder_relative_to_project_root, owner=self)
             except Exception as e_anim_load:
                 critical(f"Player {self.player_id}: Exception during load_all_player_animations from '{player_asset_folder_relative_to_project_root}': {e_anim_load}", exc_info=True)
                 self._valid_init = False
@@ -317,13 +321,13 @@ class Player:
                 player_specific_frames = self.animations.get(anim_key_check)
                 if player_specific_frames and player_specific_frames[0] and not self._is_placeholder_qpixmap(player_specific_frames[0]):
                     debug(f"Player {self.player_id} StatusAsset: Using player's own '{anim_key_check}' anim for '{path_suffix_from_base}'.")
-                    return [f.copy() for f in player_specific_frames] if is_list else player_specific_frames[0].copy()
+                    return list(player_specific_frames) if is_list else player_specific_frames[0]
 
             effective_base_folder = base_asset_folder_relative_to_project if base_asset_folder_relative_to_project else stone_common_folder_relative_to_project_root
             full_path_relative_to_project = os.path.join(effective_base_folder, path_suffix_from_base)
             absolute_path = resource_path(full_path_relative_to_project)
 
-            frames = load_gif_frames(absolute_path)
+            frames = load_gif_frames(absolute_path, owner=self)
             if frames and frames[0] and not self._is_placeholder_qpixmap(frames[0]):
                 return frames if is_list else frames[0]
             warning(f"Player {self.player_id} StatusAsset: Failed to load '{path_suffix_from_base}' (from '{effective_base_folder}', abs: '{absolute_path}'). Using placeholder.")
@@ -331,18 +335,18 @@ class Player:
             return [placeholder] if is_list else placeholder
 
         self.stone_image_frame_original = load_or_placeholder('__Stone.png', qcolor_gray, "StoneP", anim_key_check='petrified')
-        self.stone_image_frame = self.stone_image_frame_original.copy()
+        self.stone_image_frame = self.stone_image_frame_original # QPixmaps are shared from the frame cache, not deep-copied
         self.stone_smashed_frames_original = load_or_placeholder('__StoneSmashed.gif', qcolor_dark_gray, "SmashP", is_list=True, anim_key_check='smashed')
-        self.stone_smashed_frames = [f.copy() for f in self.stone_smashed_frames_original]
+        self.stone_smashed_frames = list(self.stone_smashed_frames_original)
         self.stone_crouch_image_frame_original = load_or_placeholder('__StoneCrouch.png', qcolor_gray, "SCrouchP", anim_key_check='petrified_crouch')
         if self._is_placeholder_qpixmap(self.stone_crouch_image_frame_original) and not self._is_placeholder_qpixmap(self.stone_image_frame_original):
-            self.stone_crouch_image_frame_original = self.stone_image_frame_original.copy() # Fallback to standing stone if crouch stone missing
-        self.stone_crouch_image_frame = self.stone_crouch_image_frame_original.copy()
+            self.stone_crouch_image_frame_original = self.stone_image_frame_original # Fallback to standing stone if crouch stone missing
+        self.stone_crouch_image_frame = self.stone_crouch_image_frame_original
         self.stone_crouch_smashed_frames_original = load_or_placeholder('__StoneCrouchSmashed.gif', qcolor_dark_gray, "SCSmashP", is_list=True, anim_key_check='smashed_crouch')
         if len(self.stone_crouch_smashed_frames_original) == 1 and self._is_placeholder_qpixmap(self.stone_crouch_smashed_frames_original[0]) and \
            not (len(self.stone_smashed_frames_original) == 1 and self._is_placeholder_qpixmap(self.stone_smashed_frames_original[0])):
-             self.stone_crouch_smashed_frames_original = [f.copy() for f in self.stone_smashed_frames_original] # Fallback to standing smashed
-        self.stone_crouch_smashed_frames = [f.copy() for f in self.stone_crouch_smashed_frames_original]
+             self.stone_crouch_smashed_frames_original = list(self.stone_smashed_frames_original) # Fallback to standing smashed
+        self.stone_crouch_smashed_frames = list(self.stone_crouch_smashed_frames_original)
 
         self.zapped_gif_path = os.path.join(player_asset_folder_relative_to_project_root, "__Zapped.gif")
         zapped_anim_frames = None
@@ -443,7 +447,7 @@ class Player:
         potential_standing_rect = QRectF(potential_standing_rect_left, potential_standing_rect_top,
                                          potential_standing_width, potential_standing_height)
 
-        for platform_obj in platforms_list:
+        for platform_obj in query_platforms(platforms_list, potential_standing_rect):
             if hasattr(platform_obj, 'rect') and isinstance(platform_obj.rect, QRectF):
                 if potential_standing_rect.intersects(platform_obj.rect):
                     # Check if the bottom of the platform is below the player's crouched head
@@ -523,7 +527,7 @@ class Player:
             spawn_x += norm_x * offset_dist; spawn_y += norm_y * offset_dist # Adjust spawn point along aim vector
             new_projectile = projectile_class(spawn_x, spawn_y, aim_dir, self)
             new_projectile.game_elements_ref = self.game_elements_ref_for_projectiles # Pass ref
-            projectiles_list_ref.append(new_projectile); all_renderables_ref.append(new_projectile)
+            projectiles_list_ref.append(new_projectile); register_renderable(self.game_elements_ref_for_projectiles, 'projectile', new_projectile)
             if Player.print_limiter.can_log(f"fired_{projectile_config_name}_{self.player_id}"):
                 debug(f"Player {self.player_id} fired {projectile_config_name} at ({spawn_x:.1f},{spawn_y:.1f}) dir ({aim_dir.x():.1f},{aim_dir.y():.1f})")
             # Special effects for certain projectiles
@@ -6,8 +6,12 @@ Includes zapped animation.
 MODIFIED: Corrected logger import path.
 MODIFIED: Ensures player.animations is checked to be a dictionary before using it.
 MODIFIED: Fixed QColor initialization TypeError for qcolor_blue.
+MODIFIED: Left-facing frames come from the pre-mirrored sequences in main_game.assets
+          instead of a toImage/mirrored/fromImage round trip per animation update.
+MODIFIED: Error placeholders assign a new pixmap instead of filling the entity's current image in place,
+          which is usually a frame shared through the frame cache.
 """
-# version 2.0.9 (Robust animation dict access, QColor fix)
+# version 2.0.11 (Placeholders never paint over shared frames)
 
 import time
 import sys
@@ -21,6 +25,7 @@ from PySide6.QtCore import QPointF, QRectF, Qt, QSize
 # Game imports
 import main_game.constants as C
 from main_game.utils import PrintLimiter
+from main_game.assets import get_mirrored_frames
 
 
 # --- Logger and specific logging utilities Setup ---
@@ -96,6 +101,18 @@ def get_current_ticks_monotonic() -> int:
     return int((time.monotonic() - _start_time_player_anim_monotonic) * 1000)
 
 
+def _set_placeholder_image(entity: Any, color: QColor):
+    """
+    Shows a solid-color placeholder the size of the current image. Assigns a new pixmap instead of
+    filling entity.image in place: that is usually a frame shared through the process-wide frame cache.
+    """
+    current_image = getattr(entity, 'image', None)
+    if not current_image or current_image.isNull(): return
+    placeholder_image = QPixmap(current_image.size())
+    placeholder_image.fill(color)
+    entity.image = placeholder_image
+
+
 def determine_animation_key(player: Any) -> str:
     player_id_log = getattr(player, 'player_id', 'Unknown')
     current_logical_state = getattr(player, 'state', 'idle')
@@ -390,10 +407,7 @@ def update_player_animation(player: Any):
     # --- Initial validity checks ---
     if not getattr(player, '_valid_init', False) or not hasattr(player, 'animations') or not isinstance(player.animations, dict) or not player.animations:
         # If player is invalid or animations are not a loaded dictionary, set to placeholder and return.
-        if hasattr(player, 'image') and player.image and not player.image.isNull():
-            player.image.fill(qcolor_magenta) # Fill existing image with magenta
-        # else: # Player might not even have an image attribute yet if init failed very early
-            # Consider creating a placeholder pixmap and assigning it to player.image if necessary
+        _set_placeholder_image(player, qcolor_magenta) # No-op if init failed before player.image existed
         return
 
     # --- Determine if animation update should proceed ---
@@ -451,14 +465,12 @@ def update_player_animation(player: Any):
         if is_idle_still_invalid:
             critical(f"PlayerAnimHandler CRITICAL (P{player.player_id}): Fallback 'idle' ALSO missing/placeholder! Player visuals will be broken. Original key was '{original_determined_key_before_fallback}'.")
             # Set to a magenta placeholder if even idle fails
-            if hasattr(player, 'image') and player.image and not player.image.isNull():
-                player.image.fill(qcolor_magenta)
+            _set_placeholder_image(player, qcolor_magenta)
             return # Cannot proceed if idle is broken
 
     if not current_frames_list: # Should be caught by above, but as a final safeguard
         critical(f"PlayerAnimHandler CRITICAL (P{player.player_id}): current_frames_list is None even after fallbacks. Key: '{determined_key_for_logic}'.")
-        if hasattr(player, 'image') and player.image and not player.image.isNull():
-            player.image.fill(qcolor_blue)
+        _set_placeholder_image(player, qcolor_blue)
         return
 
     # --- Advance frame and handle state transitions based on animation end ---
@@ -498,15 +510,13 @@ def update_player_animation(player: Any):
     if not current_frames_list or player.current_frame < 0 or player.current_frame >= len(current_frames_list):
         player.current_frame = 0 # Reset to first frame if index is out of bounds
         if not current_frames_list: # Absolute fallback if list became empty/None somehow
-            if hasattr(player, 'image') and player.image and not player.image.isNull():
-                player.image.fill(qcolor_yellow) # Use a different fallback color
+            _set_placeholder_image(player, qcolor_yellow) # Use a different fallback color
             return
 
     image_for_this_frame = current_frames_list[player.current_frame]
     if image_for_this_frame.isNull(): # Should be caught earlier by validation
         critical(f"PlayerAnimHandler (P{player.player_id}): image_for_this_frame is NULL for key '{render_key_for_final_image}', frame {player.current_frame}. This should not happen.")
-        if hasattr(player, 'image') and player.image and not player.image.isNull():
-            player.image.fill(qcolor_magenta)
+        _set_placeholder_image(player, qcolor_magenta)
         return
 
     # Determine facing for visual display (petrified state uses facing_at_petrification)
@@ -520,9 +530,9 @@ def update_player_animation(player: Any):
         # Don't flip static stone images here if they are pre-rendered for one direction
         # The stone frames are already selected based on was_crouching_when_petrified and facing_at_petrification
         if not (render_key_for_final_image == 'petrified' or render_key_for_final_image == 'smashed'):
-            q_img = image_for_this_frame.toImage()
-            if not q_img.isNull():
-                final_image_to_set = QPixmap.fromImage(q_img.mirrored(True, False))
+            mirrored_frames_list = get_mirrored_frames(current_frames_list)
+            if player.current_frame < len(mirrored_frames_list) and not mirrored_frames_list[player.current_frame].isNull():
+                final_image_to_set = mirrored_frames_list[player.current_frame]
             
     # Check if image content or visual facing direction actually changed
     image_content_has_changed = (not hasattr(player, 'image') or player.image is None) or \
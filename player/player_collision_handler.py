@@ -36,6 +36,7 @@ from main_game.tiles import Lava # Assuming tiles.py is in main_game
 from enemy.enemy import Enemy         # Assuming Enemy is in enemy package
 from player.statue import Statue  # Assuming statue.py is in player.statue
 from main_game.items import Chest # Assuming items.py is in main_game
+from main_game.spatial_grid import query_platforms
 
 if TYPE_CHECKING:
     from player.player import Player as PlayerClass_TYPE # Relative import for Player type hint
@@ -111,7 +112,7 @@ def check_player_platform_collisions(player: 'PlayerClass_TYPE', direction: str,
     player_id_log_collision = f"P{player.player_id} Coll"
 
 
-    for platform_idx, platform_obj in enumerate(platforms_list):
+    for platform_idx, platform_obj in enumerate(query_platforms(platforms_list, player.rect)):
         if not hasattr(platform_obj, 'rect') or not isinstance(platform_obj.rect, QRectF) or not platform_obj.rect.isValid():
              if ENABLE_DETAILED_PHYSICS_LOGS: warning(f"{player_id_log_collision}: Platform object {platform_idx} missing valid rect. Skipping.")
              continue
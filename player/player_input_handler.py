@@ -1,7 +1,7 @@
 # player/player_input_handler.py
 # -*- coding: utf-8 -*-
 """
-Version 2.2.3 (Corrected logger import, added get_input_handler_ticks, refined interact, safer animation access)
+Version 2.3.0 (Input commands for network prediction: build_player_input_command / apply_player_input_command)
 Handles processing of player input (Qt keyboard events, Pygame joystick polling)
 and translating it to game actions.
 """
@@ -208,6 +208,8 @@ def process_player_input_logic(
             debug(f"{player_id_str} Joy Intent: L={player.is_trying_to_move_left}, R={player.is_trying_to_move_right}, U={player.is_holding_climb_ability_key}, D={player.is_holding_crouch_ability_key}")
 
     player_intends_horizontal_move = player.is_trying_to_move_left or player.is_trying_to_move_right
+    # Raw presses before the sections below consume them; build_player_input_command() sends these
+    player.last_input_pressed_actions = [action_name for action_name, is_pressed in action_events.items() if is_pressed]
     
     # --- 3. Update Player Aiming Direction ---
     aim_x, aim_y = 0.0, 0.0
@@ -447,4 +449,54 @@ def process_player_input_logic(
               f"acc.x={player.acc.x():.2f}, vel.y={player.vel.y():.2f}, "
               f"Events Fired: [{active_events_str}]")
 
-    return action_events
\ No newline at end of file
+    return action_events
+
+# --- Input commands (networked play) ---
+# A command is one frame of input in device-independent form:
+#   {"seq": int, "held": ["left", "right", "up", "down" ...], "pressed": [GAME_ACTIONS names]}
+# The joining client predicts its own player by applying each command locally, and the
+# server applies the same commands in order, so both run the same input and physics code.
+# Replay uses its own mapping with one distinct key per action, so a pressed "jump" never
+# also fires "up" the way a shared W key does in the real keyboard mappings.
+_INPUT_COMMAND_KEY_MAP: Dict[str, Qt.Key] = {
+    action_name: getattr(Qt.Key, f"Key_F{index + 1}") for index, action_name in enumerate(game_config.GAME_ACTIONS[:35])
+}
+_INPUT_COMMAND_HELD_ACTIONS: Tuple[str, ...] = ("left", "right", "up", "down")
+# Presses that create objects or act on the session rather than the player; not re-run when replaying for reconciliation
+_INPUT_COMMAND_NON_REPLAYABLE_ACTIONS = frozenset(
+    ["pause", "reset"] + [f"projectile{i}" for i in range(1, 8)]
+)
+
+
+def build_player_input_command(player: Any, seq: int) -> Dict[str, Any]:
+    """Command for the input process_player_input_logic() just handled for `player`."""
+    held_flags = (player.is_trying_to_move_left, player.is_trying_to_move_right,
+                  player.is_holding_climb_ability_key, player.is_holding_crouch_ability_key)
+    return {
+        "seq": int(seq),
+        "held": [action_name for action_name, is_held in zip(_INPUT_COMMAND_HELD_ACTIONS, held_flags) if is_held],
+        "pressed": list(getattr(player, 'last_input_pressed_actions', [])),
+    }
+
+
+def apply_player_input_command(player: Any, command: Dict[str, Any], platforms_list: List[Any],
+                               replay: bool = False) -> Dict[str, bool]:
+    """
+    Runs one input command through process_player_input_logic() as keyboard input.
+    With `replay=True` (client reconciliation), presses in _INPUT_COMMAND_NON_REPLAYABLE_ACTIONS are skipped.
+    Returns the action events dict, like process_player_input_logic().
+    """
+    held_actions = command.get("held") or []
+    pressed_actions = command.get("pressed") or []
+    if replay:
+        pressed_actions = [action_name for action_name in pressed_actions if action_name not in _INPUT_COMMAND_NON_REPLAYABLE_ACTIONS]
+    keys_held = {_INPUT_COMMAND_KEY_MAP[action_name]: True for action_name in held_actions if action_name in _INPUT_COMMAND_KEY_MAP}
+    key_events = [(QKeyEvent.Type.KeyPress, _INPUT_COMMAND_KEY_MAP[action_name], False)
+                  for action_name in pressed_actions if action_name in _INPUT_COMMAND_KEY_MAP]
+
+    previous_control_scheme = getattr(player, 'control_scheme', None)
+    player.control_scheme = "network_command" # Forces the keyboard path even for a joystick-controlled player
+    try:
+        return process_player_input_logic(player, keys_held, key_events, _INPUT_COMMAND_KEY_MAP, platforms_list, joystick_data=None)
+    finally:
+        player.control_scheme = previous_control_scheme
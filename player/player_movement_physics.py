@@ -30,6 +30,7 @@ if _PROJECT_ROOT_GRANDPARENT_MOVEMENT not in sys.path:
 import main_game.constants as C
 from main_game.items import Chest
 from player.statue import Statue
+from main_game.spatial_grid import query_platforms
 
 _HANDLERS_PHYSICS_AVAILABLE = True
 try:
@@ -135,7 +136,7 @@ def check_and_initiate_tipping(player: 'PlayerClass_TYPE', platforms_list: List[
     supporting_platform: Optional[Any] = None
     min_vertical_dist_to_support = float('inf')
 
-    for plat in platforms_list:
+    for plat in query_platforms(platforms_list, player_collision_rect):
         if not hasattr(plat, 'rect') or not isinstance(plat.rect, QRectF): continue
         if isinstance(plat, Statue) and plat.is_smashed: continue
 
@@ -192,7 +193,7 @@ def check_and_initiate_tipping(player: 'PlayerClass_TYPE', platforms_list: List[
 
         potential_landing_rect = QRectF(gap_check_rect_x, gap_check_rect_y, gap_check_rect_width, gap_check_rect_height)
 
-        for plat_check_gap in platforms_list:
+        for plat_check_gap in query_platforms(platforms_list, potential_landing_rect):
             if plat_check_gap is supporting_platform: continue
             if not hasattr(plat_check_gap, 'rect') or not isinstance(plat_check_gap.rect, QRectF): continue
             if isinstance(plat_check_gap, Statue) and plat_check_gap.is_smashed: continue
@@ -3,7 +3,7 @@
 """
 Handles the application and management of status effects on the player,
 including duration checks, damage over time, and state transitions for PySide6.
-Version 2.0.8 (Corrected petrify_player state setting and statue asset handling)
+Version 2.0.9 (Petrification statues are registered with the render registry)
 """
 import time
 from typing import TYPE_CHECKING, Dict, Any, Optional, List
@@ -12,6 +12,7 @@ from PySide6.QtGui import QPixmap, QImage, QColor
 from PySide6.QtCore import QPointF # Not directly used here, but common for game logic
 
 import main_game.constants as C
+from main_game.render_registry import register_renderable
 from player.statue import Statue
 
 if TYPE_CHECKING:
@@ -192,14 +193,15 @@ def petrify_player(player: 'PlayerClass_TYPE', game_elements: Dict[str, Any]):
     if statue_objects_list is not None: statue_objects_list.append(new_statue)
     else: warning(f"PlayerStatusEffects (P{player_id_log}): 'statue_objects' list missing. Cannot add statue.")
     
-    all_renderables_list = game_elements.get("all_renderable_objects")
-    if all_renderables_list is not None: all_renderables_list.append(new_statue)
+    if game_elements.get("all_renderable_objects") is not None: register_renderable(game_elements, 'statue', new_statue)
     else: warning(f"PlayerStatusEffects (P{player_id_log}): 'all_renderable_objects' list missing. Statue may not render.")
 
     if not new_statue.is_smashed: # Solid statue acts as platform
         platforms_list_ref = game_elements.get("platforms_list")
         if platforms_list_ref is not None: platforms_list_ref.append(new_statue)
         else: warning(f"PlayerStatusEffects (P{player_id_log}): 'platforms_list' missing. Statue will not be solid.")
+        platforms_grid_ref = game_elements.get("platforms_grid")
+        if platforms_grid_ref is not None: platforms_grid_ref.insert(new_statue)
 
     # Player.kill() is implicitly handled when player.is_dead becomes True via set_state
     info(f"PlayerStatusEffects (P{player_id_log}): Player petrified, new Statue ID {new_statue.statue_id} created.")
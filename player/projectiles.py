@@ -5,8 +5,12 @@ Defines projectile classes like Fireball, PoisonShot, etc. for PySide6.
 Handles projectile effects including setting targets aflame or frozen.
 MODIFIED: Corrected path for `resource_path` import.
 MODIFIED: Updated asset paths for projectile sprites.
+MODIFIED: Added ProjectileSpriteAtlas. Sprites are loaded once per map (preload_projectile_sprites),
+          with pre-mirrored frames and BoltProjectile frames pre-rotated for quantised angles,
+          so spawning and animating a projectile does no file I/O or image transforms.
+MODIFIED: BaseProjectile exposes get_render_sprite(), so GameSceneWidget draws projectiles (they had no draw_pyside).
 """
-# version 2.0.8 (Corrected resource_path import and projectile asset paths)
+# version 2.1.1 (get_render_sprite)
 
 import os
 import sys # Added sys for path manipulation if run standalone
@@ -28,9 +32,10 @@ if _PROJECT_ROOT_FOR_PROJECTILES_PY not in sys.path:
 
 # Game imports
 import main_game.constants as C
-from main_game.assets import load_gif_frames, resource_path # Corrected import path for assets
+from main_game.assets import load_gif_frames, resource_path, get_mirrored_frames, _is_placeholder_qpixmap_check # Corrected import path for assets
 from enemy.enemy import Enemy
 from player.statue import Statue
+from main_game.spatial_grid import query_platforms
 
 # Logger import
 try:
@@ -45,6 +50,102 @@ def get_current_ticks_monotonic() -> int:
 # --- End Monotonic Timer ---
 
 
+# --- Projectile Sprite Atlas ---
+def _rotate_frames(frames: Tuple[QPixmap, ...], rotation_deg: float) -> Tuple[QPixmap, ...]:
+    rotated_frames: List[QPixmap] = []
+    for frame_pixmap in frames:
+        if frame_pixmap.isNull():
+            rotated_frames.append(frame_pixmap); continue
+        center = QPointF(frame_pixmap.width() / 2.0, frame_pixmap.height() / 2.0)
+        transform = QTransform().translate(center.x(), center.y()).rotate(rotation_deg).translate(-center.x(), -center.y())
+        rotated_pixmap = frame_pixmap.transformed(transform, Qt.TransformationMode.SmoothTransformation)
+        rotated_frames.append(rotated_pixmap if not rotated_pixmap.isNull() else frame_pixmap)
+    return tuple(rotated_frames)
+
+def _mirror_frames(frames: Tuple[QPixmap, ...]) -> Tuple[QPixmap, ...]:
+    mirrored_frames: List[QPixmap] = []
+    for frame_pixmap in frames:
+        qimg = frame_pixmap.toImage()
+        mirrored_frames.append(QPixmap.fromImage(qimg.mirrored(True, False)) if not qimg.isNull() else frame_pixmap)
+    return tuple(mirrored_frames)
+
+
+class ProjectileSpriteAtlas:
+    """
+    Holds the decoded frames of every projectile sprite, keyed by the sprite path from constants.
+    For each sprite it keeps the base frames and horizontally mirrored frames; sprites registered
+    as rotated (BoltProjectile) also get frames pre-rotated for PROJECTILE_ROTATION_STEPS angles.
+    Lookups for sprites that were not preloaded load them on demand (and log it).
+    """
+    def __init__(self, rotation_steps: int = getattr(C, 'PROJECTILE_ROTATION_STEPS', 16)):
+        self.rotation_steps = max(1, int(rotation_steps))
+        self._frames: Dict[str, Tuple[QPixmap, ...]] = {}
+        self._mirrored_frames: Dict[str, Tuple[QPixmap, ...]] = {}
+        self._rotated_frames: Dict[Tuple[str, int], Tuple[QPixmap, ...]] = {}
+
+    def quantize_rotation(self, rotation_deg: float) -> int:
+        """Returns the rotation bucket index (0..rotation_steps-1) nearest to `rotation_deg`."""
+        step_deg = 360.0 / self.rotation_steps
+        return int(round((rotation_deg % 360.0) / step_deg)) % self.rotation_steps
+
+    def _load(self, sprite_path: str):
+        frames = tuple(load_gif_frames(resource_path(sprite_path), owner=self))
+        if not frames or _is_placeholder_qpixmap_check(frames[0]):
+            debug(f"ProjectileSpriteAtlas: Sprite '{sprite_path}' failed to load. Projectiles will use fallback art.")
+            frames = ()
+        self._frames[sprite_path] = frames
+        self._mirrored_frames[sprite_path] = tuple(get_mirrored_frames(frames))
+
+    def preload(self, sprite_path: str, rotated: bool = False):
+        if sprite_path not in self._frames:
+            self._load(sprite_path)
+        if rotated:
+            step_deg = 360.0 / self.rotation_steps
+            for bucket in range(self.rotation_steps):
+                if (sprite_path, bucket) not in self._rotated_frames:
+                    self._rotated_frames[(sprite_path, bucket)] = _rotate_frames(self._frames[sprite_path], bucket * step_deg)
+
+    def get_frames(self, sprite_path: str) -> Tuple[QPixmap, ...]:
+        if sprite_path not in self._frames:
+            debug(f"ProjectileSpriteAtlas: '{sprite_path}' was not preloaded. Loading on demand.")
+            self._load(sprite_path)
+        return self._frames[sprite_path]
+
+    def get_mirrored_frames(self, sprite_path: str) -> Tuple[QPixmap, ...]:
+        if sprite_path not in self._mirrored_frames:
+            self.get_frames(sprite_path)
+        return self._mirrored_frames[sprite_path]
+
+    def get_rotated_frames(self, sprite_path: str, rotation_deg: float) -> Tuple[QPixmap, ...]:
+        bucket = self.quantize_rotation(rotation_deg)
+        rotated_frames = self._rotated_frames.get((sprite_path, bucket))
+        if rotated_frames is None:
+            step_deg = 360.0 / self.rotation_steps
+            rotated_frames = _rotate_frames(self.get_frames(sprite_path), bucket * step_deg)
+            self._rotated_frames[(sprite_path, bucket)] = rotated_frames
+        return rotated_frames
+
+
+_projectile_sprite_atlas: Optional[ProjectileSpriteAtlas] = None
+
+def get_projectile_atlas() -> ProjectileSpriteAtlas:
+    global _projectile_sprite_atlas
+    if _projectile_sprite_atlas is None:
+        _projectile_sprite_atlas = ProjectileSpriteAtlas()
+    return _projectile_sprite_atlas
+
+def preload_projectile_sprites():
+    """Loads every projectile sprite into the atlas. Called at map start; already-loaded sprites are skipped."""
+    atlas = get_projectile_atlas()
+    for sprite_path_const in ('FIREBALL_SPRITE_PATH', 'POISON_SPRITE_PATH', 'BLOOD_SPRITE_PATH',
+                              'ICE_SPRITE_PATH', 'SHADOW_PROJECTILE_SPRITE_PATH', 'GREY_PROJECTILE_SPRITE_PATH'):
+        sprite_path = getattr(C, sprite_path_const, None)
+        if sprite_path: atlas.preload(sprite_path)
+    bolt_sprite_path = getattr(C, 'BOLT_SPRITE_PATH', None)
+    if bolt_sprite_path: atlas.preload(bolt_sprite_path, rotated=True)
+# --- End Projectile Sprite Atlas ---
+
+
 class BaseProjectile:
     def __init__(self, x: float, y: float, direction_qpointf: QPointF, owner_player: Any, config: dict):
         self.owner_player = owner_player
@@ -55,12 +156,13 @@ class BaseProjectile:
         self.sprite_path = config['sprite_path'] # This path is now relative to project root, e.g., "assets/weapons/fire.gif"
         self.effect_type = config.get('effect_type')
 
-        # `resource_path` now correctly resolves from project root
-        full_gif_path = resource_path(self.sprite_path)
-        self.frames: List[QPixmap] = load_gif_frames(full_gif_path)
+        # Frames come from the shared atlas (loaded at map start); the atlas returns () if the GIF failed
+        projectile_atlas = get_projectile_atlas()
+        self.frames: Tuple[QPixmap, ...] = projectile_atlas.get_frames(self.sprite_path)
+        self.mirrored_frames: Tuple[QPixmap, ...] = projectile_atlas.get_mirrored_frames(self.sprite_path)
 
-        if not self.frames or self._is_placeholder_qpixmap(self.frames[0]):
-            debug(f"Warning: Projectile GIF '{full_gif_path}' failed. Using fallback for {self.__class__.__name__}.")
+        if not self.frames:
+            debug(f"Warning: Projectile sprite '{self.sprite_path}' unavailable. Using fallback for {self.__class__.__name__}.")
             fb_color1_tuple = config.get('fallback_color1', getattr(C, 'ORANGE_RED', (255, 69, 0)))
             fb_color2_tuple = config.get('fallback_color2', getattr(C, 'RED', (255, 0, 0)))
             fb_color1 = QColor(*fb_color1_tuple)
@@ -76,14 +178,16 @@ class BaseProjectile:
                  painter.setBrush(fb_color2)
                  painter.drawEllipse(QRectF(w*0.25, h*0.25, w*0.5, h*0.5))
             painter.end()
-            self.frames = [fallback_pixmap]
+            self.frames = (fallback_pixmap,)
+            self.mirrored_frames = _mirror_frames(self.frames)
 
         if self.frames and self.frames[0] and not self.frames[0].isNull():
             self.dimensions = QSizeF(float(self.frames[0].width()), float(self.frames[0].height()))
         else:
             self.dimensions = QSizeF(10.0, 10.0)
             self.image = QPixmap(10,10); self.image.fill(QColor(255,0,255))
-            self.frames = [self.image]
+            self.frames = (self.image,)
+            self.mirrored_frames = self.frames
 
 
         self.current_frame_index = 0
@@ -134,7 +238,7 @@ class BaseProjectile:
         rect_y = self.pos.y() - img_h_initial / 2.0
         self.rect = QRectF(rect_x, rect_y, img_w_initial, img_h_initial)
 
-        self.original_frames = [frame.copy() for frame in self.frames]
+        self.original_frames = self.frames # Shared atlas frames; never modified in place
         self._post_init_hook()
 
         if self.frames and self.current_frame_index < len(self.frames) and \
@@ -206,9 +310,8 @@ class BaseProjectile:
                 current_vel_x = 0.0
                 if hasattr(self, 'vel') and self.vel is not None and hasattr(self.vel, 'x') and callable(self.vel.x):
                     current_vel_x = self.vel.x()
-                if current_vel_x < -0.01: # Moving left
-                    qimg = new_image_candidate.toImage()
-                    self.image = QPixmap.fromImage(qimg.mirrored(True, False)) if not qimg.isNull() else new_image_candidate
+                if current_vel_x < -0.01 and self.current_frame_index < len(self.mirrored_frames): # Moving left
+                    self.image = self.mirrored_frames[self.current_frame_index]
                 else: # Moving right or stationary
                     self.image = new_image_candidate
             else: # Bolt projectile, image is already rotated
@@ -227,7 +330,7 @@ class BaseProjectile:
         current_time_ticks = get_current_ticks_monotonic()
         if current_time_ticks - self.spawn_time > self.lifespan:
             self.kill(); return
-        for platform_obj in platforms:
+        for platform_obj in query_platforms(platforms, self.rect):
             if hasattr(platform_obj, 'rect') and isinstance(platform_obj.rect, QRectF) and \
                hasattr(self, 'rect') and self.rect is not None and self.rect.intersects(platform_obj.rect):
                 self.kill(); return
@@ -311,11 +414,14 @@ class BaseProjectile:
 
         self.current_frame_index = self.current_frame_index % len(self.frames) if self.frames and len(self.frames) > 0 else 0
         base_image_candidate = self.frames[self.current_frame_index] if self.frames and len(self.frames) > self.current_frame_index else None
-        base_image = base_image_candidate if base_image_candidate and not base_image_candidate.isNull() else QPixmap(10,10); base_image.fill(QColor(255,0,255))
-
-        if not isinstance(self, BoltProjectile) and data.get('image_flipped', False):
-            qimg = base_image.toImage();
-            self.image = QPixmap.fromImage(qimg.mirrored(True, False)) if not qimg.isNull() else base_image
+        if base_image_candidate and not base_image_candidate.isNull():
+            base_image = base_image_candidate
+        else: # Only the placeholder is filled; atlas frames are shared and must not be painted on
+            base_image = QPixmap(10,10); base_image.fill(QColor(255,0,255))
+
+        if not isinstance(self, BoltProjectile) and data.get('image_flipped', False) and \
+           base_image is base_image_candidate and self.current_frame_index < len(self.mirrored_frames):
+            self.image = self.mirrored_frames[self.current_frame_index]
         else: # Bolt or not flipped
             self.image = base_image
 
@@ -330,6 +436,11 @@ class BaseProjectile:
         else: # Fallback if image became null
             self._update_rect_from_image_and_pos()
 
+    def get_render_sprite(self) -> Optional[Tuple[QPixmap, float]]:
+        """(pixmap, opacity) drawn at rect.topLeft() in world space, or None when there's nothing to draw."""
+        if not self._alive or not self.image or self.image.isNull() or self.rect is None or not self.rect.isValid(): return None
+        return self.image, 1.0
+
 
 # --- Specific Projectile Classes ---
 class Fireball(BaseProjectile):
@@ -375,7 +486,6 @@ class BoltProjectile(BaseProjectile):
             if hasattr(self, '_bolt_is_firing_predominantly_upwards'): del self._bolt_is_firing_predominantly_upwards
             return
 
-        self.frames = [frame.copy() for frame in self.original_frames] # Work on copies
         flight_angle_deg = self._bolt_flight_angle_deg
         is_firing_predominantly_upwards = self._bolt_is_firing_predominantly_upwards
         alignment_rotation_deg = flight_angle_deg + 90.0 # Align with flight path (bolt points "up" by default)
@@ -391,20 +501,13 @@ class BoltProjectile(BaseProjectile):
             debug_msg_prefix = f"Bolt (180deg flip from alignment P{getattr(self.owner_player,'player_id','?')})"
             debug(f"{debug_msg_prefix}: FlightAngle={flight_angle_deg:.1f}, AlignRot={alignment_rotation_deg:.1f}, FinalRot={final_rotation_deg:.1f}")
 
-        transformed_frames_new: List[QPixmap] = []
-        for frame_idx, frame_pixmap in enumerate(self.frames):
-            if frame_pixmap.isNull():
-                debug(f"BoltProjectile: Frame {frame_idx} is null, skipping rotation.")
-                transformed_frames_new.append(frame_pixmap); continue
-            center = QPointF(frame_pixmap.width() / 2.0, frame_pixmap.height() / 2.0)
-            transform = QTransform().translate(center.x(), center.y()).rotate(final_rotation_deg).translate(-center.x(), -center.y())
-            rotated_pixmap = frame_pixmap.transformed(transform, Qt.TransformationMode.SmoothTransformation)
-            if rotated_pixmap.isNull():
-                debug(f"BoltProjectile: Rotated frame {frame_idx} became null. Using original.")
-                transformed_frames_new.append(frame_pixmap.copy())
-            else:
-                transformed_frames_new.append(rotated_pixmap)
-        if transformed_frames_new: self.frames = transformed_frames_new
+        # Pre-rotated frames for the nearest quantised angle (see PROJECTILE_ROTATION_STEPS)
+        projectile_atlas = get_projectile_atlas()
+        if self.original_frames is projectile_atlas.get_frames(self.sprite_path):
+            rotated_frames = projectile_atlas.get_rotated_frames(self.sprite_path, final_rotation_deg)
+        else: # Fallback art isn't in the atlas
+            rotated_frames = _rotate_frames(tuple(self.original_frames), final_rotation_deg)
+        if rotated_frames: self.frames = rotated_frames
         self.current_frame_index = 0
         del self._bolt_flight_angle_deg # Clean up temp attributes
         del self._bolt_is_firing_predominantly_upwards
@@ -1,9 +1,9 @@
 # player/statue.py
 # -*- coding: utf-8 -*-
 """
-
+MODIFIED: Statue exposes get_render_sprite() for GameSceneWidget's world-space sprite path.
 """
-# version 2.1.7 (Corrected stone asset paths)
+# version 2.1.8 (get_render_sprite)
 
 import os
 import sys # Added for path manipulation if run standalone
@@ -25,6 +25,7 @@ if _PROJECT_ROOT_FOR_STATUE_PY not in sys.path:
 # Game imports
 import main_game.constants as C
 from main_game.assets import load_gif_frames, resource_path # Corrected import path for assets
+from main_game.spatial_grid import query_platforms
 
 # Logger import
 try:
@@ -74,7 +75,7 @@ class Statue:
 
         # `resource_path` expects paths relative to project root
         full_initial_path_abs = resource_path(actual_initial_image_path_rel)
-        self.initial_image_frames = load_gif_frames(full_initial_path_abs)
+        self.initial_image_frames = load_gif_frames(full_initial_path_abs, owner=self)
 
         if not self.initial_image_frames or self._is_placeholder_qpixmap(self.initial_image_frames[0]):
             variant_str = "Crouched" if is_crouched_visual_variant else "Standing"
@@ -86,7 +87,7 @@ class Statue:
             self.image = self.initial_image_frames[0]
 
         full_smashed_path_abs = resource_path(actual_smashed_anim_path_rel)
-        self.smashed_frames = load_gif_frames(full_smashed_path_abs)
+        self.smashed_frames = load_gif_frames(full_smashed_path_abs, owner=self)
         if not self.smashed_frames or self._is_placeholder_qpixmap(self.smashed_frames[0]):
             variant_str = "Crouched" if is_crouched_visual_variant else "Standing"
             warning(f"Statue Error (ID {self.statue_id}): Failed to load smashed {variant_str} stone animation from '{full_smashed_path_abs}'. Using placeholder.")
@@ -243,7 +244,7 @@ class Statue:
         # Collision detection with platforms for falling statues (intact or smashed pieces)
         if self.vel.y() >= 0 or (self.is_smashed and not self.on_ground): # Check if moving down or if smashed and airborne
             self.on_ground = False # Assume not on ground until collision proves otherwise
-            for platform_obj in platforms_list:
+            for platform_obj in query_platforms(platforms_list, self.rect):
                 if isinstance(platform_obj, Statue) and platform_obj is self: continue # Don't collide with self
                 if isinstance(platform_obj, Statue) and platform_obj.is_smashed: continue # Smashed statues don't support
                 if not hasattr(platform_obj, 'rect') or not isinstance(platform_obj.rect, QRectF): continue
@@ -383,6 +384,12 @@ class Statue:
     def platform_type(self) -> str: # For platform collision system if it uses types
         return "smashed_debris" if self.is_smashed else "stone_obstacle"
 
+    def get_render_sprite(self) -> Optional[Tuple[QPixmap, float]]:
+        """(pixmap, opacity) drawn at rect.topLeft() in world space, or None when there's nothing to draw."""
+        if not self._valid_init or not self.image or self.image.isNull() or not self.rect.isValid(): return None
+        if not (self._alive or (self.is_smashed and not self.death_animation_finished)): return None
+        return self.image, 1.0
+
     def draw_pyside(self, painter: QPainter, camera: Any):
         if not self._valid_init or not self.image or self.image.isNull() or not self.rect.isValid():
             return